@@ -3,6 +3,10 @@ Celery application configuration for async task processing
 """
 import os
 from celery import Celery
+from dotenv import load_dotenv
+
+# Workers don't go through main.py, so load .env here as well
+load_dotenv()
 
 # Get Redis URL from environment
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
@@ -28,6 +32,13 @@ celery_app.conf.update(
     task_soft_time_limit=25 * 60,  # Soft limit at 25 minutes
     worker_prefetch_multiplier=1,  # Only fetch one task at a time
     worker_max_tasks_per_child=50,  # Restart worker after 50 tasks (memory management)
+    task_routes={
+        'send_notification': {'queue': 'emails'},  # Keep email I/O off the AI task slots
+        # CPU-bound parsing and network-bound AI calls run on separately sized workers
+        'prepare_document_text': {'queue': 'extract'},
+        'run_text_extraction': {'queue': 'extract'},
+        'run_vertex_tool': {'queue': 'ai_io'},
+    },
 )
 
 if __name__ == '__main__':
@@ -0,0 +1,81 @@
+"""
+Upload size limits
+Rejects empty and oversized request bodies before FastAPI parses them
+"""
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Multipart boundaries and form fields on top of the file itself
+MULTIPART_OVERHEAD = 1024 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware enforcing a request body ceiling.
+    
+    Requests with a Content-Length are answered with 413 (or 400 for an empty
+    multipart body) without reading anything. Chunked requests are counted as
+    they stream in and aborted once they pass the limit.
+    """
+    
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size + MULTIPART_OVERHEAD
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+        
+        headers = Headers(scope=scope)
+        content_length = headers.get("content-length")
+        
+        if content_length is not None:
+            try:
+                size = int(content_length)
+            except ValueError:
+                await self._reject(scope, receive, send, 400, "Invalid Content-Length header")
+                return
+            
+            if size > self.max_body_size:
+                await self._reject(scope, receive, send, 413, "Upload exceeds the maximum allowed size")
+                return
+            if size == 0 and headers.get("content-type", "").startswith("multipart/form-data"):
+                await self._reject(scope, receive, send, 400, "File is empty")
+                return
+            
+            await self.app(scope, receive, send)
+            return
+        
+        # No Content-Length (chunked transfer): count bytes as the body arrives
+        received = 0
+        response_started = False
+        
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise HTTPException(status_code=413, detail="Upload exceeds the maximum allowed size")
+            return message
+        
+        async def tracking_send(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as e:
+            if e.status_code != 413 or response_started:
+                raise
+            await self._reject(scope, receive, send, 413, e.detail)
+    
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str):
+        response = JSONResponse({"detail": detail}, status_code=status_code)
+        await response(scope, receive, send)
@@ -2,18 +2,36 @@
 Database configuration and session management for PostgreSQL/SQLite + SQLAlchemy
 """
 import os
+import json
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Get database URL from environment, fallback to SQLite for development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./halodocs.db")
 
+
+def _json_serializer(value) -> str:
+    """Serialize JSON/JSONB column values (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value)
+
+
+_json_deserializer = orjson.loads if orjson is not None else json.loads
+
 # Handle SQLite-specific configuration
 if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False},  # SQLite specific
+        json_serializer=_json_serializer,
+        json_deserializer=_json_deserializer,
         echo=False  # Set to True for SQL query logging in development
     )
 else:
@@ -21,8 +39,11 @@ else:
     engine = create_engine(
         DATABASE_URL,
         pool_pre_ping=True,  # Verify connections before using
+        pool_recycle=300,  # Replace connections before server/proxy idle timeouts drop them
         pool_size=10,
         max_overflow=20,
+        json_serializer=_json_serializer,
+        json_deserializer=_json_deserializer,
         echo=False  # Set to True for SQL query logging in development
     )
 
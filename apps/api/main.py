@@ -2,6 +2,8 @@
 HALO Docs AI - FastAPI Backend
 Production-ready API with all tool endpoints
 """
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
@@ -23,6 +25,23 @@ logger = logging.getLogger(__name__)
 from routers.tools import tools_router
 # Note: ai_router removed - ai_workspace provides complete AI functionality with Form data support
 from routers.ai_workspace import router as ai_workspace_router
+from services.vertex_ai_tools import vertex_ai_tools
+from storage import get_storage_backend
+from core.upload_limits import UploadSizeLimitMiddleware
+from utils.file_validator import FileValidator
+from utils.temp_manager import temp_manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Preload shared clients and start the temp file janitor on startup; release them on shutdown"""
+    # Cloud storage SDKs read credentials from disk; keep that off the event loop
+    app.state.storage = await asyncio.to_thread(get_storage_backend)
+    janitor = temp_manager.start_janitor()
+    yield
+    janitor.cancel()
+    await vertex_ai_tools.aclose()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -30,7 +49,8 @@ app = FastAPI(
     description="Professional-grade tools for PDF, Office documents, images, and AI processing",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS for local and Cloud Run deployments
@@ -55,6 +75,10 @@ cors_origins.extend([
     "https://*.a.run.app",
 ])
 
+# Refuse uploads above the largest per-type limit before the body is read.
+# Registered before CORS so CORS wraps it and its 413s still carry CORS headers.
+app.add_middleware(UploadSizeLimitMiddleware, max_body_size=FileValidator.MAX_VIDEO_SIZE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins if "*" not in cors_origins else ["*"],
@@ -5,6 +5,8 @@ Resize multiple images at once
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import StreamingResponse
 from typing import List, Optional
+from pathlib import Path
+import asyncio
 import zipfile
 import io
 
@@ -71,9 +73,9 @@ async def bulk_resize(
         
         # Create output directory
         output_dir = temp_manager.create_temp_dir(prefix="bulk_resize_")
-        resized_files = []
+        jobs = []
         
-        # Process each image
+        # Save each image and queue its resize
         for idx, file in enumerate(files):
             try:
                 # Validate image
@@ -110,14 +112,16 @@ async def bulk_resize(
                 if format:
                     options['format'] = format.upper()
                 
-                # Resize image
-                ImageProcessor.resize_image(input_file, output_file, options)
-                resized_files.append(output_file)
+                jobs.append(('resize_image', input_file, output_file, options))
                 
             except Exception as e:
                 # Skip failed images
                 continue
         
+        # Resize all images in parallel; failed images are skipped
+        results = await asyncio.to_thread(ImageProcessor.process_batch, jobs)
+        resized_files = [result for result in results if isinstance(result, Path)]
+        
         if not resized_files:
             raise HTTPException(status_code=500, detail="No images were successfully resized")
         
@@ -83,7 +83,7 @@ async def compress_pdf(
             'linearize': linearize
         }
         
-        PDFProcessor.compress_pdf(input_file, output_file, options)
+        await PDFProcessor.acompress_pdf(input_file, output_file, options)
         
         # Determine output filename
         if not output_filename:
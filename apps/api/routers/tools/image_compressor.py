@@ -99,17 +99,9 @@ async def compress_image(
             'target_size_mb': targetSize
         }
         
+        # A target size is met inside compress_image_advanced by searching quality in memory
         ImageProcessor.compress_image_advanced(input_file, output_file, options)
         
-        # If target size is set, iteratively compress until under target
-        if targetSize > 0:
-            target_bytes = targetSize * 1024 * 1024
-            current_quality = quality
-            while output_file.stat().st_size > target_bytes and current_quality > 10:
-                current_quality -= 10
-                options['quality'] = current_quality
-                ImageProcessor.compress_image_advanced(input_file, output_file, options)
-        
         # Calculate compression ratio
         compressed_size = output_file.stat().st_size
         compression_ratio = ((original_size - compressed_size) / original_size) * 100
@@ -83,7 +83,7 @@ async def merge_pdf(
             'preserve_forms': True
         }
         
-        PDFProcessor.merge_pdfs(temp_files, output_file, options)
+        await PDFProcessor.amerge_pdfs(temp_files, output_file, options)
         
         # Determine output filename
         if not output_filename:
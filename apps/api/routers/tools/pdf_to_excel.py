@@ -47,7 +47,7 @@ async def pdf_to_excel(
     
     **Note:** Only tables are extracted. This works best with PDFs containing clear table structures.
     
-    **Requirements:** tabula-py library must be installed
+    **Requirements:** xlsxwriter (or pandas and openpyxl) must be installed
     """
     
     try:
@@ -109,7 +109,7 @@ async def pdf_to_image(
             'resize_percent': resizePercent
         }
         
-        output_files = PDFProcessor.pdf_to_images(input_file, output_dir, options)
+        output_files = await PDFProcessor.apdf_to_images(input_file, output_dir, options)
         
         if not output_files:
             raise HTTPException(status_code=500, detail="No images generated")
@@ -105,7 +105,7 @@ async def split_pdf(
             raise HTTPException(status_code=400, detail=f"Invalid mode: {splitMode}")
         
         # Split PDF
-        output_files = PDFProcessor.split_pdf(input_file, output_dir, options)
+        output_files = await PDFProcessor.asplit_pdf(input_file, output_dir, options)
         
         if not output_files:
             raise HTTPException(status_code=500, detail="No files generated")
@@ -81,7 +81,7 @@ async def download_video(
             options['max_filesize'] = max_filesize
         
         # Download video
-        downloaded_file = VideoProcessor.download_video(url, output_file, options)
+        downloaded_file = await VideoProcessor.adownload_video(url, output_file, options)
         
         # Return file
         filename = f"video.{extension}" if audio_only else f"video.{format.lower()}"
@@ -14,7 +14,7 @@ from sqlalchemy.orm import Session
 import models
 from database import get_db
 from routers.auth import get_current_user
-from storage import storage, LocalStorage
+from storage import get_storage_backend, LocalStorage
 
 logger = logging.getLogger(__name__)
 
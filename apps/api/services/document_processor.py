@@ -6,9 +6,10 @@ import logging
 from typing import Optional
 from fastapi import UploadFile
 import PyPDF2
-import pdfplumber
 from io import BytesIO
 
+from utils.pdf_extract import open_pdf
+
 logger = logging.getLogger(__name__)
 
 class DocumentProcessor:
@@ -55,7 +56,7 @@ class DocumentProcessor:
         
         try:
             # Try pdfplumber first (better for complex layouts)
-            with pdfplumber.open(BytesIO(content)) as pdf:
+            with open_pdf(BytesIO(content)) as pdf:
                 for page in pdf.pages:
                     page_text = page.extract_text()
                     if page_text:
@@ -0,0 +1,117 @@
+"""
+LLM Response Cache
+Exact-match cache for near-deterministic Vertex AI text generations
+"""
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Optional, Protocol, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Generations at or below this temperature are treated as repeatable
+CACHEABLE_TEMPERATURE = 0.3
+
+
+class CacheBackend(Protocol):
+    """Storage used by LLMCache"""
+    
+    async def get(self, key: str) -> Optional[str]:
+        ...
+    
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        ...
+
+
+class LRUBackend:
+    """In-process LRU store with per-entry expiry"""
+    
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+    
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class RedisBackend:
+    """
+    Redis store shared across API and worker processes.
+    
+    Uses the synchronous client from a worker thread so it is not tied to
+    any one event loop (Celery tasks run each job in a fresh asyncio.run()).
+    """
+    
+    def __init__(self, url: str, prefix: str = "llm-cache:"):
+        import redis
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+    
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._client.get, self.prefix + key)
+    
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await asyncio.to_thread(self._client.set, self.prefix + key, value, ex=ttl)
+
+
+class LLMCache:
+    """Exact-match cache keyed on model, sampling parameters and prompt"""
+    
+    def __init__(self, backend: CacheBackend, ttl: int = 3600):
+        self.backend = backend
+        self.ttl = ttl
+    
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """Hash the request into a fixed-size cache key"""
+        raw = f"{model}|{temperature}|{max_tokens}|{prompt}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=32).hexdigest()
+    
+    async def get(self, key: str) -> Optional[str]:
+        """Return a cached response, treating backend failures as misses"""
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+    
+    async def set(self, key: str, value: str) -> None:
+        """Store a response; backend failures are logged and ignored"""
+        try:
+            await self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+
+def get_llm_cache() -> LLMCache:
+    """Build the cache from environment configuration"""
+    ttl = int(os.getenv("LLM_CACHE_TTL", "3600"))
+    redis_url = os.getenv("LLM_CACHE_REDIS_URL")
+    
+    if redis_url:
+        try:
+            return LLMCache(RedisBackend(redis_url), ttl=ttl)
+        except Exception as e:
+            logger.warning(f"Redis LLM cache unavailable, using in-memory cache: {e}")
+    
+    maxsize = int(os.getenv("LLM_CACHE_MAXSIZE", "10000"))
+    return LLMCache(LRUBackend(maxsize=maxsize), ttl=ttl)
@@ -5,16 +5,43 @@ Handles traditional PDF operations
 import logging
 import os
 import tempfile
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 import PyPDF2
+import pikepdf
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from io import BytesIO
 
 logger = logging.getLogger(__name__)
 
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
 class PDFUtilsService:
-    """Service for PDF utility operations"""
+    """Service for PDF utility operations
+    
+    Each operation has a ``*_buffer`` variant that returns the result as an
+    in-memory ``BytesIO`` so routes can stream it without a temp-file round
+    trip. The path-returning methods are kept as thin wrappers.
+    """
+    
+    @staticmethod
+    async def iter_buffer(buffer: BytesIO, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Yield a buffer's contents in chunks, e.g. for a StreamingResponse"""
+        view = buffer.getbuffer()
+        try:
+            for offset in range(0, len(view), chunk_size):
+                yield bytes(view[offset:offset + chunk_size])
+        finally:
+            view.release()
+    
+    @staticmethod
+    def _write_temp(buffer: BytesIO) -> str:
+        """Write a result buffer to a temp PDF and return its path"""
+        output_path = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf").name
+        with open(output_path, 'wb') as output_file:
+            output_file.write(buffer.getbuffer())
+        return output_path
     
     async def merge_pdfs(self, file_paths: List[str]) -> str:
         """
@@ -26,18 +53,23 @@ class PDFUtilsService:
         Returns:
             Path to merged PDF
         """
+        return self._write_temp(await self.merge_pdfs_buffer(file_paths))
+    
+    async def merge_pdfs_buffer(self, file_paths: List[str]) -> BytesIO:
+        """Merge multiple PDF files into an in-memory buffer"""
         try:
             merger = PyPDF2.PdfMerger()
             
             for pdf_path in file_paths:
                 merger.append(pdf_path)
             
-            output_path = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf").name
-            merger.write(output_path)
+            buffer = BytesIO()
+            merger.write(buffer)
             merger.close()
+            buffer.seek(0)
             
-            logger.info(f"Merged {len(file_paths)} PDFs into {output_path}")
-            return output_path
+            logger.info(f"Merged {len(file_paths)} PDFs")
+            return buffer
         
         except Exception as e:
             logger.error(f"PDF merge error: {str(e)}")
@@ -60,9 +92,19 @@ class PDFUtilsService:
         Returns:
             List of output file paths
         """
+        buffers = await self.split_pdf_buffers(file_path, pages, split_by)
+        return [self._write_temp(buffer) for buffer in buffers]
+    
+    async def split_pdf_buffers(
+        self,
+        file_path: str,
+        pages: Optional[str] = None,
+        split_by: str = "range"
+    ) -> List[BytesIO]:
+        """Split PDF into in-memory buffers, one per output document"""
         try:
             reader = PyPDF2.PdfReader(file_path)
-            output_files = []
+            outputs = []
             
             if split_by == "range" and pages:
                 # Parse page ranges
@@ -72,10 +114,7 @@ class PDFUtilsService:
                 for page_num in page_numbers:
                     writer.add_page(reader.pages[page_num])
                 
-                output_path = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf").name
-                with open(output_path, 'wb') as output_file:
-                    writer.write(output_file)
-                output_files.append(output_path)
+                outputs.append(self._writer_to_buffer(writer))
             
             elif split_by == "pages":
                 # Split into individual pages
@@ -83,13 +122,10 @@ class PDFUtilsService:
                     writer = PyPDF2.PdfWriter()
                     writer.add_page(page)
                     
-                    output_path = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf").name
-                    with open(output_path, 'wb') as output_file:
-                        writer.write(output_file)
-                    output_files.append(output_path)
+                    outputs.append(self._writer_to_buffer(writer))
             
-            logger.info(f"Split PDF into {len(output_files)} files")
-            return output_files
+            logger.info(f"Split PDF into {len(outputs)} files")
+            return outputs
         
         except Exception as e:
             logger.error(f"PDF split error: {str(e)}")
@@ -110,6 +146,10 @@ class PDFUtilsService:
         Returns:
             Path to compressed PDF
         """
+        return self._write_temp(await self.compress_pdf_buffer(file_path, quality))
+    
+    async def compress_pdf_buffer(self, file_path: str, quality: str = "medium") -> BytesIO:
+        """Compress PDF into an in-memory buffer"""
         try:
             reader = PyPDF2.PdfReader(file_path)
             writer = PyPDF2.PdfWriter()
@@ -118,12 +158,10 @@ class PDFUtilsService:
                 page.compress_content_streams()
                 writer.add_page(page)
             
-            output_path = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf").name
-            with open(output_path, 'wb') as output_file:
-                writer.write(output_file)
+            buffer = self._writer_to_buffer(writer)
             
-            logger.info(f"Compressed PDF: {file_path} -> {output_path}")
-            return output_path
+            logger.info(f"Compressed PDF: {file_path}")
+            return buffer
         
         except Exception as e:
             logger.error(f"PDF compression error: {str(e)}")
@@ -146,27 +184,35 @@ class PDFUtilsService:
         Returns:
             Path to rotated PDF
         """
+        return self._write_temp(await self.rotate_pdf_buffer(file_path, angle, pages))
+    
+    async def rotate_pdf_buffer(
+        self,
+        file_path: str,
+        angle: int = 90,
+        pages: Optional[str] = None
+    ) -> BytesIO:
+        """Rotate PDF pages into an in-memory buffer"""
         try:
-            reader = PyPDF2.PdfReader(file_path)
-            writer = PyPDF2.PdfWriter()
-            
-            # Determine which pages to rotate
-            if pages:
-                page_numbers = self._parse_page_range(pages, len(reader.pages))
-            else:
-                page_numbers = range(len(reader.pages))
-            
-            for i, page in enumerate(reader.pages):
-                if i in page_numbers:
-                    page.rotate(angle)
-                writer.add_page(page)
-            
-            output_path = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf").name
-            with open(output_path, 'wb') as output_file:
-                writer.write(output_file)
+            with pikepdf.open(file_path) as pdf:
+                # Determine which pages to rotate
+                if pages:
+                    page_numbers = set(self._parse_page_range(pages, len(pdf.pages)))
+                else:
+                    page_numbers = range(len(pdf.pages))
+                
+                # Write /Rotate directly instead of re-normalizing each page;
+                # relative=True also honours a /Rotate inherited from the page tree
+                for i, page in enumerate(pdf.pages):
+                    if i in page_numbers:
+                        page.rotate(angle, relative=True)
+                
+                buffer = BytesIO()
+                pdf.save(buffer)
+                buffer.seek(0)
             
             logger.info(f"Rotated PDF by {angle} degrees")
-            return output_path
+            return buffer
         
         except Exception as e:
             logger.error(f"PDF rotation error: {str(e)}")
@@ -191,6 +237,16 @@ class PDFUtilsService:
         Returns:
             Path to watermarked PDF
         """
+        return self._write_temp(await self.add_watermark_buffer(file_path, text, opacity, position))
+    
+    async def add_watermark_buffer(
+        self,
+        file_path: str,
+        text: str,
+        opacity: float = 0.3,
+        position: str = "center"
+    ) -> BytesIO:
+        """Add watermark to PDF into an in-memory buffer"""
         try:
             reader = PyPDF2.PdfReader(file_path)
             writer = PyPDF2.PdfWriter()
@@ -220,12 +276,10 @@ class PDFUtilsService:
                 page.merge_page(watermark_page)
                 writer.add_page(page)
             
-            output_path = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf").name
-            with open(output_path, 'wb') as output_file:
-                writer.write(output_file)
+            buffer = self._writer_to_buffer(writer)
             
             logger.info(f"Added watermark to PDF")
-            return output_path
+            return buffer
         
         except Exception as e:
             logger.error(f"Watermark error: {str(e)}")
@@ -277,6 +331,15 @@ class PDFUtilsService:
         Returns:
             Path to numbered PDF
         """
+        return self._write_temp(await self.add_page_numbers_buffer(file_path, position, start_number))
+    
+    async def add_page_numbers_buffer(
+        self,
+        file_path: str,
+        position: str = "bottom-center",
+        start_number: int = 1
+    ) -> BytesIO:
+        """Add page numbers to PDF into an in-memory buffer"""
         try:
             reader = PyPDF2.PdfReader(file_path)
             writer = PyPDF2.PdfWriter()
@@ -301,12 +364,10 @@ class PDFUtilsService:
                 page.merge_page(overlay_pdf.pages[0])
                 writer.add_page(page)
             
-            output_path = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf").name
-            with open(output_path, 'wb') as output_file:
-                writer.write(output_file)
+            buffer = self._writer_to_buffer(writer)
             
             logger.info(f"Added page numbers to PDF")
-            return output_path
+            return buffer
         
         except Exception as e:
             logger.error(f"Page numbering error: {str(e)}")
@@ -322,6 +383,10 @@ class PDFUtilsService:
         Returns:
             Path to repaired PDF
         """
+        return self._write_temp(await self.repair_pdf_buffer(file_path))
+    
+    async def repair_pdf_buffer(self, file_path: str) -> BytesIO:
+        """Attempt to repair a damaged PDF into an in-memory buffer"""
         try:
             reader = PyPDF2.PdfReader(file_path, strict=False)
             writer = PyPDF2.PdfWriter()
@@ -329,17 +394,23 @@ class PDFUtilsService:
             for page in reader.pages:
                 writer.add_page(page)
             
-            output_path = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf").name
-            with open(output_path, 'wb') as output_file:
-                writer.write(output_file)
+            buffer = self._writer_to_buffer(writer)
             
             logger.info(f"Repaired PDF: {file_path}")
-            return output_path
+            return buffer
         
         except Exception as e:
             logger.error(f"PDF repair error: {str(e)}")
             raise
     
+    @staticmethod
+    def _writer_to_buffer(writer: PyPDF2.PdfWriter) -> BytesIO:
+        """Serialize a PdfWriter into a rewound in-memory buffer"""
+        buffer = BytesIO()
+        writer.write(buffer)
+        buffer.seek(0)
+        return buffer
+    
     def _parse_page_range(self, page_range: str, total_pages: int) -> List[int]:
         """Parse page range string into list of page numbers"""
         pages = []
@@ -3,10 +3,11 @@ Google Vertex AI Client - Direct Integration
 Handles all AI requests to Google Vertex AI endpoints
 """
 import os
+import asyncio
 import httpx
 import json
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -14,6 +15,9 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on in-flight Gemini requests per batch call
+MAX_CONCURRENT_REQUESTS = 16
+
 class VertexAIClient:
     """Direct Google Vertex AI client for all AI operations"""
     
@@ -55,10 +59,7 @@ class VertexAIClient:
         
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
-                # Log the exact request being sent
-                print(f"🔍 Vertex AI Request URL: {url}")
-                print(f"🔍 Vertex AI Request Body: {json.dumps(payload, indent=2)}")
-                print(f"🔍 Vertex AI Request Headers: {json.dumps({'Content-Type': 'application/json'}, indent=2)}")
+                logger.debug("🔍 Vertex AI request: model=%s prompt=%.100s", model, prompt)
                 
                 response = await client.post(
                     url,
@@ -66,9 +67,7 @@ class VertexAIClient:
                     headers={"Content-Type": "application/json"}
                 )
                 
-                # Log response details
-                print(f"🔍 Vertex AI Response Status: {response.status_code}")
-                print(f"🔍 Vertex AI Response Body: {response.text}")
+                logger.debug("🔍 Vertex AI response status: %s", response.status_code)
                 
                 response.raise_for_status()
                 
@@ -97,8 +96,7 @@ class VertexAIClient:
                 
         except httpx.HTTPStatusError as e:
             error_text = e.response.text
-            print(f"❌ Vertex AI HTTP Error: {e.response.status_code} - {error_text}")
-            logger.error(f"Vertex AI API error: {e.response.status_code} - {error_text}")
+            logger.error("Vertex AI API error: %s - %.512s", e.response.status_code, error_text)
             
             # Parse error response for better user feedback
             try:
@@ -115,10 +113,26 @@ class VertexAIClient:
                 return f"API Error {e.response.status_code}: {error_text}"
                 
         except Exception as e:
-            print(f"❌ Vertex AI Client Error: {e}")
-            logger.error(f"Vertex AI client error: {e}")
+            logger.error("Vertex AI client error: %s", e)
             return f"Error: {str(e)}"
     
+    async def generate_text_many(
+        self,
+        prompts: List[str],
+        model: str = "gemini-2.5-flash-lite",
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        concurrency: int = MAX_CONCURRENT_REQUESTS
+    ) -> List[str]:
+        """Generate text for several prompts concurrently, preserving input order"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def generate_one(prompt: str) -> str:
+            async with semaphore:
+                return await self.generate_text(prompt, model=model, temperature=temperature, max_tokens=max_tokens)
+        
+        return await asyncio.gather(*(generate_one(prompt) for prompt in prompts))
+    
     async def generate_image(
         self, 
         prompt: str, 
@@ -260,31 +274,49 @@ class VertexAIClient:
             logger.error(f"Veo client error: {e}")
             return {"error": f"Error: {str(e)}"}
     
-    async def summarize_text(self, text: str, summary_type: str = "concise") -> str:
-        """Summarize text using Gemini"""
+    async def summarize_text(
+        self,
+        text: Union[str, List[str]],
+        summary_type: str = "concise"
+    ) -> Union[str, List[str]]:
+        """Summarize text using Gemini; a list of texts is summarized concurrently"""
         
-        prompt = f"""
+        texts = [text] if isinstance(text, str) else text
+        prompts = [
+            f"""
         Please provide a {summary_type} summary of the following text:
         
-        {text}
+        {item}
         
         Summary:
         """
+            for item in texts
+        ]
         
-        return await self.generate_text(prompt, temperature=0.3)
+        results = await self.generate_text_many(prompts, temperature=0.3)
+        return results[0] if isinstance(text, str) else results
     
-    async def translate_text(self, text: str, target_language: str = "English") -> str:
-        """Translate text using Gemini"""
+    async def translate_text(
+        self,
+        text: Union[str, List[str]],
+        target_language: str = "English"
+    ) -> Union[str, List[str]]:
+        """Translate text using Gemini; a list of texts is translated concurrently"""
         
-        prompt = f"""
+        texts = [text] if isinstance(text, str) else text
+        prompts = [
+            f"""
         Please translate the following text to {target_language}:
         
-        {text}
+        {item}
         
         Translation:
         """
+            for item in texts
+        ]
         
-        return await self.generate_text(prompt, temperature=0.2)
+        results = await self.generate_text_many(prompts, temperature=0.2)
+        return results[0] if isinstance(text, str) else results
     
     async def improve_text(self, text: str, improvement_type: str = "general") -> str:
         """Improve text using Gemini"""
@@ -3,46 +3,282 @@ Vertex AI Tools Service
 Handles all AI-powered document processing tools using Vertex AI
 """
 import os
+import asyncio
+import base64
+import hashlib
 import logging
 import json
+import secrets
+import time
 import httpx
-from typing import Dict, Any, List
-from dotenv import load_dotenv
+from dataclasses import dataclass
+from functools import lru_cache
+from string import Template
+from typing import AsyncIterator, Dict, Any, Final, List, Optional, Tuple
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 
-# Load environment variables
-load_dotenv()
+from services.llm_cache import CACHEABLE_TEMPERATURE, LLMCache, get_llm_cache
+from storage import aget_storage_backend
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
 
 logger = logging.getLogger(__name__)
 
 
+def _dumps(payload: Any) -> bytes:
+    """Serialize a request payload to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(content: bytes) -> Any:
+    """Parse a JSON response body"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _prompt_id(prompt: str) -> str:
+    """Stable 64-bit hex digest of a prompt, identical across processes and restarts"""
+    return hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).hexdigest()
+
+
+# Document budgets per prompt, in tokens. These match the previous character
+# limits (15000/10000/5000) at roughly four characters per token.
+CHARS_PER_TOKEN = 4
+LONG_DOC_TOKENS = 3750
+DOC_TOKENS = 2500
+SHORT_DOC_TOKENS = 1250
+
+
+@lru_cache(maxsize=1)
+def _get_tokenizer():
+    """Load the BPE tokenizer once per process; None if unavailable"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("Tokenizer unavailable, truncating by characters: %s", e)
+        return None
+
+
+def _token_window(max_tokens: int) -> int:
+    """Characters _truncate_tokens reads at most for a max_tokens budget"""
+    return max_tokens * CHARS_PER_TOKEN * 4
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens, on a token boundary"""
+    # A BPE token covers at least one UTF-8 byte, so text this short is already within budget
+    if len(text) <= max_tokens and (text.isascii() or len(text.encode("utf-8")) <= max_tokens):
+        return text
+    
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    
+    # Only encode a generous window so huge documents don't pay for a full tokenization
+    window = text[:_token_window(max_tokens)]
+    tokens = tokenizer.encode(window, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return window
+    return tokenizer.decode(tokens[:max_tokens])
+
+
+def _unexpired(entries: Dict[str, float], now: float) -> Dict[str, float]:
+    """Entries whose expiry is still ahead, trimmed to the DOC_CACHE_MAX_TRACKED most recent"""
+    live = {k: v for k, v in entries.items() if v > now}
+    if len(live) >= DOC_CACHE_MAX_TRACKED:
+        live = dict(sorted(live.items(), key=lambda item: item[1])[-(DOC_CACHE_MAX_TRACKED - 1):])
+    return live
+
+
+def _first_n_nonempty(text: str, n: int) -> List[str]:
+    """Return the first n non-blank stripped lines, stopping as soon as they are found"""
+    lines: List[str] = []
+    start = 0
+    while len(lines) < n and start <= len(text):
+        end = text.find('\n', start)
+        if end == -1:
+            end = len(text)
+        line = text[start:end].strip()
+        if line:
+            lines.append(line)
+        start = end + 1
+    return lines
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Rate limits, server errors and dropped connections are worth retrying"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+@dataclass(frozen=True)
+class VertexAIConfig:
+    """Vertex AI settings resolved from the environment"""
+    api_key: Optional[str]
+    endpoint: str
+    gemini_model: str
+    imagen_model: str
+    video_model: str
+    project_id: Optional[str]
+    location: str
+    
+    def describe(self) -> Dict[str, Any]:
+        """Loggable summary of the configuration (never includes the key itself)"""
+        return {
+            "api_key_set": bool(self.api_key),
+            "endpoint": self.endpoint,
+            "gemini_model": self.gemini_model,
+            "imagen_model": self.imagen_model,
+            "video_model": self.video_model,
+            "project_id": self.project_id,
+            "location": self.location,
+        }
+
+
+@lru_cache()
+def get_config() -> VertexAIConfig:
+    """Read the Vertex AI environment once per process"""
+    config = VertexAIConfig(
+        api_key=os.getenv("VERTEX_AI_API_KEY"),
+        endpoint=os.getenv("VERTEX_AI_ENDPOINT", "https://aiplatform.googleapis.com/v1/publishers/google/models"),
+        gemini_model=os.getenv("VERTEX_AI_GEMINI_MODEL", "gemini-2.0-flash-exp"),
+        imagen_model=os.getenv("VERTEX_AI_IMAGEN_MODEL", "imagen-3.0-generate-001"),
+        video_model=os.getenv("VERTEX_AI_VIDEO_MODEL", "veo-3.1-generate-preview"),
+        project_id=os.getenv("GOOGLE_CLOUD_PROJECT"),
+        location=os.getenv("VERTEX_AI_LOCATION", "us-central1"),
+    )
+    logger.info("🔍 Vertex AI Tools configuration: %s", config.describe())
+    return config
+
+
+# Connection pool shared by every Vertex AI call made through the service
+HTTP_TIMEOUT = httpx.Timeout(30.0)
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=50, max_connections=100, keepalive_expiry=60.0)
+# Video generation can take minutes to respond but should still connect quickly
+VIDEO_TIMEOUT = httpx.Timeout(connect=10.0, read=120.0, write=30.0, pool=5.0)
+
+# Upper bound on in-flight requests issued by the batch helpers
+BATCH_CONCURRENCY = 10
+
+# Lifetime of signed URLs returned for generated media
+MEDIA_URL_EXPIRES_IN = 24 * 60 * 60
+
+# Server-side context caches (cachedContents) for documents that several tools
+# run over; small documents are sent inline since caching them saves little
+DOC_CACHE_TTL = 3600
+DOC_CACHE_REFRESH_FRACTION = 0.8
+DOC_CACHE_MIN_TOKENS = 2048
+# Cached prefill is cheap, so a cached document keeps far more context than an inline one
+DOC_CACHE_DOC_TOKENS = 32768
+# Longest document prefix _generate_over_document reads; text past it never reaches the model
+DOCUMENT_MAX_CHARS = _token_window(max(LONG_DOC_TOKENS, DOC_CACHE_DOC_TOKENS))
+# Consecutive 400s on cache creation before deciding the model can't cache at all
+DOC_CACHE_MAX_REJECTIONS = 3
+# Bound on the per-process bookkeeping of documents seen or rejected
+DOC_CACHE_MAX_TRACKED = 1024
+
+# Static request fragments, built once instead of on every call.
+# Prompts put fixed instructions first, then the document, then per-call
+# values (language, question, tone...) so repeat requests over the same
+# document share the longest possible prefix for Gemini's prompt caching.
+# Summaries, reviews and insights instead lead with the document so the
+# three tools can share one explicit context cache (see _generate_over_document).
+_SAFETY_SETTINGS: Final[Tuple[Dict[str, str], ...]] = (
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+)
+
+_LENGTH_INSTR: Final[Dict[str, str]] = {
+    "short": "Provide a concise summary in 2-3 sentences",
+    "medium": "Provide a balanced summary with key points",
+    "long": "Provide a detailed comprehensive summary"
+}
+
+_FORMAT_INSTR: Final[Dict[str, str]] = {
+    "bullets": "Format the response as bullet points",
+    "paragraphs": "Format the response as paragraphs",
+    "sections": "Format the response with clear sections and headings"
+}
+
+_TRANSLATE_FORMAT_INSTR: Final[Dict[bool, str]] = {
+    True: "Preserve the original formatting, paragraphs, and structure",
+    False: "Focus only on accurate translation"
+}
+
+_STYLE_INSTR: Final[Dict[str, str]] = {
+    "professional": "Make it more professional, formal, and business-appropriate",
+    "casual": "Make it more casual, friendly, and conversational",
+    "academic": "Make it more academic, scholarly, and research-oriented",
+    "creative": "Make it more creative, engaging, and imaginative"
+}
+
+_REVIEW_INSTR: Final[Dict[str, str]] = {
+    "general": "Review the document for overall quality, clarity, and effectiveness",
+    "legal": "Review the document for legal issues, compliance, and potential risks",
+    "technical": "Review the document for technical accuracy, clarity, and completeness",
+    "grammar": "Review the document for grammar, spelling, punctuation, and style issues"
+}
+
+_PROPOSAL_INSTR: Final[Dict[str, str]] = {
+    "business": "Write a business proposal",
+    "grant": "Write a grant proposal",
+    "project": "Write a project proposal"
+}
+
+_TAGLINE_INSTR: Final[Dict[str, str]] = {
+    "catchy": "Make them catchy and memorable",
+    "professional": "Make them professional and corporate",
+    "creative": "Make them creative and unique"
+}
+
+_SUMMARIZE_TEMPLATE: Final[Template] = Template("""
+$length_instruction of the document above. $format_instruction.
+
+Summary:
+""")
+
+_TAGLINE_TEMPLATE: Final[Template] = Template("""
+Generate distinct taglines based on the following document. $style_instruction. 
+Return only the taglines, one per line, without numbering.
+
+Document:
+$text
+
+Number of taglines: $count
+
+Taglines:
+""")
+
+
 class VertexAIToolsService:
     """
     Service for interacting with Vertex AI for all AI tools
     """
     
     def __init__(self):
-        # Debug environment variables
-        logger.info("🔍 Vertex AI Tools Service Debug:")
-        logger.info(f"- VERTEX_AI_API_KEY exists: {bool(os.getenv('VERTEX_AI_API_KEY'))}")
-        logger.info(f"- API_KEY length: {len(os.getenv('VERTEX_AI_API_KEY', ''))}")
-        api_key = os.getenv("VERTEX_AI_API_KEY")
-        if api_key:
-            logger.info(f"- API_KEY prefix: {api_key[:10]}...")
-        
-        logger.info(f"- VERTEX_AI_ENDPOINT: {os.getenv('VERTEX_AI_ENDPOINT')}")
-        logger.info(f"- VERTEX_AI_GEMINI_MODEL: {os.getenv('VERTEX_AI_GEMINI_MODEL')}")
-        logger.info(f"- VERTEX_AI_IMAGEN_MODEL: {os.getenv('VERTEX_AI_IMAGEN_MODEL')}")
-        logger.info(f"- VERTEX_AI_VIDEO_MODEL: {os.getenv('VERTEX_AI_VIDEO_MODEL')}")
-        
-        # List available environment variables
-        ai_env_vars = {k: v for k, v in os.environ.items() if 'VERTEX' in k or 'AI' in k}
-        logger.info(f"- Available AI env vars: {list(ai_env_vars.keys())}")
-        
-        self.api_key = os.getenv("VERTEX_AI_API_KEY")
-        self.endpoint = os.getenv("VERTEX_AI_ENDPOINT", "https://aiplatform.googleapis.com/v1/publishers/google/models")
-        self.gemini_model = os.getenv("VERTEX_AI_GEMINI_MODEL", "gemini-2.0-flash-exp")
-        self.imagen_model = os.getenv("VERTEX_AI_IMAGEN_MODEL", "imagen-3.0-generate-001")
-        self.video_model = os.getenv("VERTEX_AI_VIDEO_MODEL", "veo-3.1-generate-preview")
+        cfg = get_config()
+        self.api_key = cfg.api_key
+        self.endpoint = cfg.endpoint
+        self.gemini_model = cfg.gemini_model
+        self.imagen_model = cfg.imagen_model
+        self.video_model = cfg.video_model
         
         if not self.api_key:
             logger.error("❌ VERTEX_AI_API_KEY not configured - will use mock responses")
@@ -50,101 +286,333 @@ class VertexAIToolsService:
         else:
             logger.info("✅ Vertex AI API key loaded successfully")
             self.use_mock = False
+        
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cache = get_llm_cache()
+        
+        # cachedContents are project resources, so they need a project on top of the API key
+        self._doc_cache_enabled = not self.use_mock and bool(cfg.project_id)
+        self._doc_cache_names: Dict[str, Tuple[str, float]] = {}
+        # digest -> expiry, for documents seen once and documents the API refused to cache
+        self._doc_cache_seen: Dict[str, float] = {}
+        self._doc_cache_rejected: Dict[str, float] = {}
+        self._doc_cache_rejections = 0
+        self._location_path = f"projects/{cfg.project_id}/locations/{cfg.location}"
+        host = "aiplatform.googleapis.com" if cfg.location == "global" else f"{cfg.location}-aiplatform.googleapis.com"
+        self._regional_base = f"https://{host}/v1"
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Return the shared HTTP client, creating it on first use.
+        
+        Connections are bound to the event loop that opened them. Celery workers
+        keep one loop per process (tasks.run_async), so the client normally lives
+        as long as the worker; if a call does come from another loop, the old
+        client is closed on its own loop and a new one is built.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is not None and not self._client.is_closed and self._client_loop is not loop:
+            old_client, old_loop = self._client, self._client_loop
+            self._client = None
+            if old_loop is not None and not old_loop.is_closed():
+                # Runs when that loop next gets control; a closed loop's connections are already gone
+                asyncio.run_coroutine_threadsafe(old_client.aclose(), old_loop)
+        if self._client is None or self._client.is_closed:
+            # HTTP/2 multiplexes concurrent Imagen/Veo/Gemini calls over one TLS connection;
+            # transport-level retries cover connection failures only
+            transport = httpx.AsyncHTTPTransport(http2=True, retries=2, limits=HTTP_LIMITS)
+            self._client = httpx.AsyncClient(
+                base_url=self.endpoint,
+                transport=transport,
+                timeout=HTTP_TIMEOUT,
+                headers={"Content-Type": "application/json"}
+            )
+            self._client_loop = loop
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+    
+    @retry(
+        retry=retry_if_exception(_is_retryable),
+        stop=stop_after_attempt(3),
+        wait=wait_exponential_jitter(initial=0.2, max=2.0),
+        reraise=True
+    )
+    async def _post_generate(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        params: Optional[Dict[str, str]] = None,
+        timeout: Any = httpx.USE_CLIENT_DEFAULT,
+        stream: bool = False,
+        method: str = "POST"
+    ) -> httpx.Response:
+        """
+        POST a generation request, retrying 429/5xx and transport errors with backoff.
+        Raises httpx.HTTPStatusError for error responses; streamed responses must be
+        closed by the caller. Absolute URLs may be passed as the path.
+        """
+        client = self._get_client()
+        request = client.build_request(
+            method,
+            path,
+            params={"key": self.api_key, **(params or {})},
+            content=_dumps(payload),
+            timeout=timeout
+        )
+        response = await client.send(request, stream=stream)
+        logger.debug("📥 Response status: %s", response.status_code)
+        
+        if response.is_error:
+            await response.aread()
+            await response.aclose()
+            logger.error("❌ Vertex AI API error: %s - %.512s", response.status_code, response.text)
+            response.raise_for_status()
+        return response
     
-    async def generate_text(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2048) -> str:
-        """Generate text using Vertex AI Gemini models"""
+    async def stream_text(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        cached_content: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text from Vertex AI Gemini models as it is produced.
+        
+        Uses the server-sent-events form of streamGenerateContent so callers
+        (e.g. a StreamingResponse) can forward text at time-to-first-token.
+        cached_content names a cachedContents resource whose contents precede the prompt.
+        """
         if self.use_mock:
-            logger.warning("🔧 Using mock response - Vertex AI API key not configured")
-            return self._mock_text_response(prompt)
+            yield self._mock_text_response(prompt)
+            return
+        
+        logger.info("🚀 Making Vertex AI API request with model: %s", self.gemini_model)
+        logger.debug("📝 Prompt: %.100s...", prompt)
+        
+        payload = {
+            "contents": [
+                {
+                    "role": "user",
+                    "parts": [{"text": prompt}]
+                }
+            ],
+            "generationConfig": {
+                "temperature": temperature,
+                "maxOutputTokens": max_tokens,
+                "candidateCount": 1,
+            },
+            "safetySettings": self._get_safety_settings()
+        }
         
-        logger.info(f"🚀 Making Vertex AI API request with model: {self.gemini_model}")
-        logger.info(f"📝 Prompt: {prompt[:100]}...")
-        logger.info(f"🔑 Using API key: {self.api_key[:10]}...")
-        logger.info(f"🌐 Endpoint: {self.endpoint}")
+        path = f"/{self.gemini_model}:streamGenerateContent"
+        if cached_content:
+            # Cached contents can only be referenced through the project-scoped model
+            payload["cachedContent"] = cached_content
+            path = f"{self._regional_base}/{self._location_path}/publishers/google/models/{self.gemini_model}:streamGenerateContent"
         
+        response = await self._post_generate(
+            path,
+            payload,
+            params={"alt": "sse"},
+            stream=True
+        )
         try:
-            payload = {
-                "contents": [
-                    {
-                        "role": "user",
-                        "parts": [{"text": prompt}]
-                    }
-                ],
-                "generationConfig": {
-                    "temperature": temperature,
-                    "maxOutputTokens": max_tokens,
-                    "candidateCount": 1,
-                },
-                "safetySettings": self._get_safety_settings()
-            }
-            
-            logger.info(f"📤 Sending request to: {self.endpoint}/{self.gemini_model}:generateContent")
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.endpoint}/{self.gemini_model}:generateContent?key={self.api_key}",
-                    headers={"Content-Type": "application/json"},
-                    json=payload,
-                    timeout=30.0
-                )
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
                 
-                logger.info(f"📥 Response status: {response.status_code}")
+                chunk = _loads(line[6:])
+                candidates = chunk.get("candidates") or []
+                if not candidates:
+                    continue
                 
-                if response.status_code != 200:
-                    logger.error(f"❌ Vertex AI API error: {response.status_code}")
-                    logger.error(f"❌ Response body: {response.text}")
-                    raise Exception(f"Vertex AI API returned status {response.status_code}")
-                
-                result = response.json()
-                logger.info(f"✅ Response received: {str(result)[:200]}...")
-                
-                if result.get("candidates") and len(result["candidates"]) > 0:
-                    generated_text = result["candidates"][0]["content"]["parts"][0]["text"]
-                    logger.info(f"✅ Generated text: {generated_text[:100]}...")
-                    return generated_text
-                else:
-                    logger.error("❌ No candidates in response")
-                    raise Exception("No response generated from Vertex AI")
-                    
-        except Exception as e:
-            logger.error(f"❌ Error generating text: {e}")
-            logger.error(f"❌ Falling back to mock response")
+                # The final event may carry only a finishReason and no parts
+                for part in candidates[0].get("content", {}).get("parts", []):
+                    text = part.get("text")
+                    if text:
+                        yield text
+        finally:
+            await response.aclose()
+    
+    async def generate_text(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        cached_content: Optional[str] = None
+    ) -> str:
+        """
+        Generate text using Vertex AI Gemini models.
+        Mock output is only used when no API key is configured; API errors that
+        survive the retries are raised to the caller.
+        """
+        if self.use_mock:
+            logger.warning("🔧 Using mock response - Vertex AI API key not configured")
             return self._mock_text_response(prompt)
+        
+        # Low-temperature tools are near-deterministic, so repeat prompts can be served from cache
+        cache_key = None
+        if temperature <= CACHEABLE_TEMPERATURE:
+            cache_prompt = f"{cached_content}|{prompt}" if cached_content else prompt
+            cache_key = LLMCache.make_key(self.gemini_model, cache_prompt, temperature, max_tokens)
+            cached = await self._cache.get(cache_key)
+            if cached is not None:
+                logger.debug("✅ Served Vertex AI response from cache")
+                return cached
+        
+        generated_text = "".join([
+            chunk async for chunk in self.stream_text(prompt, temperature, max_tokens, cached_content=cached_content)
+        ])
+        
+        if not generated_text:
+            logger.error("❌ No candidates in response")
+            raise Exception("No response generated from Vertex AI")
+        
+        logger.debug("✅ Generated text: %.100s...", generated_text)
+        if cache_key is not None:
+            await self._cache.set(cache_key, generated_text)
+        return generated_text
+    
+    async def generate_batch(self, prompts: List[str], temperature: float = 0.7, max_tokens: int = 2048) -> List[str]:
+        """Generate text for several prompts concurrently, preserving input order"""
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def generate_one(prompt: str) -> str:
+            async with semaphore:
+                return await self.generate_text(prompt, temperature=temperature, max_tokens=max_tokens)
+        
+        return await asyncio.gather(*(generate_one(prompt) for prompt in prompts))
+    
+    async def _get_or_create_doc_cache(self, doc_text: str) -> Optional[str]:
+        """
+        Return the name of a cachedContents resource holding doc_text, creating it on its second use.
+        
+        A document seen once is sent inline, since a cache only pays off when
+        reused. The cache holds up to DOC_CACHE_DOC_TOKENS of the document;
+        entries past DOC_CACHE_REFRESH_FRACTION of their TTL get their TTL
+        extended. Returns None when context caching is unavailable, the document
+        is too small or was refused by the API, or this is its first use.
+        """
+        if not self._doc_cache_enabled or len(doc_text) < DOC_CACHE_MIN_TOKENS * CHARS_PER_TOKEN:
+            return None
+        
+        # Keyed on what the cache holds, so a capped copy of the document shares the entry
+        cached_text = _truncate_tokens(doc_text, DOC_CACHE_DOC_TOKENS)
+        digest = hashlib.blake2b(f"{self.gemini_model}|{cached_text}".encode("utf-8"), digest_size=16).hexdigest()
+        now = time.monotonic()
+        entry = self._doc_cache_names.get(digest)
+        
+        if entry is not None:
+            name, expires_at = entry
+            if now < expires_at - DOC_CACHE_TTL * (1 - DOC_CACHE_REFRESH_FRACTION):
+                return name
+            if now < expires_at:
+                try:
+                    await self._post_generate(
+                        f"{self._regional_base}/{name}",
+                        {"ttl": f"{DOC_CACHE_TTL}s"},
+                        params={"updateMask": "ttl"},
+                        method="PATCH"
+                    )
+                    self._doc_cache_names[digest] = (name, now + DOC_CACHE_TTL)
+                except httpx.HTTPError as e:
+                    logger.warning("⚠️ Could not extend document cache %s: %s", name, e)
+                return name
+            del self._doc_cache_names[digest]
+        
+        if self._doc_cache_rejected.get(digest, 0) > now:
+            return None
+        
+        # Only create a cache once the document comes back; one-off documents go inline
+        if self._doc_cache_seen.pop(digest, 0) <= now:
+            self._doc_cache_seen = _unexpired(self._doc_cache_seen, now)
+            self._doc_cache_seen[digest] = now + DOC_CACHE_TTL
+            return None
+        
+        payload = {
+            "model": f"{self._location_path}/publishers/google/models/{self.gemini_model}",
+            "contents": [{"role": "user", "parts": [{"text": f"Document:\n{cached_text}"}]}],
+            "ttl": f"{DOC_CACHE_TTL}s"
+        }
+        try:
+            response = await self._post_generate(f"{self._regional_base}/{self._location_path}/cachedContents", payload)
+            name = _loads(response.content)["name"]
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            if status in (401, 403):
+                # The credentials can't manage caches; stop trying for this process
+                self._doc_cache_enabled = False
+            elif status == 400:
+                # Below the model's cache minimum, or a model without caching support
+                self._doc_cache_rejected = _unexpired(self._doc_cache_rejected, now)
+                self._doc_cache_rejected[digest] = now + DOC_CACHE_TTL
+                self._doc_cache_rejections += 1
+                if self._doc_cache_rejections >= DOC_CACHE_MAX_REJECTIONS:
+                    logger.warning("⚠️ Model %s keeps refusing context caches; disabling them", self.gemini_model)
+                    self._doc_cache_enabled = False
+            logger.warning("⚠️ Document cache unavailable, sending document inline: %s", e)
+            return None
+        except httpx.HTTPError as e:
+            logger.warning("⚠️ Document cache unavailable, sending document inline: %s", e)
+            return None
+        
+        self._doc_cache_rejections = 0
+        # Drop entries whose server-side caches have already expired
+        self._doc_cache_names = {k: v for k, v in self._doc_cache_names.items() if v[1] > now}
+        self._doc_cache_names[digest] = (name, now + DOC_CACHE_TTL)
+        logger.info("✅ Created document cache %s", name)
+        return name
+    
+    async def _generate_over_document(self, document: str, request: str, temperature: float) -> str:
+        """
+        Generate a response to request about document.
+        
+        The document goes through a shared context cache when one is available, so
+        running several tools over it only prefills it once; otherwise the first
+        LONG_DOC_TOKENS of it are sent inline ahead of the request.
+        """
+        cache_name = await self._get_or_create_doc_cache(document)
+        if cache_name is not None:
+            try:
+                return await self.generate_text(request, temperature=temperature, cached_content=cache_name)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in (400, 404):
+                    raise
+                # The cache was deleted or expired early on the server
+                logger.warning("⚠️ Document cache %s rejected, sending document inline", cache_name)
+                self._doc_cache_names = {k: v for k, v in self._doc_cache_names.items() if v[0] != cache_name}
+        
+        inline = _truncate_tokens(document, LONG_DOC_TOKENS)
+        return await self.generate_text(f"Document:\n{inline}\n{request}", temperature=temperature)
     
     async def summarize_text(self, text: str, length: str = "medium", format_type: str = "paragraphs") -> str:
         """Summarize text using Vertex AI"""
-        length_instruction = {
-            "short": "Provide a concise summary in 2-3 sentences",
-            "medium": "Provide a balanced summary with key points",
-            "long": "Provide a detailed comprehensive summary"
-        }.get(length, "Provide a balanced summary")
-        
-        format_instruction = {
-            "bullets": "Format the response as bullet points",
-            "paragraphs": "Format the response as paragraphs", 
-            "sections": "Format the response with clear sections and headings"
-        }.get(format_type, "Format the response as paragraphs")
-        
-        prompt = f"""
-{length_instruction} of the following text. {format_instruction}.
-
-Text to summarize:
-{text[:15000]}  # Limit text length for API
-
-Summary:
-"""
+        request = _SUMMARIZE_TEMPLATE.substitute(
+            length_instruction=_LENGTH_INSTR.get(length, _LENGTH_INSTR["medium"]),
+            format_instruction=_FORMAT_INSTR.get(format_type, _FORMAT_INSTR["paragraphs"])
+        )
         
-        return await self.generate_text(prompt, temperature=0.3)
+        return await self._generate_over_document(text, request, temperature=0.3)
     
     async def translate_text(self, text: str, target_language: str, preserve_formatting: bool = True) -> str:
         """Translate text using Vertex AI"""
-        formatting_instruction = "Preserve the original formatting, paragraphs, and structure" if preserve_formatting else "Focus only on accurate translation"
+        formatting_instruction = _TRANSLATE_FORMAT_INSTR[preserve_formatting]
         
         prompt = f"""
-Translate the following text to {target_language}. {formatting_instruction}.
+Translate the following text. {formatting_instruction}.
 
 Original text:
-{text[:10000]}
+{_truncate_tokens(text, DOC_TOKENS)}
+
+Target language: {target_language}
 
 Translated text:
 """
@@ -153,18 +621,15 @@ Translated text:
     
     async def improve_content(self, text: str, style: str = "professional") -> str:
         """Improve content quality using Vertex AI"""
-        style_instruction = {
-            "professional": "Make it more professional, formal, and business-appropriate",
-            "casual": "Make it more casual, friendly, and conversational",
-            "academic": "Make it more academic, scholarly, and research-oriented",
-            "creative": "Make it more creative, engaging, and imaginative"
-        }.get(style, "Make it more professional")
+        style_instruction = _STYLE_INSTR.get(style, _STYLE_INSTR["professional"])
         
         prompt = f"""
-Improve the following text to make it {style_instruction} while maintaining the original meaning and key information.
+Improve the following text while maintaining the original meaning and key information.
 
 Original text:
-{text[:10000]}
+{_truncate_tokens(text, DOC_TOKENS)}
+
+{style_instruction}.
 
 Improved text:
 """
@@ -173,34 +638,28 @@ Improved text:
     
     async def review_content(self, text: str, review_type: str = "general") -> str:
         """Review content and provide feedback using Vertex AI"""
-        review_instruction = {
-            "general": "Review this text for overall quality, clarity, and effectiveness",
-            "legal": "Review this text for legal issues, compliance, and potential risks",
-            "technical": "Review this text for technical accuracy, clarity, and completeness",
-            "grammar": "Review this text for grammar, spelling, punctuation, and style issues"
-        }.get(review_type, "Review this text for overall quality")
+        review_instruction = _REVIEW_INSTR.get(review_type, _REVIEW_INSTR["general"])
         
-        prompt = f"""
+        request = f"""
 {review_instruction}. Provide specific feedback and suggestions for improvement.
 
-Text to review:
-{text[:10000]}
-
 Review and feedback:
 """
         
-        return await self.generate_text(prompt, temperature=0.3)
+        return await self._generate_over_document(text, request, temperature=0.3)
     
     async def redact_content(self, text: str, redact_types: List[str]) -> str:
         """Redact sensitive information from text using Vertex AI"""
         types_text = ", ".join(redact_types)
         
         prompt = f"""
-Redact and replace the following sensitive information from this text: {types_text}. 
+Redact and replace sensitive information from this text. 
 Mark all redacted content with [REDACTED]. Be thorough and identify all instances of sensitive information.
 
 Text to redact:
-{text[:10000]}
+{_truncate_tokens(text, DOC_TOKENS)}
+
+Information to redact: {types_text}
 
 Redacted text:
 """
@@ -209,16 +668,15 @@ Redacted text:
     
     async def generate_insights(self, document_text: str, question: str) -> str:
         """Generate insights from document using Vertex AI"""
-        prompt = f"""
-Based on the following document, answer this question accurately and comprehensively: {question}
+        request = f"""
+Based on the document above, answer the question that follows accurately and comprehensively.
 
-Document content:
-{document_text[:15000]}
+Question: {question}
 
 Answer:
 """
         
-        return await self.generate_text(prompt, temperature=0.3)
+        return await self._generate_over_document(document_text, request, temperature=0.3)
     
     async def optimize_resume(self, resume_text: str, target_role: str = None, keywords: List[str] = None) -> str:
         """Optimize resume for ATS and recruiters using Vertex AI"""
@@ -226,10 +684,12 @@ Answer:
         keywords_instruction = f"Incorporate these keywords: {', '.join(keywords)}" if keywords else ""
         
         prompt = f"""
-Optimize this resume {role_instruction}. Improve formatting, language, and impact. {keywords_instruction}
+Optimize this resume. Improve formatting, language, and impact.
 
 Resume:
-{resume_text[:10000]}
+{_truncate_tokens(resume_text, DOC_TOKENS)}
+
+Optimize it {role_instruction}. {keywords_instruction}
 
 Optimized resume:
 """
@@ -238,19 +698,15 @@ Optimized resume:
     
     async def generate_proposal(self, document_text: str, proposal_type: str = "business", tone: str = "professional") -> str:
         """Generate proposal based on document using Vertex AI"""
-        type_instruction = {
-            "business": "Write a business proposal",
-            "grant": "Write a grant proposal", 
-            "project": "Write a project proposal"
-        }.get(proposal_type, "Write a business proposal")
-        
-        tone_instruction = f"Use a {tone} tone"
+        type_instruction = _PROPOSAL_INSTR.get(proposal_type, _PROPOSAL_INSTR["business"])
         
         prompt = f"""
-Based on the following information, {type_instruction}. {tone_instruction}. Make it compelling and persuasive.
+Based on the following information, {type_instruction}. Make it compelling and persuasive.
 
 Information:
-{document_text[:10000]}
+{_truncate_tokens(document_text, DOC_TOKENS)}
+
+Use a {tone} tone.
 
 Proposal:
 """
@@ -259,27 +715,16 @@ Proposal:
     
     async def generate_taglines(self, document_text: str, count: int = 5, style: str = "catchy") -> List[str]:
         """Generate taglines from document using Vertex AI"""
-        style_instruction = {
-            "catchy": "Make them catchy and memorable",
-            "professional": "Make them professional and corporate",
-            "creative": "Make them creative and unique"
-        }.get(style, "Make them catchy and memorable")
-        
-        prompt = f"""
-Generate {count} distinct taglines based on the following document. {style_instruction}. 
-Return only the taglines, one per line, without numbering.
-
-Document:
-{document_text[:5000]}
-
-Taglines:
-"""
+        prompt = _TAGLINE_TEMPLATE.substitute(
+            count=count,
+            style_instruction=_TAGLINE_INSTR.get(style, _TAGLINE_INSTR["catchy"]),
+            text=_truncate_tokens(document_text, SHORT_DOC_TOKENS)
+        )
         
         response = await self.generate_text(prompt, temperature=0.7)
         
-        # Split into individual taglines and clean up
-        taglines = [line.strip() for line in response.split('\n') if line.strip()]
-        return taglines[:count]
+        # Take the first `count` taglines without scanning any extra output
+        return _first_n_nonempty(response, count)
     
     async def generate_images(self, prompt: str, aspect_ratio: str = "1:1", style: str = "photographic", quantity: int = 1) -> List[Dict[str, Any]]:
         """Generate images using Vertex AI Imagen models"""
@@ -306,38 +751,59 @@ Taglines:
                 }
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.endpoint}/{self.imagen_model}:predict?key={self.api_key}",
-                    headers={"Content-Type": "application/json"},
-                    json=payload,
-                    timeout=60.0
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"Vertex AI Image API error: {response.status_code} - {response.text}")
-                    return self._mock_image_response(prompt, quantity)
-                
-                result = response.json()
-                images = []
-                
-                if result.get("predictions"):
-                    for i, prediction in enumerate(result["predictions"]):
-                        images.append({
-                            "url": f"data:image/png;base64,{prediction.get('bytesBase64Encoded', '')}",
-                            "id": f"img_{hash(prompt)}_{i}",
-                            "prompt": prompt,
-                            "aspectRatio": aspect_ratio,
-                            "style": style,
-                            "generatedAt": "2024-01-01T00:00:00Z"
-                        })
-                
-                return images
+            response = await self._post_generate(f"/{self.imagen_model}:predict", payload, timeout=60.0)
+            result = _loads(response.content)
+            predictions = result.get("predictions") or []
+            
+            # Persist the decoded bytes instead of echoing megabytes of base64 back to the client
+            stored = await asyncio.gather(*(
+                self._store_image(i, prediction.get("bytesBase64Encoded", ""))
+                for i, prediction in enumerate(predictions)
+            ))
+            
+            return [
+                {
+                    "url": url,
+                    "storage_key": storage_key,
+                    "id": f"img_{_prompt_id(prompt)}_{i}",
+                    "prompt": prompt,
+                    "aspectRatio": aspect_ratio,
+                    "style": style,
+                    "generatedAt": "2024-01-01T00:00:00Z"
+                }
+                for i, (url, storage_key) in enumerate(stored)
+            ]
                     
         except Exception as e:
-            logger.error(f"Error generating images: {e}")
+            logger.error("Error generating images: %s", e)
             return self._mock_image_response(prompt, quantity)
     
+    async def _store_image(self, index: int, data_b64: str) -> Tuple[str, Optional[str]]:
+        """Decode one Imagen result, store it and return (url, storage_key)"""
+        try:
+            raw = base64.b64decode(data_b64)
+            storage = await aget_storage_backend()
+            storage_key = await storage.astore_bytes(f"img_{index}.png", raw, "image/png")
+            return storage.get_download_url(storage_key, expires_in=MEDIA_URL_EXPIRES_IN), storage_key
+        except Exception as e:
+            logger.error("Failed to store generated image, returning inline data: %s", e)
+            return f"data:image/png;base64,{data_b64}", None
+    
+    async def generate_images_batch(self, prompts: List[str], aspect_ratio: str = "1:1", style: str = "photographic", quantity: int = 1) -> List[List[Dict[str, Any]]]:
+        """
+        Generate images for several different prompts concurrently.
+        
+        Multiple images for a single prompt should use generate_images with
+        quantity, which maps to Imagen's sampleCount in one request.
+        """
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def generate_one(prompt: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self.generate_images(prompt, aspect_ratio=aspect_ratio, style=style, quantity=quantity)
+        
+        return await asyncio.gather(*(generate_one(prompt) for prompt in prompts))
+    
     async def generate_video(self, prompt: str, duration: int = 4, aspect_ratio: str = "16:9", style: str = "realistic") -> Dict[str, Any]:
         """Generate video using Vertex AI Veo models"""
         if self.use_mock:
@@ -361,57 +827,29 @@ Taglines:
                 }
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.endpoint}/{self.video_model}:generateVideos?key={self.api_key}",
-                    headers={"Content-Type": "application/json"},
-                    json=payload,
-                    timeout=120.0
-                )
-                
-                if response.status_code != 200:
-                    logger.error(f"Vertex AI Video API error: {response.status_code} - {response.text}")
-                    return self._mock_video_response(prompt)
-                
-                result = response.json()
-                
-                if result.get("predictions") and len(result["predictions"]) > 0:
-                    prediction = result["predictions"][0]
-                    return {
-                        "url": prediction.get("videoUri") or prediction.get("gcsUri"),
-                        "id": f"video_{hash(prompt)}",
-                        "prompt": prompt,
-                        "duration": duration,
-                        "aspectRatio": aspect_ratio,
-                        "generatedAt": "2024-01-01T00:00:00Z"
-                    }
-                else:
-                    return self._mock_video_response(prompt)
+            response = await self._post_generate(f"/{self.video_model}:generateVideos", payload, timeout=VIDEO_TIMEOUT)
+            result = _loads(response.content)
+            
+            if result.get("predictions") and len(result["predictions"]) > 0:
+                prediction = result["predictions"][0]
+                return {
+                    "url": prediction.get("videoUri") or prediction.get("gcsUri"),
+                    "id": f"video_{_prompt_id(prompt)}",
+                    "prompt": prompt,
+                    "duration": duration,
+                    "aspectRatio": aspect_ratio,
+                    "generatedAt": "2024-01-01T00:00:00Z"
+                }
+            else:
+                return self._mock_video_response(prompt)
                     
         except Exception as e:
-            logger.error(f"Error generating video: {e}")
+            logger.error("Error generating video: %s", e)
             return self._mock_video_response(prompt)
     
-    def _get_safety_settings(self) -> List[Dict[str, Any]]:
+    def _get_safety_settings(self) -> Tuple[Dict[str, str], ...]:
         """Get safety settings for content generation"""
-        return [
-            {
-                "category": "HARM_CATEGORY_HARASSMENT",
-                "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-            },
-            {
-                "category": "HARM_CATEGORY_HATE_SPEECH",
-                "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-            },
-            {
-                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-            },
-            {
-                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-            }
-        ]
+        return _SAFETY_SETTINGS
     
     def _mock_text_response(self, prompt: str) -> str:
         """Generate mock text response when API is not configured"""
@@ -419,11 +857,13 @@ Taglines:
     
     def _mock_image_response(self, prompt: str, quantity: int) -> List[Dict[str, Any]]:
         """Generate mock image response when API is not configured"""
-        import time
+        # One timestamp and token per call keeps IDs unique across calls in the same second
+        now = int(time.time())
+        token = secrets.token_hex(4)
         return [
             {
-                "url": f"https://picsum.photos/512/512?random={int(time.time())}_{i}",
-                "id": f"mock_img_{int(time.time())}_{i}",
+                "url": f"https://picsum.photos/512/512?random={now}_{token}_{i}",
+                "id": f"mock_img_{now}_{token}_{i}",
                 "prompt": prompt,
                 "aspectRatio": "1:1",
                 "style": "photographic",
@@ -434,10 +874,9 @@ Taglines:
     
     def _mock_video_response(self, prompt: str) -> Dict[str, Any]:
         """Generate mock video response when API is not configured"""
-        import time
         return {
             "url": "https://example.com/mock-video.mp4",
-            "id": f"mock_video_{int(time.time())}",
+            "id": f"mock_video_{int(time.time())}_{secrets.token_hex(4)}",
             "prompt": prompt,
             "duration": 4,
             "aspectRatio": "16:9",
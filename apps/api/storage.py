@@ -5,9 +5,16 @@ Supports: Local storage (dev), Google Cloud Storage (production), AWS S3 (option
 
 import os
 import uuid
+import asyncio
+import threading
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Callable, Dict, Tuple
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+import aiofiles
+from cachetools import TTLCache
+from ulid import ULID
 
 # Check which storage backend to use
 USE_LOCAL_STORAGE = os.getenv("USE_LOCAL_STORAGE", "true").lower() == "true"
@@ -21,6 +28,53 @@ GCS_PROJECT_ID = os.getenv("GCS_PROJECT_ID")
 AWS_BUCKET = os.getenv("AWS_BUCKET")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 
+# Signed URLs are reused until this fraction of their lifetime has elapsed
+SIGNED_URL_REUSE_FRACTION = 0.8
+SIGNED_URL_CACHE_SIZE = 50_000
+
+
+def _media_key(filename: str) -> str:
+    """
+    Generate a unique storage key for generated media.
+    Keys are time-ordered ULIDs under a date prefix, so writes land in adjacent
+    object-store key ranges and no single local directory grows unbounded.
+    """
+    ext = Path(filename).suffix
+    return f"media/{datetime.utcnow():%Y/%m/%d}/{ULID()}{ext}"
+
+
+class SignedURLCache:
+    """
+    Memoizes signed download URLs so hot objects are not re-signed on every request.
+    One TTLCache per expiry keeps entries well inside the URL's own lifetime.
+    """
+    
+    def __init__(self, maxsize: int = SIGNED_URL_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._caches: Dict[int, TTLCache] = {}
+        self._lock = threading.Lock()
+    
+    def get_or_sign(self, storage_key: str, expires_in: int, sign: Callable[[], str]) -> str:
+        """Return a cached URL for (storage_key, expires_in), signing a new one on a miss"""
+        with self._lock:
+            cache = self._caches.get(expires_in)
+            if cache is None:
+                cache = TTLCache(maxsize=self.maxsize, ttl=expires_in * SIGNED_URL_REUSE_FRACTION)
+                self._caches[expires_in] = cache
+            url = cache.get(storage_key)
+        
+        if url is None:
+            url = sign()
+            with self._lock:
+                cache[storage_key] = url
+        return url
+    
+    def invalidate(self, storage_key: str):
+        """Drop every cached URL for a key (e.g. after deletion)"""
+        with self._lock:
+            for cache in self._caches.values():
+                cache.pop(storage_key, None)
+
 
 class StorageBackend:
     """Abstract storage backend"""
@@ -53,6 +107,13 @@ class StorageBackend:
         """
         raise NotImplementedError
 
+    async def astore_bytes(self, filename: str, content: bytes, content_type: str = "application/octet-stream") -> str:
+        """
+        Async variant of store_bytes for use from request handlers.
+        Runs the blocking upload in a worker thread so the event loop stays responsive.
+        """
+        return await asyncio.to_thread(self.store_bytes, filename, content, content_type)
+
 
 class LocalStorage(StorageBackend):
     """Local filesystem storage (for development)"""
@@ -112,16 +173,35 @@ class LocalStorage(StorageBackend):
             return True
         except Exception:
             return False
+    
+    async def asave_file(self, storage_key: str, content: bytes) -> bool:
+        """Save file content without blocking the event loop"""
+        try:
+            file_path = self.base_path / storage_key
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            async with aiofiles.open(file_path, 'wb') as f:
+                await f.write(content)
+            return True
+        except Exception:
+            return False
 
     def store_bytes(self, filename: str, content: bytes, content_type: str = "application/octet-stream") -> str:
         """Persist bytes locally and return the storage key"""
-        ext = Path(filename).suffix
-        storage_key = f"media/{uuid.uuid4()}{ext}"
+        storage_key = _media_key(filename)
         file_path = self.base_path / storage_key
         file_path.parent.mkdir(parents=True, exist_ok=True)
         file_path.write_bytes(content)
         return storage_key
 
+    async def astore_bytes(self, filename: str, content: bytes, content_type: str = "application/octet-stream") -> str:
+        """Persist bytes locally without blocking the event loop"""
+        storage_key = _media_key(filename)
+        file_path = self.base_path / storage_key
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        async with aiofiles.open(file_path, 'wb') as f:
+            await f.write(content)
+        return storage_key
+
 
 class GoogleCloudStorage(StorageBackend):
     """Google Cloud Storage backend"""
@@ -131,6 +211,7 @@ class GoogleCloudStorage(StorageBackend):
             from google.cloud import storage
             self.client = storage.Client(project=GCS_PROJECT_ID)
             self.bucket = self.client.bucket(GCS_BUCKET_NAME)
+            self._url_cache = SignedURLCache()
         except Exception as e:
             print(f"⚠️  Google Cloud Storage not configured: {e}")
             print("   Falling back to local storage")
@@ -165,16 +246,20 @@ class GoogleCloudStorage(StorageBackend):
         return blob.exists()
     
     def get_download_url(self, storage_key: str, expires_in: int = 3600) -> str:
-        """Generate GCS signed download URL"""
-        blob = self.bucket.blob(storage_key)
-        return blob.generate_signed_url(
-            version="v4",
-            expiration=timedelta(seconds=expires_in),
-            method="GET",
-        )
+        """Generate GCS signed download URL (cached, since v4 signing is an RSA operation)"""
+        def sign() -> str:
+            blob = self.bucket.blob(storage_key)
+            return blob.generate_signed_url(
+                version="v4",
+                expiration=timedelta(seconds=expires_in),
+                method="GET",
+            )
+        
+        return self._url_cache.get_or_sign(storage_key, expires_in, sign)
     
     def delete_file(self, storage_key: str) -> bool:
         """Delete file from GCS"""
+        self._url_cache.invalidate(storage_key)
         try:
             blob = self.bucket.blob(storage_key)
             blob.delete()
@@ -184,8 +269,7 @@ class GoogleCloudStorage(StorageBackend):
 
     def store_bytes(self, filename: str, content: bytes, content_type: str = "application/octet-stream") -> str:
         """Upload in-memory bytes to GCS"""
-        ext = Path(filename).suffix
-        storage_key = f"media/{uuid.uuid4()}{ext}"
+        storage_key = _media_key(filename)
         blob = self.bucket.blob(storage_key)
         blob.upload_from_string(content, content_type=content_type)
         return storage_key
@@ -204,6 +288,7 @@ class AWSS3Storage(StorageBackend):
                 aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
             )
             self.bucket = AWS_BUCKET
+            self._url_cache = SignedURLCache()
         except Exception as e:
             print(f"⚠️  AWS S3 not configured: {e}")
             raise
@@ -238,14 +323,19 @@ class AWSS3Storage(StorageBackend):
     
     def get_download_url(self, storage_key: str, expires_in: int = 3600) -> str:
         """Generate S3 presigned download URL"""
-        return self.s3_client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": self.bucket, "Key": storage_key},
-            ExpiresIn=expires_in,
+        return self._url_cache.get_or_sign(
+            storage_key,
+            expires_in,
+            lambda: self.s3_client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": self.bucket, "Key": storage_key},
+                ExpiresIn=expires_in,
+            ),
         )
     
     def delete_file(self, storage_key: str) -> bool:
         """Delete file from S3"""
+        self._url_cache.invalidate(storage_key)
         try:
             self.s3_client.delete_object(Bucket=self.bucket, Key=storage_key)
             return True
@@ -254,8 +344,7 @@ class AWSS3Storage(StorageBackend):
 
     def store_bytes(self, filename: str, content: bytes, content_type: str = "application/octet-stream") -> str:
         """Upload raw bytes to S3 and return storage key"""
-        ext = Path(filename).suffix
-        storage_key = f"media/{uuid.uuid4()}{ext}"
+        storage_key = _media_key(filename)
         self.s3_client.put_object(
             Bucket=self.bucket,
             Key=storage_key,
@@ -266,8 +355,13 @@ class AWSS3Storage(StorageBackend):
 
 
 # Initialize storage backend based on configuration
+@lru_cache(maxsize=1)
 def get_storage_backend() -> StorageBackend:
-    """Get configured storage backend"""
+    """
+    Get configured storage backend.
+    Built on first use and shared afterwards; cloud SDK clients load
+    credentials from disk, so async code should use aget_storage_backend().
+    """
     
     if USE_LOCAL_STORAGE:
         print("Using LOCAL storage for development")
@@ -294,5 +388,8 @@ def get_storage_backend() -> StorageBackend:
     return LocalStorage()
 
 
-# Global storage instance
-storage = get_storage_backend()
+async def aget_storage_backend() -> StorageBackend:
+    """Get the storage backend without blocking the event loop on first construction"""
+    if get_storage_backend.cache_info().currsize:
+        return get_storage_backend()
+    return await asyncio.to_thread(get_storage_backend)
@@ -3,31 +3,111 @@ Celery tasks for async document processing
 All AI and heavy computation tools run as background tasks
 """
 import os
-import io
+import asyncio
 import logging
+import tempfile
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
-import pdfplumber
+from celery import chain, group
+from celery.result import AsyncResult, GroupResult
+from celery.signals import worker_process_init, worker_process_shutdown
+from sqlalchemy import select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
 
 from celery_app import celery_app
 from database import SessionLocal
 import models
 from core.email_sender import send_task_complete_email, send_task_failed_email
-from services.vertex_ai_tools import vertex_ai_tools
+from services.vertex_ai_tools import DOCUMENT_MAX_CHARS, vertex_ai_tools
+from utils.pdf_extract import extract_all_text, reset_shared_fonts
+from utils.temp_manager import temp_manager
 
 logger = logging.getLogger(__name__)
 
 # AWS S3 Configuration
 AWS_BUCKET = os.getenv("AWS_BUCKET", "")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
-s3_client = boto3.client('s3', region_name=AWS_REGION)
+
+# PDFs are spooled to disk past this size (pdfplumber needs a seekable file)
+PDF_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+# Objects above 8MB are fetched as parallel ranged GETs
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=16,
+    use_threads=True
+)
+
+# Extracted text is cached per document version so follow-up tools skip re-parsing
+EXTRACTED_TEXT_TTL = 24 * 60 * 60
+
+# One client is shared by every download thread; its pool must cover S3_DOWNLOAD_WORKERS
+S3_DOWNLOAD_WORKERS = 16
+s3_client = boto3.client(
+    's3',
+    region_name=AWS_REGION,
+    config=Config(
+        max_pool_connections=64,
+        tcp_keepalive=True,
+        retries={'max_attempts': 5, 'mode': 'adaptive'}
+    )
+)
 
 # Vertex AI is now configured in vertex_ai_tools service
 logger.info("Vertex AI tools service initialized")
 
 
+# Long-lived event loop for this worker process (created lazily, after fork)
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def run_async(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine on the worker process's persistent event loop.
+    
+    Unlike asyncio.run(), the loop survives between tasks, so the Vertex AI
+    HTTP/2 connection pool is reused instead of being rebuilt for every task.
+    """
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop.run_until_complete(coro)
+
+
+async def _gather(*aws: Awaitable[Any]) -> List[Any]:
+    """asyncio.gather as a coroutine, for run_async"""
+    return await asyncio.gather(*aws)
+
+
+@worker_process_init.connect
+def _init_pdf_resources(**kwargs):
+    """Give each worker process its own cross-document font cache"""
+    reset_shared_fonts()
+
+
+@worker_process_init.connect
+def _start_temp_janitor(**kwargs):
+    """Sweep temp files left behind by crashed tasks; the API's janitor only covers its own host"""
+    temp_manager.start_janitor_thread()
+
+
+@worker_process_shutdown.connect
+def _close_worker_loop(**kwargs):
+    """Release the Vertex AI client and event loop when a worker process exits"""
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        _worker_loop.run_until_complete(vertex_ai_tools.aclose())
+        _worker_loop.close()
+
+
 def download_from_s3(s3_key: str) -> bytes:
     """Helper function to download file from S3"""
     try:
@@ -38,6 +118,161 @@ def download_from_s3(s3_key: str) -> bytes:
         raise
 
 
+@contextmanager
+def open_pdf_from_s3(s3_key: str) -> Iterator[BinaryIO]:
+    """
+    Open a PDF stored in S3 as a seekable file without holding a second in-memory copy.
+    
+    The object is downloaded (in parallel byte ranges when large) into a spooled
+    temp file that stays in memory for small documents and moves to disk for
+    large ones.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_MEMORY) as spool:
+        try:
+            s3_client.download_fileobj(AWS_BUCKET, s3_key, spool, Config=S3_TRANSFER_CONFIG)
+        except ClientError as e:
+            logger.error(f"Failed to download {s3_key} from S3: {str(e)}")
+            raise
+        
+        spool.seek(0)
+        yield spool
+
+
+def _text_cache():
+    """Redis client of the Celery result backend, or None for other backends"""
+    return getattr(celery_app.backend, "client", None)
+
+
+def extract_document_text(
+    document_id: Any,
+    s3_key: str,
+    page_header: bool = False,
+    max_chars: Optional[int] = None,
+    precise: bool = False
+) -> str:
+    """
+    Extract a document's text, reusing a cached copy from an earlier task.
+    
+    Cache entries are keyed on the object's ETag, so re-uploads are re-extracted.
+    With max_chars, extraction stops early and the text is cut to exactly
+    max_chars, so a cached full text gives the same result as a fresh extraction.
+    """
+    try:
+        etag = s3_client.head_object(Bucket=AWS_BUCKET, Key=s3_key)['ETag'].strip('"')
+    except ClientError as e:
+        logger.error(f"Failed to read {s3_key} metadata from S3: {str(e)}")
+        raise
+    
+    cache = _text_cache()
+    full_key = f"txt:{document_id}:{etag}:{int(page_header)}:{'plumber' if precise else 'fast'}"
+    cache_key = full_key if max_chars is None else f"{full_key}:{max_chars}"
+    if cache is not None:
+        try:
+            for cached in cache.mget(list(dict.fromkeys([full_key, cache_key]))):
+                if cached is not None:
+                    logger.info(f"Using cached text for document {document_id}")
+                    text = cached.decode("utf-8") if isinstance(cached, bytes) else cached
+                    return text if max_chars is None else text[:max_chars]
+        except Exception as e:
+            logger.warning(f"Extracted text cache read failed: {str(e)}")
+    
+    with open_pdf_from_s3(s3_key) as pdf_file:
+        text = extract_all_text(pdf_file, page_header=page_header, max_chars=max_chars, precise=precise)
+    if max_chars is not None:
+        # Extraction stops at a page boundary past max_chars
+        text = text[:max_chars]
+    
+    if cache is not None:
+        try:
+            cache.set(cache_key, text.encode("utf-8"), ex=EXTRACTED_TEXT_TTL)
+        except Exception as e:
+            logger.warning(f"Extracted text cache write failed: {str(e)}")
+    return text
+
+
+def store_extracted_text(task_id: str, text: str) -> str:
+    """Upload a task's extracted text to S3 and return its key"""
+    s3_key = f"extracted/{task_id}.txt"
+    try:
+        s3_client.put_object(
+            Bucket=AWS_BUCKET,
+            Key=s3_key,
+            Body=text.encode("utf-8"),
+            ContentType="text/plain; charset=utf-8"
+        )
+    except ClientError as e:
+        logger.error(f"Failed to upload extracted text for task {task_id}: {str(e)}")
+        raise
+    return s3_key
+
+
+def load_extracted_text(s3_key: str) -> str:
+    """Fetch text previously stored with store_extracted_text"""
+    return download_from_s3(s3_key).decode("utf-8")
+
+
+def download_many(s3_keys: List[str]) -> List[bytes]:
+    """Download several files from S3 concurrently, preserving input order"""
+    if len(s3_keys) <= 1:
+        return [download_from_s3(key) for key in s3_keys]
+    
+    with ThreadPoolExecutor(max_workers=min(S3_DOWNLOAD_WORKERS, len(s3_keys))) as executor:
+        return list(executor.map(download_from_s3, s3_keys))
+
+
+def _load_task(db: Session, task_id: str) -> Optional[Row]:
+    """Fetch the task, document and user columns a task needs in one joined query"""
+    return db.execute(
+        select(
+            models.ProcessingTask.result_data,
+            models.Document.id.label("document_id"),
+            models.Document.filename,
+            models.Document.s3_key,
+            models.User.email,
+            models.User.full_name
+        )
+        .join(models.Document, models.ProcessingTask.original_document_id == models.Document.id)
+        .join(models.User, models.ProcessingTask.user_id == models.User.id)
+        .where(models.ProcessingTask.id == task_id)
+    ).first()
+
+
+def _set_task_fields(db: Session, task_id: str, **values):
+    """Update a task row in a single UPDATE without loading it"""
+    db.execute(
+        update(models.ProcessingTask)
+        .where(models.ProcessingTask.id == task_id)
+        .values(**values)
+    )
+    db.commit()
+
+
+def _mark_processing(db: Session, task_id: str):
+    """Flag a task as in progress"""
+    _set_task_fields(db, task_id, status=models.TaskStatus.PROCESSING)
+
+
+def _mark_done(
+    db: Session,
+    task_id: str,
+    status: models.TaskStatus,
+    result_data: Optional[dict] = None,
+    error_message: Optional[str] = None
+):
+    """Record the final status, results and completion time in one UPDATE"""
+    values = {"status": status, "completed_at": datetime.utcnow()}
+    if result_data is not None:
+        values["result_data"] = result_data
+    if error_message is not None:
+        values["error_message"] = error_message
+    _set_task_fields(db, task_id, **values)
+
+
+def _mark_failed(db: Session, task_id: str, error: Exception):
+    """Record a task failure"""
+    _mark_done(db, task_id, models.TaskStatus.FAILED, error_message=str(error))
+
+
 def update_task_status(
     task_id: str,
     status: models.TaskStatus,
@@ -45,673 +280,300 @@ def update_task_status(
     error_message: Optional[str] = None
 ):
     """Helper function to update task status in database"""
-    db = SessionLocal()
-    try:
-        task = db.query(models.ProcessingTask).filter(
-            models.ProcessingTask.id == task_id
-        ).first()
-        
-        if task:
-            task.status = status
+    with SessionLocal() as db:
+        if status == models.TaskStatus.COMPLETED or status == models.TaskStatus.FAILED:
+            _mark_done(db, task_id, status, result_data=result_data, error_message=error_message)
+        else:
+            values = {"status": status}
             if result_data:
-                task.result_data = result_data
+                values["result_data"] = result_data
             if error_message:
-                task.error_message = error_message
-            if status == models.TaskStatus.COMPLETED or status == models.TaskStatus.FAILED:
-                task.completed_at = datetime.utcnow()
-            db.commit()
-    finally:
-        db.close()
+                values["error_message"] = error_message
+            _set_task_fields(db, task_id, **values)
 
 
-@celery_app.task(name="run_ai_summarization", bind=True)
-def run_ai_summarization(self, task_id: str):
-    """
-    AI Summarizer - Extract key points from documents
-    Uses Halo-AI native PDF processing
-    """
-    db = SessionLocal()
-    try:
-        # Get task from database
-        task = db.query(models.ProcessingTask).filter(
-            models.ProcessingTask.id == task_id
-        ).first()
-        
-        if not task:
-            logger.error(f"Task {task_id} not found")
-            return
-        
-        # Update status to processing
-        task.status = models.TaskStatus.PROCESSING
-        db.commit()
-        
-        # Get document and user
-        document = task.original_document
-        user = task.user
-        
-        # Download PDF from S3
-        logger.info(f"Downloading document {document.id} from S3")
-        doc_bytes = download_from_s3(document.s3_key)
-        
-        # Extract text from PDF
-        logger.info("Extracting text from PDF")
-        import pdfplumber
-        text_content = ""
-        with pdfplumber.open(io.BytesIO(doc_bytes)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_content += page_text + "\n"
-        
-        # Prepare prompt for Vertex AI
-        prompt = f"""Provide a comprehensive, professional executive summary of this document. 
-        Focus on:
-        - Main topics and themes
-        - Key findings and conclusions
-        - Important data points or statistics
-        - Actionable insights
-        
-        Format the summary in clear, concise paragraphs.
+# Emails go out from their own task (routed to the "emails" queue) so AI
+# workers don't block on the mail provider
+NOTIFICATION_SENDERS = {
+    "task_complete": send_task_complete_email,
+    "task_failed": send_task_failed_email,
+}
+
+
+@celery_app.task(name="send_notification", ignore_result=True)
+def send_notification(kind: str, **kwargs):
+    """Send a task notification email"""
+    NOTIFICATION_SENDERS[kind](**kwargs)
+
+
+class VertexTool(NamedTuple):
+    """How a document tool maps onto VertexAIToolsService"""
+    method: str  # VertexAIToolsService coroutine taking the document text first
+    result_key: str
+    display_name: str
+    defaults: Dict[str, Any]  # Accepted parameters and their defaults
+    extras: Optional[Callable[[Any], Dict[str, Any]]] = None  # Derived result fields
+    max_chars: Optional[int] = None  # Extraction cap for tools that only read the start
+    precise_text: bool = False  # Use pdfplumber's layout-aware extraction
+
+
+TOOL_REGISTRY: Dict[str, VertexTool] = {
+    "summarize": VertexTool(
+        "summarize_text", "summary", "AI Summarizer",
+        {"length": "long", "format_type": "paragraphs"},
+        lambda summary: {"word_count": len(summary.split())},
+        # Everything the inline prompt or the shared document cache can hold
+        max_chars=DOCUMENT_MAX_CHARS
+    ),
+    "translate": VertexTool(
+        "translate_text", "translated_text", "AI Translator",
+        {"target_language": "Spanish", "preserve_formatting": True}
+    ),
+    "improve": VertexTool(
+        "improve_content", "improved_text", "Content Improver",
+        {"style": "professional"}
+    ),
+    "review": VertexTool(
+        "review_content", "review", "AI Reviewer",
+        {"review_type": "general"}
+    ),
+    "redact": VertexTool(
+        "redact_content", "redacted_text", "AI Redactor",
+        {"redact_types": ["email", "phone", "ssn", "credit_card", "names", "addresses"]},
+        precise_text=True
+    ),
+    "resume": VertexTool(
+        "optimize_resume", "optimized_resume", "Resume Optimizer",
+        {"target_role": None, "keywords": []}
+    ),
+    "proposal": VertexTool(
+        "generate_proposal", "proposal", "Proposal Writer",
+        {"proposal_type": "business", "tone": "professional"}
+    ),
+    "taglines": VertexTool(
+        "generate_taglines", "taglines", "Tagline Maker",
+        {"count": 5, "style": "catchy"},
+        lambda taglines: {"count": len(taglines)}
+    ),
+}
 
-Document content:
-{text_content[:15000]}"""
-        
-        # Call Vertex AI API
-        logger.info("Calling Vertex AI API for summarization")
-        import asyncio
-        summary = asyncio.run(vertex_ai_tools.summarize_text(text_content, length="long", format_type="paragraphs"))
-        
-        # Update task with results
-        task.result_data = {
-            "summary": summary,
-            "word_count": len(summary.split()),
-            "document_name": document.filename,
-            "full_text": text_content  # Store for insights chat
-        }
-        task.status = models.TaskStatus.COMPLETED
-        task.completed_at = datetime.utcnow()
-        db.commit()
-        
-        logger.info(f"Summarization completed for task {task_id}")
-        
-        # Send completion email
-        try:
-            send_task_complete_email(
-                email=user.email,
-                task_name="AI Summarizer",
-                document_name=document.filename,
-                task_id=str(task.id),
-                name=user.full_name
-            )
-        except Exception as e:
-            logger.error(f"Failed to send completion email: {str(e)}")
-        
-    except Exception as e:
-        logger.error(f"Summarization failed for task {task_id}: {str(e)}")
-        task.status = models.TaskStatus.FAILED
-        task.error_message = str(e)
-        task.completed_at = datetime.utcnow()
-        db.commit()
-        
-        # Send failure email
-        try:
-            send_task_failed_email(
-                email=user.email,
-                task_name="AI Summarizer",
-                document_name=document.filename,
-                error_message=str(e),
-                name=user.full_name
-            )
-        except:
-            pass
-    
-    finally:
-        db.close()
 
+def _resolve_params(tool: VertexTool, stored: Optional[dict], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Tool parameters: explicit task kwargs, then values stored on the task, then defaults"""
+    stored = stored if isinstance(stored, dict) else {}
+    params = {}
+    for name, default in tool.defaults.items():
+        if overrides.get(name) is not None:
+            params[name] = overrides[name]
+        elif stored.get(name) is not None:
+            params[name] = stored[name]
+        else:
+            params[name] = default
+    return params
 
-@celery_app.task(name="run_ai_translation", bind=True)
-def run_ai_translation(self, task_id: str, target_language: str = "Spanish"):
+
+@celery_app.task(name="run_vertex_tool", bind=True)
+def run_vertex_tool(self, task_id: str, tool_name: str, **params):
     """
-    AI Translator - Translate documents to target language
+    Run one Vertex AI document tool (see TOOL_REGISTRY)
+    Download + extract -> Vertex AI -> store results -> notify
     """
-    db = SessionLocal()
+    tool = TOOL_REGISTRY[tool_name]
+    task = None
     try:
-        task = db.query(models.ProcessingTask).filter(
-            models.ProcessingTask.id == task_id
-        ).first()
-        
-        if not task:
-            return
-        
-        task.status = models.TaskStatus.PROCESSING
-        db.commit()
-        
-        document = task.original_document
-        user = task.user
-        
-        # Download PDF
-        doc_bytes = download_from_s3(document.s3_key)
-        
-        # Extract text from PDF
-        logger.info("Extracting text from PDF for translation")
-        text_content = ""
-        with pdfplumber.open(io.BytesIO(doc_bytes)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_content += page_text + "\n"
-        
-        logger.info(f"Translating to {target_language}")
-        import asyncio
-        translated_text = asyncio.run(vertex_ai_tools.translate_text(text_content, target_language, preserve_formatting=True))
+        # Sessions only wrap the DB bursts, so no connection sits idle during the AI call
+        with SessionLocal() as db:
+            task = _load_task(db, task_id)
+            
+            if not task:
+                logger.error(f"Task {task_id} not found")
+                return
+            
+            _mark_processing(db, task_id)
+        
+        params = _resolve_params(tool, task.result_data, params)
+        
+        logger.info(f"Extracting text from document {task.document_id}")
+        text_content = extract_document_text(
+            task.document_id,
+            task.s3_key,
+            max_chars=tool.max_chars,
+            precise=tool.precise_text
+        )
         
-        task.result_data = {
-            "translated_text": translated_text,
-            "target_language": target_language,
-            "document_name": document.filename,
-            "full_text": text_content  # Store for insights chat
+        logger.info(f"Running {tool.display_name} for task {task_id}")
+        ai_call = getattr(vertex_ai_tools, tool.method)(text_content, **params)
+        # Partial extractions aren't useful to insights chat
+        if tool.max_chars is None:
+            # The S3 upload doesn't depend on the AI result, so it runs while Vertex AI responds
+            result, full_text_s3_key = run_async(_gather(
+                ai_call,
+                asyncio.to_thread(store_extracted_text, task_id, text_content)  # Loaded lazily by insights chat
+            ))
+        else:
+            result = run_async(ai_call)
+        
+        result_data = {
+            tool.result_key: result,
+            **params,
+            **(tool.extras(result) if tool.extras else {}),
+            "document_name": task.filename
         }
-        task.status = models.TaskStatus.COMPLETED
-        task.completed_at = datetime.utcnow()
-        db.commit()
+        if tool.max_chars is None:
+            result_data["full_text_s3_key"] = full_text_s3_key
+        
+        with SessionLocal() as db:
+            _mark_done(db, task_id, models.TaskStatus.COMPLETED, result_data=result_data)
         
-        logger.info(f"Translation completed for task {task_id}")
+        logger.info(f"{tool.display_name} completed for task {task_id}")
         
-        send_task_complete_email(
-            email=user.email,
-            task_name="AI Translator",
-            document_name=document.filename,
-            task_id=str(task.id),
-            name=user.full_name
+        send_notification.delay(
+            "task_complete",
+            email=task.email,
+            task_name=tool.display_name,
+            document_name=task.filename,
+            task_id=str(task_id),
+            name=task.full_name
         )
         
     except Exception as e:
-        logger.error(f"Translation failed: {str(e)}")
-        task.status = models.TaskStatus.FAILED
-        task.error_message = str(e)
-        task.completed_at = datetime.utcnow()
-        db.commit()
-    
-    finally:
-        db.close()
+        logger.error(f"{tool.display_name} failed for task {task_id}: {str(e)}")
+        with SessionLocal() as db:
+            _mark_failed(db, task_id, e)
+        
+        if task is not None:
+            try:
+                send_notification.delay(
+                    "task_failed",
+                    email=task.email,
+                    task_name=tool.display_name,
+                    document_name=task.filename,
+                    error_message=str(e),
+                    name=task.full_name
+                )
+            except Exception as email_error:
+                logger.error(f"Failed to queue failure email: {str(email_error)}")
 
 
-@celery_app.task(name="run_content_improvement", bind=True)
-def run_content_improvement(self, task_id: str, style: str = "professional"):
+@celery_app.task(name="prepare_document_text", bind=True)
+def prepare_document_text(self, task_id: str, tool_name: str):
     """
-    Content Improver - Enhance document quality and clarity
+    Extract a tool's input text into the shared text cache
+    Runs on the CPU-bound "extract" queue ahead of run_vertex_tool
     """
-    db = SessionLocal()
+    tool = TOOL_REGISTRY[tool_name]
+    task = None
     try:
-        task = db.query(models.ProcessingTask).filter(
-            models.ProcessingTask.id == task_id
-        ).first()
-        
-        if not task:
-            return
-        
-        task.status = models.TaskStatus.PROCESSING
-        db.commit()
-        
-        document = task.original_document
-        user = task.user
-        
-        doc_bytes = download_from_s3(document.s3_key)
-        
-        # Extract text from PDF
-        logger.info("Extracting text from PDF for content improvement")
-        text_content = ""
-        with pdfplumber.open(io.BytesIO(doc_bytes)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_content += page_text + "\n"
-        
-        logger.info(f"Improving content with {style} style")
-        import asyncio
-        improved_text = asyncio.run(vertex_ai_tools.improve_content(text_content, style))
-        
-        task.result_data = {
-            "improved_text": improved_text,
-            "style": style,
-            "document_name": document.filename,
-            "full_text": text_content  # Store for insights chat
-        }
-        task.status = models.TaskStatus.COMPLETED
-        task.completed_at = datetime.utcnow()
-        db.commit()
-        
-        logger.info(f"Content improvement completed for task {task_id}")
-        
-        send_task_complete_email(
-            email=user.email,
-            task_name="Content Improver",
-            document_name=document.filename,
-            task_id=str(task.id),
-            name=user.full_name
+        with SessionLocal() as db:
+            task = _load_task(db, task_id)
+            
+            if not task:
+                logger.error(f"Task {task_id} not found")
+                return
+            
+            _mark_processing(db, task_id)
+        
+        extract_document_text(
+            task.document_id,
+            task.s3_key,
+            max_chars=tool.max_chars,
+            precise=tool.precise_text
         )
         
     except Exception as e:
-        logger.error(f"Content improvement failed: {str(e)}")
-        task.status = models.TaskStatus.FAILED
-        task.error_message = str(e)
-        task.completed_at = datetime.utcnow()
-        db.commit()
-    
-    finally:
-        db.close()
+        logger.error(f"Text preparation failed for task {task_id}: {str(e)}")
+        with SessionLocal() as db:
+            _mark_failed(db, task_id, e)
+        
+        if task is not None:
+            try:
+                send_notification.delay(
+                    "task_failed",
+                    email=task.email,
+                    task_name=tool.display_name,
+                    document_name=task.filename,
+                    error_message=str(e),
+                    name=task.full_name
+                )
+            except Exception as email_error:
+                logger.error(f"Failed to queue failure email: {str(email_error)}")
+        raise  # Stops the chain before the AI step
 
 
-@celery_app.task(name="run_ai_review", bind=True)
-def run_ai_review(self, task_id: str, review_type: str = "general"):
-    """
-    AI Reviewer - Provide detailed feedback on documents
+def _tool_chain(task_id: str, tool_name: str, params: Dict[str, Any]) -> chain:
+    """Chain text extraction (extract queue) and the AI call (ai_io queue)"""
+    return chain(
+        prepare_document_text.si(task_id, tool_name),
+        run_vertex_tool.si(task_id, tool_name, **params)
+    )
+
+
+def dispatch_vertex_tool(task_id: str, tool_name: str, **params) -> AsyncResult:
+    """Enqueue one tool run for a ProcessingTask"""
+    return _tool_chain(task_id, tool_name, params).apply_async()
+
+
+def enqueue_vertex_tools(jobs: List[Tuple[str, str, Dict[str, Any]]]) -> GroupResult:
     """
-    db = SessionLocal()
-    try:
-        task = db.query(models.ProcessingTask).filter(
-            models.ProcessingTask.id == task_id
-        ).first()
-        
-        if not task:
-            return
-        
-        task.status = models.TaskStatus.PROCESSING
-        db.commit()
-        
-        document = task.original_document
-        user = task.user
-        
-        doc_bytes = download_from_s3(document.s3_key)
-        
-        # Extract text from PDF
-        logger.info("Extracting text from PDF for review")
-        text_content = ""
-        with pdfplumber.open(io.BytesIO(doc_bytes)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_content += page_text + "\n"
-        
-        logger.info(f"Reviewing document with {review_type} focus")
-        import asyncio
-        review = asyncio.run(vertex_ai_tools.review_content(text_content, review_type))
-        
-        task.result_data = {
-            "review": review,
-            "review_type": review_type,
-            "document_name": document.filename,
-            "full_text": text_content  # Store for insights chat
-        }
-        task.status = models.TaskStatus.COMPLETED
-        task.completed_at = datetime.utcnow()
-        db.commit()
-        
-        logger.info(f"Review completed for task {task_id}")
-        
-        send_task_complete_email(
-            email=user.email,
-            task_name="AI Reviewer",
-            document_name=document.filename,
-            task_id=str(task.id),
-            name=user.full_name
-        )
-        
-    except Exception as e:
-        logger.error(f"Review failed: {str(e)}")
-        task.status = models.TaskStatus.FAILED
-        task.error_message = str(e)
-        task.completed_at = datetime.utcnow()
-        db.commit()
+    Enqueue several tool runs at once, e.g. every tool for one document.
     
-    finally:
-        db.close()
+    Args:
+        jobs: (task_id, tool_name, params) for each ProcessingTask
+    
+    Returns:
+        GroupResult tracking all of the jobs
+    """
+    signatures = group(
+        _tool_chain(task_id, tool_name, params)
+        for task_id, tool_name, params in jobs
+    )
+    # Publish every message over one pooled producer instead of a connection per .delay()
+    with celery_app.producer_or_acquire() as producer:
+        return signatures.apply_async(producer=producer)
 
 
 @celery_app.task(name="run_text_extraction", bind=True)
 def run_text_extraction(self, task_id: str):
     """
     Text Extraction for AI Insights (Phase 1 of RAG)
-    Uses pdfplumber for high-fidelity text extraction
     """
-    db = SessionLocal()
     try:
-        task = db.query(models.ProcessingTask).filter(
-            models.ProcessingTask.id == task_id
-        ).first()
-        
-        if not task:
-            return
+        with SessionLocal() as db:
+            task = _load_task(db, task_id)
+            
+            if not task:
+                return
+            
+            _mark_processing(db, task_id)
         
-        task.status = models.TaskStatus.PROCESSING
-        db.commit()
-        
-        document = task.original_document
-        user = task.user
-        
-        doc_bytes = download_from_s3(document.s3_key)
-        
-        # Use pdfplumber for precise text extraction
-        logger.info(f"Extracting text with pdfplumber")
-        full_text = ""
-        
-        with pdfplumber.open(io.BytesIO(doc_bytes)) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                text = page.extract_text()
-                if text:
-                    full_text += f"\n\n--- Page {page_num} ---\n\n{text}"
+        logger.info(f"Extracting text from document {task.document_id}")
+        full_text = extract_document_text(task.document_id, task.s3_key, page_header=True)
         
         if not full_text.strip():
             raise Exception("No text could be extracted from the PDF")
         
-        task.result_data = {
-            "full_text": full_text,
-            "page_count": len(full_text.split("--- Page")),
+        result_data = {
+            "full_text_s3_key": store_extracted_text(task_id, full_text),
+            "page_count": full_text.count("--- Page "),
             "character_count": len(full_text),
-            "document_name": document.filename,
+            "document_name": task.filename,
             "indexed": True
         }
-        task.status = models.TaskStatus.COMPLETED
-        task.completed_at = datetime.utcnow()
-        db.commit()
+        with SessionLocal() as db:
+            _mark_done(db, task_id, models.TaskStatus.COMPLETED, result_data=result_data)
         
         logger.info(f"Text extraction completed for task {task_id}")
         
-        send_task_complete_email(
-            email=user.email,
+        send_notification.delay(
+            "task_complete",
+            email=task.email,
             task_name="AI Insights (Indexing)",
-            document_name=document.filename,
-            task_id=str(task.id),
-            name=user.full_name
+            document_name=task.filename,
+            task_id=str(task_id),
+            name=task.full_name
         )
         
     except Exception as e:
         logger.error(f"Text extraction failed: {str(e)}")
-        task.status = models.TaskStatus.FAILED
-        task.error_message = str(e)
-        task.completed_at = datetime.utcnow()
-        db.commit()
-    
-    finally:
-        db.close()
-
-
-@celery_app.task(name="run_ai_redaction", bind=True)
-def run_ai_redaction(self, task_id: str, redact_types: list = None):
-    """
-    AI Redactor - Identify and remove sensitive information
-    """
-    db = SessionLocal()
-    try:
-        task = db.query(models.ProcessingTask).filter(
-            models.ProcessingTask.id == task_id
-        ).first()
-        
-        if not task:
-            return
-        
-        task.status = models.TaskStatus.PROCESSING
-        db.commit()
-        
-        document = task.original_document
-        user = task.user
-        
-        doc_bytes = download_from_s3(document.s3_key)
-        
-        # Extract text from PDF
-        logger.info("Extracting text from PDF for redaction")
-        text_content = ""
-        with pdfplumber.open(io.BytesIO(doc_bytes)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_content += page_text + "\n"
-        
-        redact_types = redact_types or ["email", "phone", "ssn", "credit_card", "names", "addresses"]
-        
-        logger.info(f"Redacting sensitive information")
-        import asyncio
-        redacted_text = asyncio.run(vertex_ai_tools.redact_content(text_content, redact_types))
-        
-        task.result_data = {
-            "redacted_text": redacted_text,
-            "redact_types": redact_types,
-            "document_name": document.filename,
-            "full_text": text_content  # Store for insights chat
-        }
-        task.status = models.TaskStatus.COMPLETED
-        task.completed_at = datetime.utcnow()
-        db.commit()
-        
-        logger.info(f"Redaction completed for task {task_id}")
-        
-        send_task_complete_email(
-            email=user.email,
-            task_name="AI Redactor",
-            document_name=document.filename,
-            task_id=str(task.id),
-            name=user.full_name
-        )
-        
-    except Exception as e:
-        logger.error(f"Redaction failed: {str(e)}")
-        task.status = models.TaskStatus.FAILED
-        task.error_message = str(e)
-        task.completed_at = datetime.utcnow()
-        db.commit()
-    
-    finally:
-        db.close()
-
-
-@celery_app.task(name="run_resume_optimization", bind=True)
-def run_resume_optimization(self, task_id: str):
-    """
-    Resume Optimizer - Enhance resume for ATS systems
-    """
-    db = SessionLocal()
-    try:
-        task = db.query(models.ProcessingTask).filter(
-            models.ProcessingTask.id == task_id
-        ).first()
-        
-        if not task:
-            return
-        
-        task.status = models.TaskStatus.PROCESSING
-        db.commit()
-        
-        document = task.original_document
-        user = task.user
-        
-        # Get parameters from task result_data
-        target_role = task.result_data.get("target_role") if task.result_data else None
-        keywords = task.result_data.get("keywords", []) if task.result_data else []
-        
-        doc_bytes = download_from_s3(document.s3_key)
-        
-        # Extract text from PDF
-        logger.info("Extracting text from PDF for resume optimization")
-        text_content = ""
-        with pdfplumber.open(io.BytesIO(doc_bytes)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_content += page_text + "\n"
-        
-        logger.info("Optimizing resume with Vertex AI")
-        import asyncio
-        optimized_resume = asyncio.run(vertex_ai_tools.optimize_resume(text_content, target_role, keywords))
-        
-        task.result_data = {
-            "optimized_resume": optimized_resume,
-            "target_role": target_role,
-            "keywords": keywords,
-            "document_name": document.filename,
-            "full_text": text_content  # Store for insights chat
-        }
-        task.status = models.TaskStatus.COMPLETED
-        task.completed_at = datetime.utcnow()
-        db.commit()
-        
-        logger.info(f"Resume optimization completed for task {task_id}")
-        
-        send_task_complete_email(
-            email=user.email,
-            task_name="Resume Optimizer",
-            document_name=document.filename,
-            task_id=str(task.id),
-            name=user.full_name
-        )
-        
-    except Exception as e:
-        logger.error(f"Resume optimization failed: {str(e)}")
-        task.status = models.TaskStatus.FAILED
-        task.error_message = str(e)
-        task.completed_at = datetime.utcnow()
-        db.commit()
-    
-    finally:
-        db.close()
-
-
-@celery_app.task(name="run_proposal_generation", bind=True)
-def run_proposal_generation(self, task_id: str):
-    """
-    Proposal Writer - Generate professional business proposals
-    """
-    db = SessionLocal()
-    try:
-        task = db.query(models.ProcessingTask).filter(
-            models.ProcessingTask.id == task_id
-        ).first()
-        
-        if not task:
-            return
-        
-        task.status = models.TaskStatus.PROCESSING
-        db.commit()
-        
-        document = task.original_document
-        user = task.user
-        
-        # Get parameters from task result_data
-        proposal_type = task.result_data.get("proposal_type", "business") if task.result_data else "business"
-        tone = task.result_data.get("tone", "professional") if task.result_data else "professional"
-        
-        doc_bytes = download_from_s3(document.s3_key)
-        
-        # Extract text from PDF
-        logger.info("Extracting text from PDF for proposal generation")
-        text_content = ""
-        with pdfplumber.open(io.BytesIO(doc_bytes)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_content += page_text + "\n"
-        
-        logger.info(f"Generating {proposal_type} proposal")
-        import asyncio
-        proposal = asyncio.run(vertex_ai_tools.generate_proposal(text_content, proposal_type, tone))
-        
-        task.result_data = {
-            "proposal": proposal,
-            "proposal_type": proposal_type,
-            "tone": tone,
-            "document_name": document.filename,
-            "full_text": text_content  # Store for insights chat
-        }
-        task.status = models.TaskStatus.COMPLETED
-        task.completed_at = datetime.utcnow()
-        db.commit()
-        
-        logger.info(f"Proposal generation completed for task {task_id}")
-        
-        send_task_complete_email(
-            email=user.email,
-            task_name="Proposal Writer",
-            document_name=document.filename,
-            task_id=str(task.id),
-            name=user.full_name
-        )
-        
-    except Exception as e:
-        logger.error(f"Proposal generation failed: {str(e)}")
-        task.status = models.TaskStatus.FAILED
-        task.error_message = str(e)
-        task.completed_at = datetime.utcnow()
-        db.commit()
-    
-    finally:
-        db.close()
-
-
-@celery_app.task(name="run_tagline_generation", bind=True)
-def run_tagline_generation(self, task_id: str):
-    """
-    Tagline Maker - Generate catchy taglines and slogans
-    """
-    db = SessionLocal()
-    try:
-        task = db.query(models.ProcessingTask).filter(
-            models.ProcessingTask.id == task_id
-        ).first()
-        
-        if not task:
-            return
-        
-        task.status = models.TaskStatus.PROCESSING
-        db.commit()
-        
-        document = task.original_document
-        user = task.user
-        
-        # Get parameters from task result_data
-        count = task.result_data.get("count", 5) if task.result_data else 5
-        style = task.result_data.get("style", "catchy") if task.result_data else "catchy"
-        
-        doc_bytes = download_from_s3(document.s3_key)
-        
-        # Extract text from PDF
-        logger.info("Extracting text from PDF for tagline generation")
-        text_content = ""
-        with pdfplumber.open(io.BytesIO(doc_bytes)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_content += page_text + "\n"
-        
-        logger.info(f"Generating {count} taglines with {style} style")
-        import asyncio
-        taglines = asyncio.run(vertex_ai_tools.generate_taglines(text_content, count, style))
-        
-        task.result_data = {
-            "taglines": taglines[:count],
-            "count": len(taglines[:count]),
-            "style": style,
-            "document_name": document.filename,
-            "full_text": text_content  # Store for insights chat
-        }
-        task.status = models.TaskStatus.COMPLETED
-        task.completed_at = datetime.utcnow()
-        db.commit()
-        
-        logger.info(f"Tagline generation completed for task {task_id}")
-        
-        send_task_complete_email(
-            email=user.email,
-            task_name="Tagline Maker",
-            document_name=document.filename,
-            task_id=str(task.id),
-            name=user.full_name
-        )
-        
-    except Exception as e:
-        logger.error(f"Tagline generation failed: {str(e)}")
-        task.status = models.TaskStatus.FAILED
-        task.error_message = str(e)
-        task.completed_at = datetime.utcnow()
-        db.commit()
-    
-    finally:
-        db.close()
+        with SessionLocal() as db:
+            _mark_failed(db, task_id, e)
@@ -9,6 +9,7 @@ from .pdf_processor import PDFProcessor
 from .image_processor import ImageProcessor
 from .office_processor import OfficeProcessor
 from .video_processor import VideoProcessor
+from .pdf_extract import extract_all_text, open_pdf
 
 __all__ = [
     'FileValidator',
@@ -18,5 +19,7 @@ __all__ = [
     'PDFProcessor',
     'ImageProcessor',
     'OfficeProcessor',
-    'VideoProcessor'
+    'VideoProcessor',
+    'extract_all_text',
+    'open_pdf'
 ]
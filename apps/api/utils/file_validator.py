@@ -4,7 +4,8 @@ Handles file type, size, and format validation for all tools
 """
 import os
 import magic
-from typing import Optional, List, Tuple
+from functools import lru_cache
+from typing import FrozenSet, Optional, List, Tuple
 from fastapi import UploadFile, HTTPException
 
 class FileValidator:
@@ -16,6 +17,10 @@ class FileValidator:
     MAX_VIDEO_SIZE = 500 * 1024 * 1024  # 500MB
     MAX_OFFICE_SIZE = 100 * 1024 * 1024  # 100MB
     
+    # libmagic only inspects the start of a file (its own default limit is 1MB);
+    # CDF and OOXML need well past the first 4KB to be told apart
+    MAGIC_HEADER_SIZE = 1024 * 1024
+    
     # Allowed MIME types
     ALLOWED_TYPES = {
         'pdf': ['application/pdf'],
@@ -26,6 +31,35 @@ class FileValidator:
         'powerpoint': ['application/vnd.ms-powerpoint', 'application/vnd.openxmlformats-officedocument.presentationml.presentation'],
     }
     
+    _MIME_SETS = {key: frozenset(mimes) for key, mimes in ALLOWED_TYPES.items()}
+    
+    # Generic container types libmagic may report for Office files; the extension picks the format
+    _LEGACY_OFFICE = {
+        '.doc': 'application/msword',
+        '.xls': 'application/vnd.ms-excel',
+        '.ppt': 'application/vnd.ms-powerpoint',
+    }
+    _CONTAINER_MIMES = {
+        'application/zip': {
+            '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+            '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+        },
+        'application/CDFV2': _LEGACY_OFFICE,
+        'application/x-ole-storage': _LEGACY_OFFICE,
+        'application/vnd.ms-office': _LEGACY_OFFICE,
+    }
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _allowed_mimes(allowed_types: Tuple[str, ...]) -> FrozenSet[str]:
+        """Flattened MIME set for a combination of type keys, built once per combination"""
+        return frozenset().union(*(
+            FileValidator._MIME_SETS[type_key]
+            for type_key in allowed_types
+            if type_key in FileValidator._MIME_SETS
+        ))
+    
     @staticmethod
     async def validate_file(
         file: UploadFile,
@@ -42,12 +76,8 @@ class FileValidator:
             if not file or not file.filename:
                 return False, "No file provided"
             
-            # Read file content
-            content = await file.read()
-            await file.seek(0)  # Reset file pointer
-            
-            # Check file size
-            file_size = len(content)
+            # Check file size without reading the upload into memory
+            file_size = FileValidator._get_size(file)
             if file_size > max_size:
                 max_mb = max_size / (1024 * 1024)
                 return False, f"File size exceeds {max_mb}MB limit"
@@ -57,15 +87,20 @@ class FileValidator:
             
             # Check MIME type using python-magic
             if check_magic:
-                mime = magic.from_buffer(content, mime=True)
+                header = await file.read(FileValidator.MAGIC_HEADER_SIZE)
+                await file.seek(0)  # Reset file pointer
+                
+                # PDFs are by far the most common upload; skip libmagic for them
+                if header.startswith(b"%PDF-"):
+                    mime = 'application/pdf'
+                else:
+                    mime = magic.from_buffer(header, mime=True)
                 
-                # Build allowed MIME list
-                allowed_mimes = []
-                for type_key in allowed_types:
-                    if type_key in FileValidator.ALLOWED_TYPES:
-                        allowed_mimes.extend(FileValidator.ALLOWED_TYPES[type_key])
+                # Resolve a bare zip/OLE container to the Office format its extension names
+                ext = os.path.splitext(file.filename)[1].lower()
+                mime = FileValidator._CONTAINER_MIMES.get(mime, {}).get(ext, mime)
                 
-                if mime not in allowed_mimes:
+                if mime not in FileValidator._allowed_mimes(tuple(allowed_types)):
                     return False, f"Invalid file type. Expected: {', '.join(allowed_types)}, Got: {mime}"
             
             # Check file extension
@@ -78,6 +113,18 @@ class FileValidator:
         except Exception as e:
             return False, f"Validation error: {str(e)}"
     
+    @staticmethod
+    def _get_size(file: UploadFile) -> int:
+        """Upload size from Starlette's metadata, falling back to seeking the spooled file"""
+        if file.size is not None:
+            return file.size
+        
+        position = file.file.tell()
+        file.file.seek(0, os.SEEK_END)
+        size = file.file.tell()
+        file.file.seek(position)
+        return size
+    
     @staticmethod
     async def validate_pdf(file: UploadFile) -> Tuple[bool, Optional[str]]:
         """Validate PDF file"""
@@ -3,14 +3,196 @@ Image Processing Utility
 Advanced image operations using Pillow and Sharp-equivalent operations
 """
 import io
+import os
+import math
+import struct
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
-from PIL import Image, ImageOps, ImageFilter, ImageEnhance
+from typing import Optional, Dict, Any, List, Tuple, Union
+import PIL
+from PIL import Image, ImageOps, ImageFilter, ImageEnhance, features
 import pillow_heif
 
+try:
+    from PIL import ImageCms
+except ImportError:
+    ImageCms = None
+
+try:
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+
+from .process_pool import map_in_pool, in_pool_worker, PROCESS_POOL_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Large images can go through libvips, which streams strips instead of decoding whole frames
+USE_VIPS = os.getenv("USE_VIPS", "false").lower() == "true"
+VIPS_MIN_PIXELS = int(os.getenv("VIPS_MIN_PIXELS", "20000000"))
+
+# thumbnail() needs a width even when only the height bounds the result
+VIPS_UNBOUNDED = 10_000_000
+
+# ImageFilter.SHARPEN / ImageFilter.SMOOTH kernels, so every backend filters identically
+SHARPEN_KERNEL = ([[-2, -2, -2], [-2, 32, -2], [-2, -2, -2]], 16)
+SMOOTH_KERNEL = ([[1, 1, 1], [1, 5, 1], [1, 1, 1]], 13)
+
+# Integer box-reduce factors tried before a LANCZOS downscale, largest first
+REDUCE_FACTORS = (8, 6, 4, 3, 2)
+
+# LANCZOS always gets at least this much downscale left after the box reduce
+REDUCE_GAP = 2
+
+# Outputs at least this large are resampled in horizontal bands across threads
+PARALLEL_RESIZE_PIXELS = 2_000_000
+
+# EXIF orientation tag, and the orientations that swap width and height
+ORIENTATION_TAG = 0x0112
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+# Counter-clockwise rotations that Image.transpose() performs without resampling
+RIGHT_ANGLE_TRANSPOSES = {
+    90: Image.Transpose.ROTATE_90,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_270
+}
+
 # Register HEIF opener
 pillow_heif.register_heif_opener()
 
+
+def _cpu_has_avx2() -> Optional[bool]:
+    """Whether the CPU advertises AVX2, or None when /proc/cpuinfo is unavailable"""
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            return any(line.startswith('flags') and ' avx2' in line for line in cpuinfo)
+    except OSError:
+        return None
+
+
+def _log_pil_build() -> None:
+    """Report the Pillow build and JPEG codec in use on this host"""
+    simd = 'post' in PIL.__version__
+    avx2 = _cpu_has_avx2()
+    
+    if simd and avx2 is False:
+        logger.warning(f"⚠️ Pillow-SIMD {PIL.__version__} loaded on a CPU without AVX2; rebuild with PILLOW_SIMD=0")
+    elif simd:
+        logger.info(f"🖼️ Pillow-SIMD {PIL.__version__} in use for resampling")
+    else:
+        logger.info(f"🖼️ Stock Pillow {PIL.__version__} in use (AVX2 available: {avx2})")
+    
+    if features.check_feature('libjpeg_turbo'):
+        logger.info(f"🖼️ JPEG codec: libjpeg-turbo {features.version('jpg')}")
+    else:
+        logger.warning(f"⚠️ Pillow is linked against plain libjpeg {features.version('jpg')}; JPEG decode/encode will be slower")
+
+
+_log_pil_build()
+
+# PNG colour type -> Pillow mode, for 8-bit images
+PNG_MODES = {0: 'L', 2: 'RGB', 3: 'P', 4: 'LA', 6: 'RGBA'}
+
+# JPEG component count -> Pillow mode
+JPEG_MODES = {1: 'L', 3: 'RGB', 4: 'CMYK'}
+
+
+def _probe_jpeg(f) -> Optional[Tuple[str, int, int, str]]:
+    """Walk JPEG marker segments up to the SOFn frame header"""
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte == b'\xff':
+            marker = f.read(1)
+            if marker != b'\xff':
+                break
+            byte = marker
+        else:
+            return None
+        
+        if not marker or marker == b'\xd9':
+            return None
+        code = marker[0]
+        if 0xD0 <= code <= 0xD7 or code == 0x01:
+            continue
+        
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            header = f.read(6)
+            if len(header) < 6:
+                return None
+            _, height, width, components = struct.unpack('>BHHB', header)
+            mode = JPEG_MODES.get(components)
+            return ('JPEG', width, height, mode) if mode and width and height else None
+        
+        f.seek(length - 2, 1)
+
+
+def _probe_header(image_path: Path) -> Optional[Tuple[str, int, int, str]]:
+    """
+    Read (format, width, height, mode) straight from a PNG, JPEG or WebP header
+    
+    Returns None for anything else, or any variant whose mode isn't obvious from
+    the header (16-bit PNG, animated WebP), so the caller can fall back to Pillow.
+    """
+    with open(image_path, 'rb') as f:
+        head = f.read(32)
+        
+        if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR':
+            width, height, depth, color_type = struct.unpack('>IIBB', head[16:26])
+            mode = PNG_MODES.get(color_type)
+            if mode and (depth == 8 or (mode == 'P' and depth < 8)):
+                return 'PNG', width, height, mode
+            return None
+        
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP' and len(head) >= 30:
+            chunk = head[12:16]
+            if chunk == b'VP8X':
+                flags = head[20]
+                if flags & 0x02:
+                    return None
+                width = 1 + int.from_bytes(head[24:27], 'little')
+                height = 1 + int.from_bytes(head[27:30], 'little')
+                return 'WEBP', width, height, 'RGBA' if flags & 0x10 else 'RGB'
+            if chunk == b'VP8L' and head[20] == 0x2F:
+                bits = int.from_bytes(head[21:25], 'little')
+                width = (bits & 0x3FFF) + 1
+                height = ((bits >> 14) & 0x3FFF) + 1
+                return 'WEBP', width, height, 'RGBA' if bits >> 28 & 1 else 'RGB'
+            if chunk == b'VP8 ' and head[23:26] == b'\x9d\x01\x2a':
+                width, height = struct.unpack('<HH', head[26:30])
+                return 'WEBP', width & 0x3FFF, height & 0x3FFF, 'RGB'
+            return None
+        
+        if head[:2] == b'\xff\xd8':
+            return _probe_jpeg(f)
+    
+    return None
+
+
+def _dispatch(job: Tuple[str, Path, Path, Optional[Dict[str, Any]]]) -> Union[Path, Exception]:
+    """Run one process_batch job in a worker process, returning the error instead of raising"""
+    op_name, input_file, output_file, options = job
+    try:
+        return getattr(ImageProcessor, op_name)(input_file, output_file, options)
+    except Exception as e:
+        return e
+
+
 class ImageProcessor:
     """Advanced image processing operations"""
     
@@ -25,6 +207,18 @@ class ImageProcessor:
         'tiff': 'TIFF'
     }
     
+    # Let libjpeg decode downscaled JPEGs at 1/2, 1/4 or 1/8 size; callers can
+    # pass options['draft'] = False when a full-resolution decode is required
+    JPEG_DRAFT = True
+    
+    # Lowest quality a target-size search will go down to
+    TARGET_SIZE_MIN_QUALITY = 10
+    
+    # compress_image without an explicit format re-encodes JPEG/PNG sources as WebP
+    AUTO_WEBP_QUALITY = 82
+    # Palettes this small stay PNG: lossless WebP can come out larger
+    AUTO_WEBP_MIN_COLORS = 16
+    
     @staticmethod
     def compress_image(
         input_file: Path,
@@ -34,13 +228,15 @@ class ImageProcessor:
         """
         Compress image with quality control
         Options:
-            - quality: int (1-100, default: 85)
-            - format: str (output format)
+            - quality: int (1-100, default: 85; 82 for automatic WebP)
+            - format: str (output format; JPEG/PNG sources default to WebP)
             - progressive: bool (for JPEG)
-            - optimize: bool
+            - optimize: bool (extra Huffman pass, default: False)
+            - fast: bool (baseline JPEG, low-effort WebP)
             - max_width: int (resize if larger)
             - max_height: int (resize if larger)
             - strip_metadata: bool
+            - draft: bool (reduced-size JPEG decode, default: True)
         """
         options = options or {}
         quality = options.get('quality', 85)
@@ -48,48 +244,71 @@ class ImageProcessor:
         
         try:
             with Image.open(input_file) as img:
-                # Convert RGBA to RGB if saving as JPEG
-                if output_format == 'JPEG' and img.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = background
+                ImageProcessor._load(
+                    img, options, True, options.get('max_width'), options.get('max_height')
+                )
                 
-                # Resize if max dimensions specified
-                max_width = options.get('max_width')
-                max_height = options.get('max_height')
-                if max_width or max_height:
-                    img = ImageProcessor._resize_maintain_aspect(
-                        img, max_width, max_height
-                    )
+                lossless = False
+                if not output_format and ImageProcessor._auto_webp(img):
+                    output_format = 'WEBP'
+                    options = {**options, 'format': output_format}
+                    quality = options.get('quality', ImageProcessor.AUTO_WEBP_QUALITY)
+                    # Transparent PNGs are usually graphics, where lossy WebP shows artefacts
+                    lossless = img.format == 'PNG' and (img.mode in ('RGBA', 'LA') or 'transparency' in img.info)
                 
-                # Strip metadata
-                data = list(img.getdata())
-                image_without_exif = Image.new(img.mode, img.size)
-                image_without_exif.putdata(data)
-                img = image_without_exif
+                img = ImageProcessor.compress_image_img(img, options)
                 
                 # Save with compression
-                save_kwargs = {
-                    'quality': quality,
-                    'optimize': options.get('optimize', True)
-                }
-                
-                if output_format == 'JPEG':
-                    save_kwargs['progressive'] = options.get('progressive', True)
-                elif output_format == 'PNG':
-                    save_kwargs['compress_level'] = 9
-                elif output_format == 'WEBP':
-                    save_kwargs['method'] = 6
-                
+                save_kwargs = ImageProcessor._save_kwargs(output_format, quality, options)
+                if lossless:
+                    save_kwargs['lossless'] = True
                 img.save(output_file, format=output_format or img.format, **save_kwargs)
-                
-            return output_file
             
+            return output_file
+        
         except Exception as e:
             raise Exception(f"Image compression failed: {str(e)}")
     
+    @staticmethod
+    def _auto_webp(img: Image.Image) -> bool:
+        """Whether compress_image should switch a source with no requested format to WebP"""
+        if img.format not in ('JPEG', 'PNG'):
+            return False
+        if img.mode == 'P':
+            palette = img.getpalette() or []
+            return len(palette) // 3 >= ImageProcessor.AUTO_WEBP_MIN_COLORS
+        return True
+    
+    @staticmethod
+    def compress_image_img(img: Image.Image, options: Optional[Dict[str, Any]] = None) -> Image.Image:
+        """compress_image on an in-memory image: every step except the final encode"""
+        options = options or {}
+        output_format = options.get('format', '').upper()
+        
+        ImageProcessor._apply_draft(
+            img, options.get('max_width'), options.get('max_height'), options
+        )
+        
+        # Palette images would be resized with NEAREST, so expand them before resizing
+        if output_format == 'JPEG' and img.mode == 'P':
+            img = ImageProcessor._flatten_to_rgb(img)
+        
+        # Resize if max dimensions specified
+        max_width = options.get('max_width')
+        max_height = options.get('max_height')
+        if max_width or max_height:
+            img = ImageProcessor._resize_maintain_aspect(
+                img, max_width, max_height
+            )
+        
+        # Flatten after resizing: Pillow resamples alpha premultiplied, so compositing
+        # the smaller image gives the same pixels for a fraction of the work
+        if output_format == 'JPEG' and img.mode in ('RGBA', 'LA'):
+            img = ImageProcessor._flatten_to_rgb(img)
+        
+        # Strip metadata
+        return ImageProcessor._strip_metadata(img)
+    
     @staticmethod
     def compress_image_advanced(
         input_file: Path,
@@ -108,77 +327,179 @@ class ImageProcessor:
             - sharpen: bool
             - brightness: int (-50 to 50)
             - contrast: int (-50 to 50)
-            - color_profile: str
-            - target_size_mb: int
+            - color_profile: str ('srgb' converts embedded ICC profiles to sRGB)
+            - target_size_mb / target_size_kb: int (JPEG/WebP: highest quality that fits)
         """
         options = options or {}
         quality = options.get('quality', 80)
         output_format = options.get('format', '').upper()
         
         try:
-            with Image.open(input_file) as img:
-                # Convert RGBA to RGB if saving as JPEG
-                if output_format == 'JPEG' and img.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = background
-                
-                # Resize by percentage
+            vips_format = ImageProcessor._vips_format(
+                input_file, output_format, options,
+                ('auto_enhance', 'contrast', 'target_size_mb', 'target_size_kb')
+            )
+            if vips_format:
                 resize_percent = options.get('resize_percent', 100)
-                if resize_percent != 100:
-                    new_width = int(img.width * resize_percent / 100)
-                    new_height = int(img.height * resize_percent / 100)
-                    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                # Apply enhancements
-                if options.get('auto_enhance'):
-                    img = ImageOps.autocontrast(img)
-                
-                if options.get('brightness', 0) != 0:
-                    factor = 1 + (options['brightness'] / 100)
-                    enhancer = ImageEnhance.Brightness(img)
-                    img = enhancer.enhance(factor)
-                
-                if options.get('contrast', 0) != 0:
-                    factor = 1 + (options['contrast'] / 100)
-                    enhancer = ImageEnhance.Contrast(img)
-                    img = enhancer.enhance(factor)
-                
-                if options.get('sharpen'):
-                    img = img.filter(ImageFilter.SHARPEN)
-                
-                if options.get('denoise'):
-                    img = img.filter(ImageFilter.SMOOTH)
-                
-                # Strip metadata if requested
-                if options.get('strip_metadata', True):
-                    data = list(img.getdata())
-                    image_without_exif = Image.new(img.mode, img.size)
-                    image_without_exif.putdata(data)
-                    img = image_without_exif
+                return ImageProcessor._process_vips(
+                    input_file, output_file, vips_format, options,
+                    quality=quality,
+                    progressive=options.get('progressive', True),
+                    scale=resize_percent / 100
+                )
+            
+            with Image.open(input_file) as img:
+                # Percentages refer to the full-size image, not a drafted decode of it
+                options = {**options, 'source_size': img.size}
+                scale = min(options.get('resize_percent', 100), 100) / 100
+                ImageProcessor._load(
+                    img, options, options.get('strip_metadata', True),
+                    img.width * scale if scale < 1 else None, img.height * scale if scale < 1 else None
+                )
+                img = ImageProcessor.compress_image_advanced_img(img, options)
                 
                 # Save with compression
-                save_kwargs = {
-                    'quality': quality,
-                    'optimize': options.get('optimize', True)
-                }
-                
-                if output_format == 'JPEG':
-                    save_kwargs['progressive'] = options.get('progressive', True)
-                elif output_format == 'PNG':
-                    save_kwargs['compress_level'] = 9
-                elif output_format == 'WEBP':
-                    save_kwargs['method'] = 6
-                
-                img.save(output_file, format=output_format or img.format, **save_kwargs)
-                
-            return output_file
+                save_format = output_format or img.format
+                target_bytes = (
+                    options.get('target_size_mb', 0) * 1024 * 1024
+                    or options.get('target_size_kb', 0) * 1024
+                )
+                if target_bytes and save_format in ('JPEG', 'WEBP'):
+                    Path(output_file).write_bytes(
+                        ImageProcessor._encode_to_target(img, save_format, options, quality, target_bytes)
+                    )
+                else:
+                    save_kwargs = ImageProcessor._save_kwargs(save_format, quality, options)
+                    img.save(output_file, format=save_format, **save_kwargs)
             
+            return output_file
+        
         except Exception as e:
             raise Exception(f"Advanced image compression failed: {str(e)}")
     
+    @staticmethod
+    def compress_image_advanced_img(img: Image.Image, options: Optional[Dict[str, Any]] = None) -> Image.Image:
+        """compress_image_advanced on an in-memory image: every step except the final encode"""
+        options = options or {}
+        output_format = options.get('format', '').upper()
+        
+        # Convert RGBA to RGB if saving as JPEG
+        if output_format == 'JPEG' and img.mode in ('RGBA', 'LA', 'P'):
+            img = ImageProcessor._flatten_to_rgb(img)
+        
+        # Resize by percentage
+        resize_percent = options.get('resize_percent', 100)
+        if resize_percent != 100:
+            source_width, source_height = options.get('source_size', img.size)
+            if (source_width > source_height) != (img.width > img.height):
+                # EXIF orientation turned the image while loading
+                source_width, source_height = source_height, source_width
+            new_width = int(source_width * resize_percent / 100)
+            new_height = int(source_height * resize_percent / 100)
+            img = ImageProcessor._lanczos_resize(img, (new_width, new_height))
+        
+        # Apply enhancements
+        auto_enhance = options.get('auto_enhance', False)
+        brightness = options.get('brightness', 0)
+        contrast = options.get('contrast', 0)
+        
+        if (auto_enhance or brightness or contrast) and img.mode in ('L', 'RGB'):
+            # All three are per-channel point ops: fuse them into one pass
+            img = img.point(ImageProcessor._tone_lut(img, auto_enhance, brightness, contrast))
+        else:
+            if auto_enhance:
+                img = ImageOps.autocontrast(img)
+            
+            if brightness != 0:
+                enhancer = ImageEnhance.Brightness(img)
+                img = enhancer.enhance(1 + brightness / 100)
+            
+            if contrast != 0:
+                enhancer = ImageEnhance.Contrast(img)
+                img = enhancer.enhance(1 + contrast / 100)
+        
+        img = ImageProcessor._apply_filters(
+            img, options.get('sharpen', False), options.get('denoise', False)
+        )
+        
+        # Strip metadata if requested
+        if options.get('strip_metadata', True):
+            img = ImageProcessor._strip_metadata(img)
+        
+        return img
+    
+    @staticmethod
+    def _save_kwargs(
+        output_format: str,
+        quality: int,
+        options: Dict[str, Any],
+        progressive: Optional[bool] = None,
+        webp_method: int = 4
+    ) -> Dict[str, Any]:
+        """
+        Encoder settings tuned per format
+        
+        The second Huffman-optimisation pass is opt-in, and JPEG only takes it
+        below quality 80, where it saves the most. WebP defaults to method 4:
+        method 6 is several times slower for a couple of percent. PNG's optimize
+        only repeats what compress_level=9 already does.
+        
+        fast=True trades size for speed: baseline JPEG (libjpeg always optimises
+        Huffman tables for progressive scans) and WebP method 2.
+        """
+        fast = options.get('fast', False)
+        optimize = options.get('optimize', False) and not fast
+        
+        if output_format == 'JPEG':
+            if fast:
+                progressive = False
+            elif progressive is None:
+                progressive = options.get('progressive', True)
+            return {'quality': quality, 'progressive': progressive, 'optimize': optimize and quality < 80}
+        if output_format == 'WEBP':
+            return {'quality': quality, 'method': 2 if fast else webp_method}
+        if output_format == 'PNG':
+            return {'compress_level': 9}
+        return {'quality': quality, 'optimize': optimize}
+    
+    @staticmethod
+    def _encode_to_target(
+        img: Image.Image,
+        output_format: str,
+        options: Dict[str, Any],
+        max_quality: int,
+        target_bytes: int
+    ) -> bytes:
+        """
+        Encode at the highest quality, up to max_quality, that fits target_bytes
+        
+        Probes are encoded into one in-memory buffer and binary-searched; if no
+        quality fits, the TARGET_SIZE_MIN_QUALITY encode is returned.
+        """
+        buffer = io.BytesIO()
+        
+        def encode(quality: int) -> bytes:
+            buffer.seek(0)
+            buffer.truncate()
+            img.save(buffer, format=output_format, **ImageProcessor._save_kwargs(output_format, quality, options))
+            return buffer.getvalue()
+        
+        data = encode(max_quality)
+        if len(data) <= target_bytes:
+            return data
+        
+        best = None
+        lo, hi = ImageProcessor.TARGET_SIZE_MIN_QUALITY, max_quality - 1
+        while lo <= hi:
+            quality = (lo + hi) // 2
+            data = encode(quality)
+            if len(data) <= target_bytes:
+                best, lo = data, quality + 1
+            else:
+                hi = quality - 1
+        
+        return best if best is not None else encode(ImageProcessor.TARGET_SIZE_MIN_QUALITY)
+    
     @staticmethod
     def crop_image_advanced(
         input_file: Path,
@@ -203,84 +524,156 @@ class ImageProcessor:
         
         try:
             with Image.open(input_file) as img:
-                # Apply rotation first
-                rotation = options.get('rotation', 0)
-                if rotation != 0:
-                    img = img.rotate(-rotation, expand=True, resample=Image.Resampling.BICUBIC)
-                
-                # Apply flips
-                if options.get('flip_horizontal'):
-                    img = ImageOps.mirror(img)
-                if options.get('flip_vertical'):
-                    img = ImageOps.flip(img)
-                
-                # Apply zoom (scale from center)
-                zoom = options.get('zoom', 100)
-                if zoom != 100:
-                    new_width = int(img.width * zoom / 100)
-                    new_height = int(img.height * zoom / 100)
-                    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                # Crop logic
-                mode = options.get('mode', 'pixels')
-                aspect_ratio = options.get('aspect_ratio')
-                
-                if aspect_ratio and aspect_ratio not in ['free', None]:
-                    # Smart crop by aspect ratio
-                    target_ratio = ImageProcessor._parse_aspect_ratio(aspect_ratio)
-                    current_ratio = img.width / img.height
-                    
-                    if current_ratio > target_ratio:
-                        new_width = int(img.height * target_ratio)
-                        left = (img.width - new_width) // 2
-                        crop_box = (left, 0, left + new_width, img.height)
-                    else:
-                        new_height = int(img.width / target_ratio)
-                        top = (img.height - new_height) // 2
-                        crop_box = (0, top, img.width, top + new_height)
-                    img = img.crop(crop_box)
-                elif mode == 'pixels':
-                    x = options.get('x', 0)
-                    y = options.get('y', 0)
-                    width = options.get('width') or img.width
-                    height = options.get('height') or img.height
-                    # Ensure crop box is within bounds
-                    x = max(0, min(x, img.width - 1))
-                    y = max(0, min(y, img.height - 1))
-                    width = min(width, img.width - x)
-                    height = min(height, img.height - y)
-                    if width > 0 and height > 0:
-                        img = img.crop((x, y, x + width, y + height))
-                
-                # Apply auto-enhance
-                if options.get('auto_enhance'):
-                    img = ImageOps.autocontrast(img)
-                
-                # Convert for JPEG if needed
-                output_format = options.get('format', 'JPEG')
-                if output_format == 'JPEG' and img.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = background
-                
-                # Strip metadata if requested
-                if options.get('strip_metadata', True):
-                    data = list(img.getdata())
-                    clean_img = Image.new(img.mode, img.size)
-                    clean_img.putdata(data)
-                    img = clean_img
+                ImageProcessor._load(img, options, options.get('strip_metadata', True))
+                img = ImageProcessor.crop_image_advanced_img(img, options)
                 
                 # Save
+                output_format = options.get('format', 'JPEG')
                 quality = options.get('quality', 90)
-                img.save(output_file, format=output_format, quality=quality, optimize=True)
-                
-            return output_file
+                img.save(output_file, format=output_format, quality=quality, optimize=options.get('optimize', False))
             
+            return output_file
+        
         except Exception as e:
             raise Exception(f"Advanced crop failed: {str(e)}")
     
+    @staticmethod
+    def crop_image_advanced_img(img: Image.Image, options: Optional[Dict[str, Any]] = None) -> Image.Image:
+        """crop_image_advanced on an in-memory image: every step except the final encode"""
+        options = options or {}
+        rotation = options.get('rotation', 0)
+        zoom = options.get('zoom', 100)
+        
+        # Right angles are exact transposes; only arbitrary angles need resampling
+        transpose = RIGHT_ANGLE_TRANSPOSES.get(-rotation % 360)
+        if transpose is not None:
+            img = img.transpose(transpose)
+            rotation = 0
+        
+        if rotation != 0 or zoom != 100:
+            # Rotate, flip, zoom and crop in a single resample
+            img = ImageProcessor._transform_crop(img, rotation, zoom, options)
+        else:
+            # Flips and crops are exact pixel copies; no resampling needed
+            if options.get('flip_horizontal'):
+                img = ImageOps.mirror(img)
+            if options.get('flip_vertical'):
+                img = ImageOps.flip(img)
+            
+            crop_box = ImageProcessor._crop_box(img.width, img.height, options)
+            if crop_box:
+                img = img.crop(crop_box)
+        
+        # Apply auto-enhance
+        if options.get('auto_enhance'):
+            img = ImageOps.autocontrast(img)
+        
+        # Convert for JPEG if needed
+        output_format = options.get('format', 'JPEG')
+        if output_format == 'JPEG' and img.mode in ('RGBA', 'LA', 'P'):
+            img = ImageProcessor._flatten_to_rgb(img)
+        
+        # Strip metadata if requested
+        if options.get('strip_metadata', True):
+            img = ImageProcessor._strip_metadata(img)
+        
+        return img
+    
+    @staticmethod
+    def _crop_box(img_width: int, img_height: int, options: Dict[str, Any]) -> Optional[Tuple[int, int, int, int]]:
+        """Crop box for crop_image_advanced on an image of the given size, or None to keep it whole"""
+        mode = options.get('mode', 'pixels')
+        aspect_ratio = options.get('aspect_ratio')
+        
+        if aspect_ratio and aspect_ratio not in ['free', None]:
+            # Smart crop by aspect ratio
+            target_ratio = ImageProcessor._parse_aspect_ratio(aspect_ratio)
+            current_ratio = img_width / img_height
+            
+            if current_ratio > target_ratio:
+                new_width = int(img_height * target_ratio)
+                left = (img_width - new_width) // 2
+                return (left, 0, left + new_width, img_height)
+            new_height = int(img_width / target_ratio)
+            top = (img_height - new_height) // 2
+            return (0, top, img_width, top + new_height)
+        
+        if mode == 'pixels':
+            x = options.get('x', 0)
+            y = options.get('y', 0)
+            width = options.get('width') or img_width
+            height = options.get('height') or img_height
+            # Ensure crop box is within bounds
+            x = max(0, min(x, img_width - 1))
+            y = max(0, min(y, img_height - 1))
+            width = min(width, img_width - x)
+            height = min(height, img_height - y)
+            if width > 0 and height > 0:
+                return (x, y, x + width, y + height)
+        
+        return None
+    
+    @staticmethod
+    def _compose_affine(outer: Tuple[float, ...], inner: Tuple[float, ...]) -> Tuple[float, ...]:
+        """Affine coefficients for applying inner, then outer"""
+        a, b, c, d, e, f = outer
+        A, B, C, D, E, F = inner
+        return (
+            a * A + b * D, a * B + b * E, a * C + b * F + c,
+            d * A + e * D, d * B + e * E, d * C + e * F + f
+        )
+    
+    @staticmethod
+    def _transform_crop(img: Image.Image, rotation: int, zoom: int, options: Dict[str, Any]) -> Image.Image:
+        """
+        Rotate (expanding the canvas), flip, zoom and crop with one affine transform
+        
+        Every step is expressed as an output -> input mapping, matching
+        Image.transform; the output size is derived from the same geometry the
+        step-by-step rotate/resize/crop calls would produce.
+        """
+        width, height = img.size
+        
+        # Rotation about the centre, with the expanded canvas Image.rotate(expand=True) computes
+        theta = -math.radians(-rotation % 360)
+        cos_t, sin_t = round(math.cos(theta), 15), round(math.sin(theta), 15)
+        cx, cy = width / 2.0, height / 2.0
+        matrix = (cos_t, sin_t, cx - cos_t * cx - sin_t * cy, -sin_t, cos_t, cy + sin_t * cx - cos_t * cy)
+        
+        corners = [
+            (matrix[0] * x + matrix[1] * y + matrix[2], matrix[3] * x + matrix[4] * y + matrix[5])
+            for x, y in ((0, 0), (width, 0), (width, height), (0, height))
+        ]
+        rot_width = math.ceil(max(x for x, _ in corners)) - math.floor(min(x for x, _ in corners))
+        rot_height = math.ceil(max(y for _, y in corners)) - math.floor(min(y for _, y in corners))
+        matrix = ImageProcessor._compose_affine(
+            matrix, (1, 0, -(rot_width - width) / 2.0, 0, 1, -(rot_height - height) / 2.0)
+        )
+        
+        if options.get('flip_horizontal'):
+            matrix = ImageProcessor._compose_affine(matrix, (-1, 0, rot_width, 0, 1, 0))
+        if options.get('flip_vertical'):
+            matrix = ImageProcessor._compose_affine(matrix, (1, 0, 0, 0, -1, rot_height))
+        
+        # Zoom (scale from center)
+        zoom_width = int(rot_width * zoom / 100)
+        zoom_height = int(rot_height * zoom / 100)
+        matrix = ImageProcessor._compose_affine(
+            matrix, (rot_width / zoom_width, 0, 0, 0, rot_height / zoom_height, 0)
+        )
+        
+        left, top, right, bottom = (
+            ImageProcessor._crop_box(zoom_width, zoom_height, options) or (0, 0, zoom_width, zoom_height)
+        )
+        matrix = ImageProcessor._compose_affine(matrix, (1, 0, left, 0, 1, top))
+        
+        return img.transform(
+            (right - left, bottom - top),
+            Image.Transform.AFFINE,
+            matrix,
+            resample=Image.Resampling.BICUBIC
+        )
+    
     @staticmethod
     def crop_image(
         input_file: Path,
@@ -296,11 +689,13 @@ class ImageProcessor:
             - height: int (crop height)
             - mode: 'pixels' | 'percentage' | 'center' | 'smart'
             - aspect_ratio: str (e.g., '16:9', '4:3')
+            - resize_to: (width, height) to scale the crop to
         """
         options = options or {}
         
         try:
             with Image.open(input_file) as img:
+                ImageProcessor._load(img, options, False)
                 mode = options.get('mode', 'pixels')
                 
                 if mode == 'pixels':
@@ -353,14 +748,26 @@ class ImageProcessor:
                 else:
                     raise ValueError(f"Invalid crop mode: {mode}")
                 
-                cropped = img.crop(crop_box)
+                resize_to = options.get('resize_to')
+                in_bounds = (
+                    crop_box[0] >= 0 and crop_box[1] >= 0
+                    and crop_box[2] <= img.width and crop_box[3] <= img.height
+                )
+                if resize_to and in_bounds:
+                    # Resample straight from the crop box: no intermediate cropped image
+                    cropped = ImageProcessor._lanczos_resize(img, tuple(resize_to), box=crop_box)
+                elif resize_to:
+                    # Boxes past the edge are padded by crop(), which resize() can't do
+                    cropped = ImageProcessor._lanczos_resize(img.crop(crop_box), tuple(resize_to))
+                else:
+                    cropped = img.crop(crop_box)
                 
                 # Preserve format
                 output_format = options.get('format', img.format)
                 cropped.save(output_file, format=output_format)
-                
-            return output_file
             
+            return output_file
+        
         except Exception as e:
             raise Exception(f"Image crop failed: {str(e)}")
     
@@ -380,72 +787,81 @@ class ImageProcessor:
             - upscale: bool (allow upscaling, default: True)
             - quality: int (1-100)
             - format: str (output format)
+            - draft: bool (reduced-size JPEG decode, default: True)
         """
         options = options or {}
         
         try:
             with Image.open(input_file) as img:
-                target_width = options.get('width')
-                target_height = options.get('height')
-                mode = options.get('mode', 'fit')
-                maintain_aspect = options.get('maintain_aspect', True)
-                upscale = options.get('upscale', True)
-                
-                if not target_width and not target_height:
-                    raise ValueError("Must specify at least width or height")
-                
-                # Calculate dimensions
-                if mode == 'fit':
-                    # Fit inside bounds, maintaining aspect ratio
-                    resized = ImageProcessor._resize_fit(
-                        img, target_width, target_height, upscale
-                    )
-                
-                elif mode == 'fill':
-                    # Fill bounds, crop if necessary
-                    resized = ImageProcessor._resize_fill(
-                        img, target_width, target_height
-                    )
-                
-                elif mode == 'stretch':
-                    # Stretch to exact dimensions
-                    if not target_width:
-                        target_width = img.width
-                    if not target_height:
-                        target_height = img.height
-                    resized = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
-                
-                elif mode == 'thumbnail':
-                    # Thumbnail mode (maintain aspect, no upscale)
-                    if not target_width:
-                        target_width = img.width
-                    if not target_height:
-                        target_height = img.height
-                    img.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
-                    resized = img
-                
-                else:
-                    raise ValueError(f"Invalid resize mode: {mode}")
+                ImageProcessor._load(img, options, False, options.get('width'), options.get('height'))
+                output_format = options.get('format', img.format)
+                resized = ImageProcessor.resize_image_img(img, options)
                 
                 # Save with options
                 quality = options.get('quality', 90)
-                output_format = options.get('format', img.format)
-                
-                # Convert RGBA to RGB if saving as JPEG
-                if output_format == 'JPEG' and resized.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', resized.size, (255, 255, 255))
-                    if resized.mode == 'P':
-                        resized = resized.convert('RGBA')
-                    background.paste(resized, mask=resized.split()[-1] if resized.mode == 'RGBA' else None)
-                    resized = background
-                
-                resized.save(output_file, format=output_format, quality=quality, optimize=True)
-                
-            return output_file
+                resized.save(output_file, format=output_format, quality=quality, optimize=options.get('optimize', False))
             
+            return output_file
+        
         except Exception as e:
             raise Exception(f"Image resize failed: {str(e)}")
     
+    @staticmethod
+    def resize_image_img(img: Image.Image, options: Optional[Dict[str, Any]] = None) -> Image.Image:
+        """resize_image on an in-memory image: every step except the final encode"""
+        options = options or {}
+        
+        target_width = options.get('width')
+        target_height = options.get('height')
+        mode = options.get('mode', 'fit')
+        maintain_aspect = options.get('maintain_aspect', True)
+        upscale = options.get('upscale', True)
+        
+        if not target_width and not target_height:
+            raise ValueError("Must specify at least width or height")
+        
+        ImageProcessor._apply_draft(img, target_width, target_height, options)
+        
+        # Calculate dimensions
+        if mode == 'fit':
+            # Fit inside bounds, maintaining aspect ratio
+            resized = ImageProcessor._resize_fit(
+                img, target_width, target_height, upscale
+            )
+        
+        elif mode == 'fill':
+            # Fill bounds, crop if necessary
+            resized = ImageProcessor._resize_fill(
+                img, target_width, target_height
+            )
+        
+        elif mode == 'stretch':
+            # Stretch to exact dimensions
+            if not target_width:
+                target_width = img.width
+            if not target_height:
+                target_height = img.height
+            resized = ImageProcessor._lanczos_resize(img, (target_width, target_height))
+        
+        elif mode == 'thumbnail':
+            # Thumbnail mode (maintain aspect, no upscale)
+            if not target_width:
+                target_width = img.width
+            if not target_height:
+                target_height = img.height
+            resized = ImageProcessor._resize_maintain_aspect(img, target_width, target_height)
+        
+        else:
+            raise ValueError(f"Invalid resize mode: {mode}")
+        
+        output_format = options.get('format', img.format)
+        
+        # Convert RGBA to RGB if saving as JPEG
+        if output_format == 'JPEG' and resized.mode in ('RGBA', 'LA', 'P'):
+            resized = ImageProcessor._flatten_to_rgb(resized)
+        
+        return resized
+    
     @staticmethod
     def resize_image_advanced(
         input_file: Path,
@@ -465,76 +881,506 @@ class ImageProcessor:
             - strip_metadata: bool
             - quality: int
             - format: str
+            - draft: bool (reduced-size JPEG decode, default: True)
         """
         options = options or {}
         
         try:
+            vips_format = ImageProcessor._vips_format(
+                input_file, options.get('format', 'JPEG'), options, ('auto_enhance',)
+            )
+            if vips_format:
+                return ImageProcessor._resize_vips(input_file, output_file, vips_format, options)
+            
             with Image.open(input_file) as img:
-                target_width = options.get('width')
-                target_height = options.get('height')
-                mode = options.get('mode', 'fit')
-                maintain_aspect = options.get('maintain_aspect', True)
-                
-                if not target_width and not target_height:
-                    raise ValueError("Must specify at least width or height")
-                
-                # Calculate dimensions based on mode
-                if mode == 'fit':
-                    resized = ImageProcessor._resize_fit(img, target_width, target_height, True)
-                elif mode == 'fill':
-                    if target_width and target_height:
-                        resized = ImageProcessor._resize_fill(img, target_width, target_height)
-                    else:
-                        resized = ImageProcessor._resize_fit(img, target_width, target_height, True)
-                elif mode == 'stretch' or mode == 'exact':
-                    if not target_width:
-                        target_width = img.width
-                    if not target_height:
-                        target_height = img.height
-                    resized = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
-                else:
-                    resized = ImageProcessor._resize_fit(img, target_width, target_height, True)
-                
-                # Apply enhancements
-                if options.get('auto_enhance'):
-                    resized = ImageOps.autocontrast(resized)
-                
-                if options.get('sharpen'):
-                    resized = resized.filter(ImageFilter.SHARPEN)
-                
-                # Convert for JPEG if needed
+                ImageProcessor._load(
+                    img, options, options.get('strip_metadata', True),
+                    options.get('width'), options.get('height')
+                )
+                resized = ImageProcessor.resize_image_advanced_img(img, options)
                 output_format = options.get('format', 'JPEG')
-                if output_format == 'JPEG' and resized.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', resized.size, (255, 255, 255))
-                    if resized.mode == 'P':
-                        resized = resized.convert('RGBA')
-                    background.paste(resized, mask=resized.split()[-1] if resized.mode == 'RGBA' else None)
-                    resized = background
-                
-                # Strip metadata if requested
-                if options.get('strip_metadata', True):
-                    data = list(resized.getdata())
-                    clean_img = Image.new(resized.mode, resized.size)
-                    clean_img.putdata(data)
-                    resized = clean_img
                 
                 # Save with DPI if requested
                 quality = options.get('quality', 90)
-                save_kwargs = {'quality': quality, 'optimize': True}
+                save_kwargs = ImageProcessor._save_kwargs(
+                    output_format, quality, options, progressive=False
+                )
                 
                 if options.get('set_dpi') and options.get('dpi'):
                     save_kwargs['dpi'] = (options['dpi'], options['dpi'])
                 
                 resized.save(output_file, format=output_format, **save_kwargs)
-                
-            return output_file
             
+            return output_file
+        
         except Exception as e:
             raise Exception(f"Advanced image resize failed: {str(e)}")
     
+    @staticmethod
+    def resize_image_advanced_img(img: Image.Image, options: Optional[Dict[str, Any]] = None) -> Image.Image:
+        """resize_image_advanced on an in-memory image: every step except the final encode"""
+        options = options or {}
+        
+        target_width = options.get('width')
+        target_height = options.get('height')
+        mode = options.get('mode', 'fit')
+        maintain_aspect = options.get('maintain_aspect', True)
+        
+        if not target_width and not target_height:
+            raise ValueError("Must specify at least width or height")
+        
+        ImageProcessor._apply_draft(img, target_width, target_height, options)
+        
+        # Calculate dimensions based on mode
+        if mode == 'fit':
+            resized = ImageProcessor._resize_fit(img, target_width, target_height, True)
+        elif mode == 'fill':
+            if target_width and target_height:
+                resized = ImageProcessor._resize_fill(img, target_width, target_height)
+            else:
+                resized = ImageProcessor._resize_fit(img, target_width, target_height, True)
+        elif mode == 'stretch' or mode == 'exact':
+            if not target_width:
+                target_width = img.width
+            if not target_height:
+                target_height = img.height
+            resized = ImageProcessor._lanczos_resize(img, (target_width, target_height))
+        else:
+            resized = ImageProcessor._resize_fit(img, target_width, target_height, True)
+        
+        # Apply enhancements
+        if options.get('auto_enhance'):
+            resized = ImageOps.autocontrast(resized)
+        
+        resized = ImageProcessor._apply_filters(resized, options.get('sharpen', False), False)
+        
+        # Convert for JPEG if needed
+        output_format = options.get('format', 'JPEG')
+        if output_format == 'JPEG' and resized.mode in ('RGBA', 'LA', 'P'):
+            resized = ImageProcessor._flatten_to_rgb(resized)
+        
+        # Strip metadata if requested
+        if options.get('strip_metadata', True):
+            resized = ImageProcessor._strip_metadata(resized)
+        
+        return resized
+    
+    @staticmethod
+    def _tone_lut(img: Image.Image, auto_enhance: bool, brightness: int, contrast: int) -> list:
+        """
+        Build one lookup table equivalent to autocontrast, then Brightness, then Contrast
+        
+        Each stage mirrors Pillow's own arithmetic (truncate and clamp to 8 bits), so
+        the result matches running them in sequence. Contrast pivots on the mean
+        luminance of the brightened image, which is derived from the histogram.
+        """
+        histogram = img.histogram()
+        bands = [histogram[i:i + 256] for i in range(0, len(histogram), 256)]
+        luts = []
+        
+        for hist in bands:
+            lut = list(range(256))
+            
+            if auto_enhance:
+                used = [v for v in range(256) if hist[v]]
+                lo, hi = used[0], used[-1]
+                if hi > lo:
+                    scale = 255.0 / (hi - lo)
+                    offset = -lo * scale
+                    lut = [max(0, min(255, int(v * scale + offset))) for v in lut]
+            
+            if brightness:
+                factor = 1 + brightness / 100
+                lut = [max(0, min(255, int(v * factor))) for v in lut]
+            
+            luts.append(lut)
+        
+        if contrast:
+            # ImageEnhance.Contrast blends towards the rounded mean of the L conversion
+            pixels = img.width * img.height
+            band_means = [
+                sum(count * lut[v] for v, count in enumerate(hist)) / pixels
+                for hist, lut in zip(bands, luts)
+            ]
+            weights = (0.299, 0.587, 0.114) if len(band_means) == 3 else (1.0,)
+            mean = int(sum(w * m for w, m in zip(weights, band_means)) + 0.5)
+            
+            factor = 1 + contrast / 100
+            luts = [
+                [max(0, min(255, int(mean + (v - mean) * factor))) for v in lut]
+                for lut in luts
+            ]
+        
+        return [v for lut in luts for v in lut]
+    
+    @staticmethod
+    def _apply_filters(img: Image.Image, sharpen: bool, denoise: bool) -> Image.Image:
+        """
+        Apply the SHARPEN and/or SMOOTH kernels
+        
+        With OpenCV installed, both run as filter2D calls on one numpy view of the
+        pixel buffer (vectorised uint8 kernels); otherwise Pillow filters each pass.
+        """
+        filters = [
+            (pil_filter, kernel)
+            for enabled, pil_filter, kernel in (
+                (sharpen, ImageFilter.SHARPEN, SHARPEN_KERNEL),
+                (denoise, ImageFilter.SMOOTH, SMOOTH_KERNEL)
+            )
+            if enabled
+        ]
+        if not filters:
+            return img
+        
+        if cv2 is None or img.mode not in ('L', 'RGB', 'RGBA'):
+            for pil_filter, _ in filters:
+                img = img.filter(pil_filter)
+            return img
+        
+        arr = np.asarray(img)
+        for _, (kernel, scale) in filters:
+            arr = cv2.filter2D(
+                arr, -1, np.array(kernel, dtype=np.float32) / scale, borderType=cv2.BORDER_REPLICATE
+            )
+        return Image.fromarray(arr)
+    
+    @staticmethod
+    def _flatten_to_rgb(img: Image.Image) -> Image.Image:
+        """
+        Flatten onto white for JPEG output, compositing only when alpha is actually used
+        
+        convert('RGB') alone drops alpha rather than compositing, so transparent
+        areas would keep whatever colour they hide. The alpha band is read in place
+        (extrema over all bands, the image itself as paste mask) instead of being
+        copied out with getchannel().
+        """
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        if img.mode not in ('RGBA', 'LA'):
+            return img.convert('RGB')
+        
+        if img.getextrema()[-1][0] == 255:
+            # Fully opaque: dropping the channel is enough
+            return img.convert('RGB')
+        
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img)
+        return background
+    
+    @staticmethod
+    def _strip_metadata(img: Image.Image) -> Image.Image:
+        """Copy of the image with empty info, leaving EXIF/ICC behind (the palette is kept)"""
+        clean = img.copy()
+        clean.info = {}
+        return clean
+    
+    @staticmethod
+    def _load(
+        img: Image.Image,
+        options: Dict[str, Any],
+        strip: bool,
+        target_width: Optional[int] = None,
+        target_height: Optional[int] = None
+    ) -> None:
+        """
+        Decode a freshly opened image up front
+        
+        Pillow closes the file as soon as a single-frame image is loaded, so the
+        descriptor isn't held through the processing chain. Any JPEG draft has to
+        be configured first. The EXIF orientation is always baked in (a plain
+        transpose), so crop and resize geometry refers to the image as viewers
+        show it; metadata that will be stripped is dropped right away.
+        """
+        ImageProcessor._apply_draft(img, target_width, target_height, options)
+        img.load()
+        if options.get('color_profile') == 'srgb':
+            ImageProcessor._convert_to_srgb(img)
+        ImageOps.exif_transpose(img, in_place=True)
+        if strip:
+            img.info.pop('exif', None)
+            img.info.pop('icc_profile', None)
+    
+    @staticmethod
+    def _convert_to_srgb(img: Image.Image) -> None:
+        """Convert pixels tagged with a non-sRGB ICC profile to sRGB in place, then drop the tag"""
+        icc = img.info.get('icc_profile')
+        if not icc or ImageCms is None or img.mode not in ('RGB', 'RGBA'):
+            return
+        
+        transform = ImageProcessor._srgb_transform(icc, img.mode)
+        if transform is not None:
+            ImageCms.applyTransform(img, transform, inPlace=True)
+            # Untagged pixels are read as sRGB
+            img.info.pop('icc_profile', None)
+    
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def _srgb_transform(icc: bytes, mode: str):
+        """
+        Build (once per worker) the transform from an embedded profile to sRGB
+        
+        Batches of camera or phone photos share a handful of profiles, and
+        building a LittleCMS transform costs more than applying it to a
+        thumbnail. None means no conversion is needed or possible.
+        """
+        try:
+            source = ImageCms.ImageCmsProfile(io.BytesIO(icc))
+            if 'sRGB' in ImageCms.getProfileDescription(source):
+                return None
+            return ImageCms.buildTransform(source, ImageCms.createProfile('sRGB'), mode, mode)
+        except (ImageCms.PyCMSError, OSError):
+            return None
+    
+    @staticmethod
+    def _apply_draft(
+        img: Image.Image,
+        target_width: Optional[int],
+        target_height: Optional[int],
+        options: Dict[str, Any]
+    ) -> None:
+        """
+        Configure a JPEG to decode at the smallest DCT scale still at least twice the target
+        
+        Must run before pixel access. The Lanczos resize that follows produces the
+        final dimensions; non-JPEG sources, upscales and one-sided stretches are
+        left untouched.
+        """
+        if img.format != 'JPEG' or not options.get('draft', ImageProcessor.JPEG_DRAFT):
+            return
+        if not target_width and not target_height:
+            return
+        # Stretch keeps the source size on an unspecified axis, which a draft would shrink
+        if options.get('mode') in ('stretch', 'exact') and not (target_width and target_height):
+            return
+        
+        if not target_width:
+            target_width = img.width * target_height / img.height
+        if not target_height:
+            target_height = img.height * target_width / img.width
+        
+        # Targets refer to the image after its EXIF rotation; the draft works on the stored frame
+        if img.getexif().get(ORIENTATION_TAG, 1) in ROTATED_ORIENTATIONS:
+            target_width, target_height = target_height, target_width
+        
+        img.draft(img.mode, (int(2 * target_width), int(2 * target_height)))
+    
+    @staticmethod
+    def _vips_format(
+        input_file: Path,
+        output_format: str,
+        options: Dict[str, Any],
+        unsupported: Tuple[str, ...]
+    ) -> Optional[str]:
+        """
+        Output format for the libvips path, or None to stay on PIL
+        
+        Only images of at least VIPS_MIN_PIXELS, saved as JPEG/PNG/WebP, without
+        options that need a whole-image pass (autocontrast, mean-pivot contrast)
+        qualify. Image.open only reads the header here.
+        """
+        if not USE_VIPS or pyvips is None:
+            return None
+        if any(options.get(key) for key in unsupported):
+            return None
+        
+        with Image.open(input_file) as img:
+            if img.width * img.height < VIPS_MIN_PIXELS:
+                return None
+            output_format = output_format or img.format
+        
+        return output_format if output_format in ('JPEG', 'PNG', 'WEBP') else None
+    
+    @staticmethod
+    def _resize_vips(input_file: Path, output_file: Path, output_format: str, options: Dict[str, Any]) -> Path:
+        """resize_image_advanced on the libvips path, mapping its modes onto thumbnail()"""
+        target_width = options.get('width')
+        target_height = options.get('height')
+        mode = options.get('mode', 'fit')
+        
+        if not target_width and not target_height:
+            raise ValueError("Must specify at least width or height")
+        
+        if mode == 'fill' and target_width and target_height:
+            thumbnail = (target_width, target_height, 'both', 'centre')
+        elif mode in ('stretch', 'exact'):
+            # thumbnail() autorotates, so the fallback size must be the rotated one
+            width, height = ImageProcessor._vips_autorotated_size(pyvips.Image.new_from_file(str(input_file)))
+            thumbnail = (target_width or width, target_height or height, 'force', None)
+        else:
+            thumbnail = (target_width, target_height, 'both', None)
+        
+        return ImageProcessor._process_vips(
+            input_file, output_file, output_format, options,
+            quality=options.get('quality', 90),
+            progressive=False,
+            thumbnail=thumbnail,
+            dpi=options.get('dpi') if options.get('set_dpi') else None
+        )
+    
+    @staticmethod
+    def _vips_orientation(image) -> int:
+        """EXIF orientation libvips read from the header (1 when absent)"""
+        return image.get('orientation') if image.get_typeof('orientation') else 1
+    
+    @staticmethod
+    def _vips_autorotated_size(image) -> Tuple[int, int]:
+        """Image size as it will be after autorotation, read from the header"""
+        if ImageProcessor._vips_orientation(image) in ROTATED_ORIENTATIONS:
+            return image.height, image.width
+        return image.width, image.height
+    
+    @staticmethod
+    def _process_vips(
+        input_file: Path,
+        output_file: Path,
+        output_format: str,
+        options: Dict[str, Any],
+        quality: int,
+        progressive: bool,
+        scale: float = 1.0,
+        thumbnail: Optional[Tuple[Optional[int], Optional[int], str, Optional[str]]] = None,
+        dpi: Optional[int] = None
+    ) -> Path:
+        """
+        Resize, enhance and save an image with libvips
+        
+        The input is read with sequential access, so the whole op graph runs in a
+        single streaming pass over horizontal strips. The EXIF orientation is
+        applied as on the PIL path; rotated inputs are read with random access,
+        since rotating needs the whole frame.
+        """
+        if thumbnail:
+            width, height, size, crop = thumbnail
+            kwargs = {'size': size}
+            if height:
+                kwargs['height'] = height
+            if crop:
+                kwargs['crop'] = crop
+            image = pyvips.Image.thumbnail(str(input_file), width or VIPS_UNBOUNDED, **kwargs)
+        else:
+            image = pyvips.Image.new_from_file(str(input_file), access='sequential')
+            if ImageProcessor._vips_orientation(image) != 1:
+                image = pyvips.Image.new_from_file(str(input_file)).autorot()
+            if scale != 1.0:
+                image = image.resize(scale, kernel='lanczos3')
+        
+        color_bands = image.bands - 1 if image.hasalpha() else image.bands
+        
+        if options.get('brightness', 0) != 0:
+            factor = 1 + options['brightness'] / 100
+            image = image.linear(
+                [factor] * color_bands + [1] * (image.bands - color_bands), [0] * image.bands
+            ).cast('uchar')
+        
+        for enabled, (kernel, kernel_scale) in (
+            (options.get('sharpen'), SHARPEN_KERNEL),
+            (options.get('denoise'), SMOOTH_KERNEL)
+        ):
+            if enabled:
+                mask = pyvips.Image.new_from_list(kernel, scale=kernel_scale)
+                image = image.conv(mask, precision='integer')
+        
+        if output_format == 'JPEG' and image.hasalpha():
+            image = image.flatten(background=[255] * color_bands)
+        
+        if dpi:
+            # libvips stores resolution in pixels per millimetre
+            image = image.copy(xres=dpi / 25.4, yres=dpi / 25.4)
+        
+        strip = options.get('strip_metadata', True)
+        if output_format == 'JPEG':
+            image.jpegsave(
+                str(output_file), Q=quality, strip=strip, interlace=progressive,
+                optimize_coding=options.get('optimize', False)
+            )
+        elif output_format == 'PNG':
+            image.pngsave(str(output_file), compression=9, strip=strip)
+        else:
+            image.webpsave(str(output_file), Q=quality, strip=strip, effort=4)
+        
+        return output_file
+    
+    @staticmethod
+    def _lanczos_resize(
+        img: Image.Image,
+        size: Tuple[int, int],
+        box: Optional[Tuple[float, float, float, float]] = None
+    ) -> Image.Image:
+        """
+        LANCZOS resize of img (or only its source region box), box-reducing by an
+        integer factor first when shrinking 4x or more
+        
+        Image.reduce() averages N x N blocks, which is area-correct and far cheaper
+        than convolving the full-resolution image; LANCZOS then covers the residue,
+        which is kept at REDUCE_GAP or more so the box filter's softness and
+        aliasing are resampled away (Pillow's reducing_gap=2.0 trade-off).
+        Pillow computes the LANCZOS coefficients once per axis and reuses them for
+        every row and band, so there is nothing worth caching across calls.
+        """
+        box = box or (0, 0, img.width, img.height)
+        factor = min((box[2] - box[0]) / max(1, size[0]), (box[3] - box[1]) / max(1, size[1])) / REDUCE_GAP
+        reduce_by = next((n for n in REDUCE_FACTORS if factor >= n), 1)
+        # reduce() has no palette or bilevel implementation
+        if reduce_by > 1 and img.mode not in ('1', 'P'):
+            # reduce() takes an integer box; the fractional remainder goes to resize()
+            int_box = (math.floor(box[0]), math.floor(box[1]), math.ceil(box[2]), math.ceil(box[3]))
+            img = img.reduce(reduce_by, int_box)
+            box = (
+                (box[0] - int_box[0]) / reduce_by, (box[1] - int_box[1]) / reduce_by,
+                (box[2] - int_box[0]) / reduce_by, (box[3] - int_box[1]) / reduce_by
+            )
+        
+        # Batch jobs already keep every core busy with one image per pool worker
+        workers = 1 if in_pool_worker() else min(os.cpu_count() or 1, size[1])
+        if size[0] * size[1] >= PARALLEL_RESIZE_PIXELS and workers > 1:
+            return ImageProcessor._resize_parallel(img, size, box, workers)
+        return img.resize(size, Image.Resampling.LANCZOS, box=box)
+    
+    @staticmethod
+    def _resize_parallel(
+        img: Image.Image,
+        size: Tuple[int, int],
+        box: Tuple[float, float, float, float],
+        workers: int
+    ) -> Image.Image:
+        """
+        LANCZOS resize split into horizontal output bands, one per thread
+        
+        Pillow releases the GIL while resampling, and resize(box=...) lets the
+        kernel read source rows outside the box, so each band comes out exactly
+        as it would from a single full resize. Alpha images are premultiplied
+        once here, as resize() would otherwise do for the whole image per band.
+        """
+        img.load()
+        premultiplied = {'RGBA': 'RGBa', 'LA': 'La'}.get(img.mode)
+        if premultiplied:
+            source_mode = img.mode
+            img = img.convert(premultiplied)
+        scale_y = (box[3] - box[1]) / size[1]
+        band_height = -(-size[1] // workers)
+        bands = [(y, min(y + band_height, size[1])) for y in range(0, size[1], band_height)]
+        
+        def resize_band(band: Tuple[int, int]) -> Image.Image:
+            y0, y1 = band
+            band_box = (box[0], box[1] + y0 * scale_y, box[2], box[1] + y1 * scale_y)
+            return img.resize((size[0], y1 - y0), Image.Resampling.LANCZOS, box=band_box)
+        
+        with ThreadPoolExecutor(max_workers=len(bands)) as executor:
+            parts = list(executor.map(resize_band, bands))
+        
+        resized = Image.new(parts[0].mode, size)
+        if parts[0].mode == 'P':
+            resized.putpalette(parts[0].getpalette())
+        for (y0, _), part in zip(bands, parts):
+            resized.paste(part, (0, y0))
+        
+        if premultiplied:
+            resized = resized.convert(source_mode)
+        return resized
+    
     @staticmethod
     def _resize_fit(img: Image.Image, target_width: Optional[int], target_height: Optional[int], upscale: bool) -> Image.Image:
-        """Resize to fit within bounds"""
+        """Resize to fit within bounds, sized like ImageOps.contain"""
         if not target_width:
             target_width = int(img.width * (target_height / img.height))
         if not target_height:
@@ -544,63 +1390,96 @@ class ImageProcessor:
         if not upscale and (target_width > img.width or target_height > img.height):
             return img
         
-        img.thumbnail((target_width, target_height), Image.Resampling.LANCZOS)
-        return img
-    
-    @staticmethod
-    def _resize_fill(img: Image.Image, target_width: int, target_height: int) -> Image.Image:
-        """Resize to fill bounds, cropping if necessary"""
         img_ratio = img.width / img.height
         target_ratio = target_width / target_height
-        
         if img_ratio > target_ratio:
-            # Image is wider, scale by height
-            new_height = target_height
-            new_width = int(new_height * img_ratio)
+            size = (target_width, max(1, round(img.height / img.width * target_width)))
+        elif img_ratio < target_ratio:
+            size = (max(1, round(img.width / img.height * target_height)), target_height)
         else:
-            # Image is taller, scale by width
-            new_width = target_width
-            new_height = int(new_width / img_ratio)
+            size = (target_width, target_height)
         
-        resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        if size == img.size:
+            return img
+        return ImageProcessor._lanczos_resize(img, size)
+    
+    @staticmethod
+    def _resize_fill(img: Image.Image, target_width: int, target_height: int) -> Image.Image:
+        """Resize to fill bounds, cropping if necessary"""
+        # Cover scale; only the centred source region that survives the crop is resampled
+        scale = max(target_width / img.width, target_height / img.height)
+        src_width = target_width / scale
+        src_height = target_height / scale
+        left = (img.width - src_width) / 2
+        top = (img.height - src_height) / 2
         
-        # Crop to target size
-        left = (new_width - target_width) // 2
-        top = (new_height - target_height) // 2
-        return resized.crop((left, top, left + target_width, top + target_height))
+        return ImageProcessor._lanczos_resize(
+            img, (target_width, target_height), box=(left, top, left + src_width, top + src_height)
+        )
     
     @staticmethod
     def _resize_maintain_aspect(img: Image.Image, max_width: Optional[int], max_height: Optional[int]) -> Image.Image:
-        """Resize maintaining aspect ratio"""
-        if max_width and img.width > max_width:
-            ratio = max_width / img.width
-            new_size = (max_width, int(img.height * ratio))
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
+        """Resize maintaining aspect ratio, in one pass at the most limiting ratio"""
+        ratio = 1.0
+        if max_width:
+            ratio = min(ratio, max_width / img.width)
+        if max_height:
+            ratio = min(ratio, max_height / img.height)
         
-        if max_height and img.height > max_height:
-            ratio = max_height / img.height
-            new_size = (int(img.width * ratio), max_height)
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
+        if ratio < 1.0:
+            new_size = (max(1, round(img.width * ratio)), max(1, round(img.height * ratio)))
+            img = ImageProcessor._lanczos_resize(img, new_size)
         
         return img
     
     @staticmethod
+    @lru_cache(maxsize=32)
     def _parse_aspect_ratio(ratio_str: str) -> float:
         """Parse aspect ratio string like '16:9' to float"""
-        parts = ratio_str.split(':')
-        if len(parts) != 2:
+        width, _, height = ratio_str.partition(':')
+        if not height or ':' in height:
             raise ValueError(f"Invalid aspect ratio format: {ratio_str}")
-        return float(parts[0]) / float(parts[1])
+        return float(width) / float(height)
+    
+    @staticmethod
+    def process_batch(
+        jobs: List[Tuple[str, Path, Path, Optional[Dict[str, Any]]]],
+        workers: Optional[int] = None
+    ) -> List[Union[Path, Exception]]:
+        """
+        Run independent image operations across the shared process pool
+        
+        Each job is (method name, input_file, output_file, options). Results come
+        back in job order: the output path, or the exception that job raised.
+        Blocking; call it via asyncio.to_thread from request handlers.
+        """
+        workers = min(workers or PROCESS_POOL_WORKERS, len(jobs))
+        # Daemonic processes (e.g. Celery prefork children) are not allowed to start workers
+        if workers <= 1 or multiprocessing.current_process().daemon:
+            return [_dispatch(job) for job in jobs]
+        
+        return map_in_pool(_dispatch, jobs)
     
     @staticmethod
     def get_image_info(image_path: Path) -> Dict[str, Any]:
-        """Get image information"""
-        with Image.open(image_path) as img:
-            info = {
-                'width': img.width,
-                'height': img.height,
-                'format': img.format,
-                'mode': img.mode,
-                'size_bytes': image_path.stat().st_size
-            }
+        """
+        Get image information
+        
+        PNG, JPEG and WebP dimensions are parsed from the file header; other
+        formats go through Image.open, which also stops at the header.
+        """
+        probe = _probe_header(image_path)
+        if probe is not None:
+            image_format, width, height, mode = probe
+        else:
+            with Image.open(image_path) as img:
+                image_format, width, height, mode = img.format, img.width, img.height, img.mode
+        
+        info = {
+            'width': width,
+            'height': height,
+            'format': image_format,
+            'mode': mode,
+            'size_bytes': image_path.stat().st_size
+        }
         return info
@@ -4,16 +4,285 @@ Convert Office documents using LibreOffice/unoconv or online APIs
 """
 import subprocess
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterator
 import tempfile
 import os
+import time
+import atexit
+import shutil
+import logging
+import threading
+import xmlrpc.client
+from functools import lru_cache
+
+# UNO bridge ships with LibreOffice (python3-uno); without it every conversion spawns soffice
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+    from com.sun.star.connection import NoConnectException
+    from com.sun.star.lang import DisposedException
+except ImportError:
+    uno = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+from .pdf_extract import open_pdf
+
+logger = logging.getLogger(__name__)
+
+USE_OFFICE_DAEMON = os.getenv("USE_OFFICE_DAEMON", "true").lower() == "true"
+
+# unoserver sidecar (XML-RPC, e.g. http://localhost:2003); takes precedence over the local daemon
+UNOSERVER_URL = os.getenv("UNOSERVER_URL", "")
+
+# Export filters per document family when converting through the daemon
+PDF_EXPORT_FILTERS = {
+    'writer': 'writer_pdf_Export',
+    'calc': 'calc_pdf_Export',
+    'impress': 'impress_pdf_Export'
+}
+
+WORD_EXPORT_FILTERS = {
+    'docx': 'MS Word 2007 XML',
+    'doc': 'MS Word 97'
+}
+
+
+class OfficeDaemon:
+    """
+    Long-lived headless soffice driven over the UNO bridge
+    
+    Starting soffice costs seconds per document; the daemon is started once per
+    process and reused for every conversion. Each process gets its own pipe name
+    and user profile, so Celery/uvicorn workers never share an instance. Calls
+    are serialised with a lock because the UNO bridge is not thread-safe.
+    """
+    
+    STARTUP_TIMEOUT = 30
+    # Same ceiling the one-shot soffice command had
+    CONVERT_TIMEOUT = 300
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._desktop = None
+        self._pid = None
+        self._profile: Optional[Path] = None
+        atexit.register(self.shutdown)
+    
+    def available(self) -> bool:
+        """True when conversions can go through the daemon"""
+        return USE_OFFICE_DAEMON and uno is not None and shutil.which('soffice') is not None
+    
+    def convert(
+        self,
+        input_file: Path,
+        output_file: Path,
+        export_filter: str,
+        filter_data: Optional[Dict[str, Any]] = None,
+        import_filter: Optional[str] = None
+    ) -> Path:
+        """Load input_file in the daemon and store it to output_file with export_filter"""
+        load_props = {'Hidden': True}
+        if import_filter:
+            load_props['FilterName'] = import_filter
+        
+        store_props = {'FilterName': export_filter, 'Overwrite': True}
+        if filter_data:
+            store_props['FilterData'] = uno.Any(
+                "[]com.sun.star.beans.PropertyValue", OfficeDaemon._props(filter_data)
+            )
+        
+        input_url = uno.systemPathToFileUrl(str(Path(input_file).resolve()))
+        
+        # Conversions queue behind the lock; waiting counts against the same deadline
+        deadline = time.monotonic() + OfficeDaemon.CONVERT_TIMEOUT
+        if not self._lock.acquire(timeout=OfficeDaemon.CONVERT_TIMEOUT):
+            raise subprocess.TimeoutExpired('soffice', OfficeDaemon.CONVERT_TIMEOUT)
+        
+        # UNO calls can't be interrupted, so a hung document is ended by killing soffice
+        timed_out = threading.Event()
+        watchdog = threading.Timer(max(0.0, deadline - time.monotonic()), self._kill, args=(timed_out,))
+        try:
+            watchdog.start()
+            try:
+                doc = self._connect().loadComponentFromURL(input_url, "_blank", 0, OfficeDaemon._props(load_props))
+            except DisposedException:
+                if timed_out.is_set():
+                    raise
+                # The bridge dies with soffice; start a fresh instance once
+                self._stop()
+                doc = self._connect().loadComponentFromURL(input_url, "_blank", 0, OfficeDaemon._props(load_props))
+            
+            if doc is None:
+                raise Exception("LibreOffice could not open the document")
+            
+            try:
+                doc.storeToURL(
+                    uno.systemPathToFileUrl(str(Path(output_file).resolve())),
+                    OfficeDaemon._props(store_props)
+                )
+            finally:
+                doc.close(True)
+        except Exception:
+            if timed_out.is_set():
+                self._stop()
+                raise subprocess.TimeoutExpired('soffice', OfficeDaemon.CONVERT_TIMEOUT) from None
+            raise
+        finally:
+            watchdog.cancel()
+            self._lock.release()
+        
+        return output_file
+    
+    def shutdown(self):
+        """Terminate the soffice instance owned by this process"""
+        with self._lock:
+            self._stop()
+    
+    @staticmethod
+    def _props(values: Dict[str, Any]) -> tuple:
+        props = []
+        for name, value in values.items():
+            prop = PropertyValue()
+            prop.Name = name
+            prop.Value = value
+            props.append(prop)
+        return tuple(props)
+    
+    def _kill(self, timed_out: threading.Event):
+        """Watchdog callback: end a conversion that overran CONVERT_TIMEOUT"""
+        timed_out.set()
+        process = self._process
+        if process is not None and self._pid == os.getpid():
+            logger.warning(f"⚠️ LibreOffice conversion exceeded {OfficeDaemon.CONVERT_TIMEOUT}s; killing soffice")
+            process.kill()
+    
+    def _connect(self):
+        """Return the Desktop of this process's soffice, starting it if needed"""
+        # A forked worker inherits the parent's handles but not its soffice
+        if self._pid != os.getpid():
+            self._stop()
+            self._pid = os.getpid()
+        
+        if self._desktop is not None and self._process.poll() is None:
+            return self._desktop
+        
+        self._stop()
+        pipe_name = f"halo_soffice_{os.getpid()}"
+        self._profile = Path(tempfile.gettempdir()) / f"halo_soffice_profile_{os.getpid()}"
+        self._process = subprocess.Popen(
+            [
+                'soffice', '--headless', '--invisible', '--nologo', '--norestore', '--nodefault',
+                f'-env:UserInstallation={self._profile.as_uri()}',
+                f'--accept=pipe,name={pipe_name};urp;StarOffice.ComponentContext'
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        deadline = time.monotonic() + OfficeDaemon.STARTUP_TIMEOUT
+        while True:
+            try:
+                context = resolver.resolve(f"uno:pipe,name={pipe_name};urp;StarOffice.ComponentContext")
+                break
+            except NoConnectException:
+                if self._process.poll() is not None or time.monotonic() > deadline:
+                    self._stop()
+                    raise Exception("LibreOffice daemon failed to start")
+                time.sleep(0.2)
+        
+        self._desktop = context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", context
+        )
+        logger.info(f"📄 LibreOffice daemon started (pid {self._process.pid})")
+        return self._desktop
+    
+    def _stop(self):
+        # Only the process that started soffice may stop it
+        if self._pid == os.getpid():
+            if self._desktop is not None:
+                try:
+                    self._desktop.terminate()
+                except Exception:
+                    pass
+            
+            if self._process is not None:
+                try:
+                    self._process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+            
+            if self._profile is not None:
+                shutil.rmtree(self._profile, ignore_errors=True)
+        
+        self._desktop = None
+        self._process = None
+        self._profile = None
+
+
+office_daemon = OfficeDaemon()
+
+
+class _TimeoutTransport(xmlrpc.client.Transport):
+    """XML-RPC transport with a socket timeout, so a hung sidecar can't block a worker forever"""
+    
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.timeout = timeout
+    
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.timeout
+        return connection
+
+
+def _convert_unoserver(
+    input_file: Path,
+    output_file: Path,
+    convert_to: str,
+    filter_name: str,
+    filter_data: Optional[Dict[str, Any]] = None,
+    import_filter: Optional[str] = None
+) -> Path:
+    """
+    Convert through an unoserver sidecar, which keeps soffice warm and restarts it on crashes
+    
+    The document goes over the wire as bytes and the result comes back the same
+    way, so nothing depends on the sidecar sharing this container's filesystem.
+    """
+    filter_options = [
+        f"{name}={str(value).lower() if isinstance(value, bool) else value}"
+        for name, value in (filter_data or {}).items()
+    ]
+    server = xmlrpc.client.ServerProxy(UNOSERVER_URL, transport=_TimeoutTransport(300), allow_none=True)
+    result = server.convert(
+        None, xmlrpc.client.Binary(Path(input_file).read_bytes()), None,
+        convert_to, filter_name, filter_options, True, import_filter
+    )
+    Path(output_file).write_bytes(result.data)
+    return output_file
+
 
 class OfficeProcessor:
     """Office document conversion operations"""
     
     @staticmethod
+    @lru_cache(maxsize=1)
     def check_libreoffice() -> bool:
-        """Check if LibreOffice is installed"""
+        """Check if LibreOffice is installed (probed once per process: soffice --version is slow)"""
         try:
             result = subprocess.run(
                 ['soffice', '--version'],
@@ -87,6 +356,19 @@ class OfficeProcessor:
         
         # Use LibreOffice for PDF to Word conversion
         try:
+            if UNOSERVER_URL:
+                return _convert_unoserver(
+                    input_file, output_file, output_format,
+                    WORD_EXPORT_FILTERS.get(output_format, WORD_EXPORT_FILTERS['docx']),
+                    import_filter='writer_pdf_import'
+                )
+            if office_daemon.available():
+                return office_daemon.convert(
+                    input_file, output_file,
+                    WORD_EXPORT_FILTERS.get(output_format, WORD_EXPORT_FILTERS['docx']),
+                    import_filter='writer_pdf_import'
+                )
+            
             cmd = [
                 'soffice',
                 '--headless',
@@ -106,7 +388,7 @@ class OfficeProcessor:
                 temp_output.rename(output_file)
             
             return output_file
-            
+        
         except FileNotFoundError:
             raise Exception("LibreOffice not found. Please install LibreOffice.")
         except Exception as e:
@@ -128,28 +410,66 @@ class OfficeProcessor:
         output_format = options.get('format', 'xlsx')
         
         try:
-            # Import here to make it optional
-            import tabula
-            
-            # Extract tables from PDF
-            tables = tabula.read_pdf(str(input_file), pages='all', multiple_tables=True)
+            if xlsxwriter is not None:
+                table_count = OfficeProcessor._stream_tables_xlsx(input_file, output_file)
+            elif pd is not None:
+                # The first row of each table becomes its header
+                tables = [
+                    pd.DataFrame(rows[1:], columns=rows[0])
+                    for rows in OfficeProcessor._iter_pdf_tables(input_file)
+                ]
+                table_count = len(tables)
+                
+                if tables:
+                    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+                        for idx, table in enumerate(tables):
+                            sheet_name = f'Table_{idx + 1}'
+                            table.to_excel(writer, sheet_name=sheet_name, index=False)
+            else:
+                raise ImportError("xlsxwriter")
             
-            if not tables:
+            if not table_count:
                 raise Exception("No tables found in PDF")
             
-            # Write to Excel
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                for idx, table in enumerate(tables):
-                    sheet_name = f'Table_{idx + 1}'
-                    table.to_excel(writer, sheet_name=sheet_name, index=False)
-            
             return output_file
-            
+        
         except ImportError:
-            raise Exception("tabula-py not installed. Install with: pip install tabula-py")
+            raise Exception("xlsxwriter not installed. Install with: pip install xlsxwriter")
         except Exception as e:
             raise Exception(f"PDF to Excel conversion failed: {str(e)}")
     
+    @staticmethod
+    def _iter_pdf_tables(input_file: Path) -> Iterator[List[List[Optional[str]]]]:
+        """Yield each table in a PDF as a list of rows, one page in memory at a time"""
+        with open_pdf(input_file) as pdf:
+            for page in pdf.pages:
+                for rows in page.extract_tables():
+                    if rows:
+                        yield rows
+                page.flush_cache()
+    
+    @staticmethod
+    def _stream_tables_xlsx(input_file: Path, output_file: Path) -> int:
+        """
+        Write every PDF table to its own sheet as it is extracted
+        
+        constant_memory mode flushes each row to disk once the next one starts,
+        so memory stays at one row instead of the whole workbook. Rows must be
+        written in order, which is why this bypasses DataFrame.to_excel (it
+        writes column by column).
+        """
+        workbook = xlsxwriter.Workbook(str(output_file), {'constant_memory': True})
+        table_count = 0
+        try:
+            for rows in OfficeProcessor._iter_pdf_tables(input_file):
+                table_count += 1
+                worksheet = workbook.add_worksheet(f'Table_{table_count}')
+                for row_idx, row in enumerate(rows):
+                    worksheet.write_row(row_idx, 0, row)
+        finally:
+            workbook.close()
+        return table_count
+    
     @staticmethod
     def _convert_to_pdf(
         input_file: Path,
@@ -161,55 +481,61 @@ class OfficeProcessor:
         options = options or {}
         
         try:
-            # Build LibreOffice command
-            cmd = [
-                'soffice',
-                '--headless',
-                '--convert-to', 'pdf',
-                '--outdir', str(output_file.parent),
-                str(input_file)
-            ]
-            
             # Add filter options
-            filter_options = []
+            filter_data = {}
             
             if filter_type == 'writer':
                 # Word options
                 if options.get('preserve_links', True):
-                    filter_options.append('ExportLinks=1')
+                    filter_data['ExportLinks'] = True
                 if options.get('preserve_bookmarks', True):
-                    filter_options.append('ExportBookmarks=1')
+                    filter_data['ExportBookmarks'] = True
             
             elif filter_type == 'calc':
                 # Excel options
                 if options.get('landscape', False):
-                    filter_options.append('PageOrientation=1')
+                    filter_data['PageOrientation'] = 1
             
             elif filter_type == 'impress':
                 # PowerPoint options
                 quality = options.get('quality', 'high')
-                quality_map = {'high': '90', 'medium': '75', 'low': '50'}
-                filter_options.append(f'Quality={quality_map.get(quality, "90")}')
+                quality_map = {'high': 90, 'medium': 75, 'low': 50}
+                filter_data['Quality'] = quality_map.get(quality, 90)
             
-            if filter_options:
-                cmd[3] = f'pdf:writer_pdf_Export:{";".join(filter_options)}'
-            
-            # Execute conversion
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            
-            if result.returncode != 0:
-                raise Exception(f"LibreOffice conversion failed: {result.stderr}")
-            
-            # LibreOffice creates file with same name but .pdf extension
-            temp_output = output_file.parent / f"{input_file.stem}.pdf"
-            if temp_output.exists() and temp_output != output_file:
-                temp_output.rename(output_file)
+            if UNOSERVER_URL:
+                _convert_unoserver(input_file, output_file, 'pdf', PDF_EXPORT_FILTERS[filter_type], filter_data)
+            elif office_daemon.available():
+                office_daemon.convert(input_file, output_file, PDF_EXPORT_FILTERS[filter_type], filter_data)
+            else:
+                # Build LibreOffice command
+                cmd = [
+                    'soffice',
+                    '--headless',
+                    '--convert-to', 'pdf',
+                    '--outdir', str(output_file.parent),
+                    str(input_file)
+                ]
+                
+                if filter_data:
+                    filter_options = ";".join(f"{name}={int(value)}" for name, value in filter_data.items())
+                    cmd[3] = f'pdf:writer_pdf_Export:{filter_options}'
+                
+                # Execute conversion
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+                
+                if result.returncode != 0:
+                    raise Exception(f"LibreOffice conversion failed: {result.stderr}")
+                
+                # LibreOffice creates file with same name but .pdf extension
+                temp_output = output_file.parent / f"{input_file.stem}.pdf"
+                if temp_output.exists() and temp_output != output_file:
+                    temp_output.rename(output_file)
             
             if not output_file.exists():
                 raise Exception("Conversion completed but output file not found")
             
             return output_file
-            
+        
         except FileNotFoundError:
             raise Exception("LibreOffice not found. Please install LibreOffice (soffice command).")
         except subprocess.TimeoutExpired:
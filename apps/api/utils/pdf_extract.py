@@ -0,0 +1,184 @@
+"""
+PDF Text Extraction Utility
+Page-by-page text extraction with bounded memory for large documents
+
+Plain-text extraction uses PDFium (pypdfium2) when it is installed; pdfplumber
+is used for callers that need its layout-aware output and as the fallback.
+"""
+import gc
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Optional, Union
+from pathlib import Path
+import pdfplumber
+from pdfminer.pdffont import PDFFont
+from pdfminer.pdfinterp import PDFResourceManager
+from pdfminer.psparser import PSLiteral
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+# Force a collection every N pages so pdfminer object graphs don't pile up
+GC_EVERY_PAGES = 50
+
+# Most fonts kept in the process-wide cache; least recently used ones are evicted
+SHARED_FONTS_MAX = 256
+
+# Process-wide LRU of fonts that are fully described by their font dictionary
+_shared_fonts: "OrderedDict[tuple, PDFFont]" = OrderedDict()
+_shared_fonts_lock = threading.Lock()
+
+
+def _font_key(spec: dict) -> Optional[tuple]:
+    """
+    Content key for a font that can safely be shared between documents
+    
+    Only fonts whose dictionary holds direct names and numbers qualify (e.g. the
+    non-embedded standard 14 fonts generated PDFs lean on). Anything pointing at
+    an embedded font program or ToUnicode stream is document-specific.
+    """
+    key = []
+    for name, value in sorted(spec.items()):
+        if isinstance(value, PSLiteral):
+            value = ("/", value.name)
+        elif isinstance(value, list) and all(isinstance(v, (int, float)) for v in value):
+            value = tuple(value)
+        elif not isinstance(value, (int, float, str, bytes)):
+            return None
+        key.append((name, value))
+    return tuple(key)
+
+
+class SharedFontResourceManager(PDFResourceManager):
+    """
+    PDFResourceManager that reuses parsed fonts across documents
+    
+    pdfminer keys its own font cache by object id, which is only unique within
+    one file, so cross-document reuse goes through a content-keyed cache instead.
+    """
+    
+    def get_font(self, objid: object, spec: dict) -> PDFFont:
+        key = _font_key(spec)
+        if key is None:
+            return super().get_font(objid, spec)
+        
+        with _shared_fonts_lock:
+            font = _shared_fonts.get(key)
+            if font is not None:
+                _shared_fonts.move_to_end(key)
+                return font
+        
+        font = super().get_font(None, spec)
+        with _shared_fonts_lock:
+            _shared_fonts[key] = font
+            if len(_shared_fonts) > SHARED_FONTS_MAX:
+                _shared_fonts.popitem(last=False)
+        return font
+
+
+def reset_shared_fonts() -> None:
+    """Start a worker process with an empty font cache"""
+    with _shared_fonts_lock:
+        _shared_fonts.clear()
+
+
+def open_pdf(stream: Union[str, Path, BinaryIO], **kwargs) -> pdfplumber.PDF:
+    """pdfplumber.open() with the cross-document font cache installed"""
+    pdf = pdfplumber.open(stream, **kwargs)
+    pdf.rsrcmgr = SharedFontResourceManager(caching=True)
+    return pdf
+
+
+def _release_page(page: pdfplumber.page.Page) -> None:
+    """Drop pdfplumber's per-page caches so parsed layout objects can be freed"""
+    page.flush_cache()
+    get_textmap = getattr(page, "get_textmap", None)
+    if hasattr(get_textmap, "cache_clear"):
+        get_textmap.cache_clear()
+
+
+def _format_page(page_num: int, text: str, page_header: bool) -> str:
+    """Format one page's text the way extract_all_text joins it"""
+    return f"\n\n--- Page {page_num} ---\n\n{text}" if page_header else text + "\n"
+
+
+def extract_all_text(
+    stream: Union[str, Path, BinaryIO],
+    page_header: bool = False,
+    max_chars: Optional[int] = None,
+    precise: bool = False
+) -> str:
+    """
+    Extract text from every page of a PDF
+    
+    Args:
+        stream: Path or seekable binary file
+        page_header: Prefix each page with a "--- Page N ---" marker
+        max_chars: Stop after the page that brings the text to this length
+        precise: Use pdfplumber's layout-aware extraction instead of PDFium
+    
+    Returns:
+        Extracted text; pages without text are skipped
+    """
+    if precise or pypdfium2 is None:
+        return extract_text_plumber(stream, page_header, max_chars)
+    return extract_text_fast(stream, page_header, max_chars)
+
+
+def extract_text_fast(
+    stream: Union[str, Path, BinaryIO],
+    page_header: bool = False,
+    max_chars: Optional[int] = None
+) -> str:
+    """Extract text with PDFium, which skips pdfminer's layout analysis entirely"""
+    parts = []
+    total_chars = 0
+    
+    pdf = pypdfium2.PdfDocument(stream)
+    try:
+        for index in range(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                # PDFium separates lines with CRLF
+                text = textpage.get_text_range().replace("\r\n", "\n").strip()
+            finally:
+                textpage.close()
+                page.close()
+            
+            if text:
+                parts.append(_format_page(index + 1, text, page_header))
+                total_chars += len(parts[-1])
+            if max_chars is not None and total_chars >= max_chars:
+                break
+    finally:
+        pdf.close()
+    
+    return "".join(parts)
+
+
+def extract_text_plumber(
+    stream: Union[str, Path, BinaryIO],
+    page_header: bool = False,
+    max_chars: Optional[int] = None
+) -> str:
+    """Extract text with pdfplumber, one page at a time"""
+    parts = []
+    total_chars = 0
+    
+    with open_pdf(stream) as pdf:
+        for page_num, page in enumerate(pdf.pages, 1):
+            text = page.extract_text()
+            if text:
+                parts.append(_format_page(page_num, text, page_header))
+                total_chars += len(parts[-1])
+            
+            _release_page(page)
+            if max_chars is not None and total_chars >= max_chars:
+                break
+            if page_num % GC_EVERY_PAGES == 0:
+                gc.collect()
+    
+    return "".join(parts)
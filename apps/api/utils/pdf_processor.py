@@ -3,16 +3,252 @@ PDF Processing Utility
 Advanced PDF operations using PyPDF2, pypdf, and pikepdf
 """
 import io
+import asyncio
 import os
+import time
+import uuid
+import queue
+import atexit
+import shutil
+import logging
+import zlib
+import hashlib
+import threading
 import subprocess
+import multiprocessing
+from collections import deque
+from contextlib import ExitStack
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional, Tuple, Dict, Any
-from PyPDF2 import PdfReader, PdfWriter, PdfMerger
+from PyPDF2 import PdfReader
 import pypdf
 import pikepdf
 from PIL import Image
 import img2pdf
 
+from .process_runner import run_with_stderr_tail, STDERR_TAIL_LINES
+from .process_pool import map_in_pool, PROCESS_POOL_WORKERS
+from .temp_manager import temp_manager
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+logger = logging.getLogger(__name__)
+
+# Keep Ghostscript running between compress_pdf calls instead of booting it per file
+USE_GS_SERVER = os.getenv("USE_GS_SERVER", "false").lower() == "true"
+
+# Below this many output files, re-opening the PDF in worker processes costs more than it saves
+SPLIT_PARALLEL_MIN_FILES = 8
+SPLIT_MAX_WORKERS = 8
+
+# Rendering and encoding a page is CPU-bound; fan out from this many pages
+RENDER_PARALLEL_MIN_PAGES = 4
+RENDER_MAX_WORKERS = 4
+
+
+def _write_page_ranges(input_path: str, jobs: List[Tuple[Path, List[int]]]) -> List[Path]:
+    """Write each (output_file, page indices) job from one opened source; runs in a worker process"""
+    output_files = []
+    
+    with pikepdf.open(input_path) as src:
+        for output_file, page_indices in jobs:
+            # pikepdf copies pages by object reference; closing dst frees them before the next job
+            with pikepdf.Pdf.new() as dst:
+                dst.pages.extend(src.pages[page_num] for page_num in page_indices)
+                dst.save(output_file, object_stream_mode=pikepdf.ObjectStreamMode.generate)
+            output_files.append(output_file)
+    
+    return output_files
+
+
+def _worker_count(job_count: int, min_jobs: int, max_workers: int) -> int:
+    """Number of processes worth starting for job_count independent jobs"""
+    # Daemonic processes (e.g. Celery prefork children) are not allowed to fork
+    if job_count < min_jobs or multiprocessing.current_process().daemon:
+        return 1
+    return max(1, min(PROCESS_POOL_WORKERS, max_workers, job_count))
+
+
+def _chunks(items: list, workers: int) -> List[list]:
+    """Split items into at most `workers` contiguous chunks, keeping their order"""
+    chunk_size = -(-len(items) // workers)
+    return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+
+def _save_page_image(image: Image.Image, output_file: Path, image_format: str, quality: int) -> None:
+    """Encode one rendered page in the requested format"""
+    if image_format == 'jpg':
+        image.save(output_file, 'JPEG', quality=quality, optimize=True)
+    elif image_format == 'webp':
+        image.save(output_file, 'WEBP', quality=quality)
+    else:
+        image.save(output_file, 'PNG', optimize=True)
+
+
+def _render_pages(
+    input_path: str,
+    page_indices: List[int],
+    output_dir: Path,
+    image_format: str,
+    dpi: int,
+    quality: int,
+    grayscale: bool
+) -> List[Path]:
+    """Render pages (0-based) with PDFium in-process, releasing each bitmap before the next page"""
+    output_files = []
+    pdf = pypdfium2.PdfDocument(input_path)
+    try:
+        for page_num in page_indices:
+            page = pdf[page_num]
+            try:
+                bitmap = page.render(scale=dpi / 72, grayscale=grayscale)
+                image = bitmap.to_pil()
+            finally:
+                page.close()
+            
+            output_file = output_dir / f"page_{page_num + 1}.{image_format}"
+            _save_page_image(image, output_file, image_format, quality)
+            output_files.append(output_file)
+    finally:
+        pdf.close()
+    
+    return output_files
+
+
+def _ps_string(value: Path) -> str:
+    """Quote a path as a PostScript string literal"""
+    escaped = str(value).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return f"({escaped})"
+
+
+class GhostscriptServer:
+    """
+    Long-lived Ghostscript processes fed PostScript over stdin
+    
+    Booting gs and loading its font cache costs a few hundred ms per file; the
+    server keeps one pdfwrite instance per argument set (quality, grayscale,
+    annotations) and only switches OutputFile between jobs. File access stays
+    under -dSAFER, limited to the temp dir, so only jobs whose input and output
+    both live there are accepted. Jobs are serialised with a lock; any failure
+    stops the instance so the next job starts from a clean interpreter.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers: Dict[tuple, Tuple[subprocess.Popen, "queue.Queue[str]"]] = {}
+        self._pid = None
+        self._idle_file = temp_manager.temp_dir / f"halo_gs_idle_{os.getpid()}.pdf"
+        atexit.register(self.shutdown)
+    
+    def accepts(self, input_file: Path, output_file: Path) -> bool:
+        """True when this job can go through the server"""
+        if not USE_GS_SERVER or shutil.which('gs') is None:
+            return False
+        root = temp_manager.temp_dir.resolve()
+        return all(root in Path(p).resolve().parents for p in (input_file, output_file))
+    
+    def run(self, device_args: List[str], input_file: Path, output_file: Path, timeout: float) -> None:
+        """Convert input_file to output_file with a server started with device_args"""
+        token = f"HALO_GS_{uuid.uuid4().hex}"
+        job = (
+            f"<< /OutputFile {_ps_string(Path(output_file).resolve())} >> setpagedevice\n"
+            f"{{ {_ps_string(Path(input_file).resolve())} run }} stopped\n"
+            f"<< /OutputFile {_ps_string(self._idle_file)} >> setpagedevice\n"
+            f"{{ ({token} FAIL\\n) }} {{ ({token} OK\\n) }} ifelse print flush clear cleardictstack\n"
+        )
+        
+        with self._lock:
+            process, lines = self._connect(tuple(device_args))
+            tail = deque(maxlen=STDERR_TAIL_LINES)
+            deadline = time.monotonic() + timeout
+            try:
+                process.stdin.write(job)
+                process.stdin.flush()
+                while True:
+                    line = lines.get(timeout=max(0.0, deadline - time.monotonic()))
+                    if line is None:
+                        raise Exception(f"Ghostscript exited: {''.join(tail)}")
+                    if line.startswith(token):
+                        break
+                    tail.append(line)
+            except queue.Empty:
+                self._stop(tuple(device_args))
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            except Exception:
+                self._stop(tuple(device_args))
+                raise
+            
+            if not line.rstrip().endswith("OK"):
+                self._stop(tuple(device_args))
+                raise Exception(f"Ghostscript error: {''.join(tail)}")
+    
+    def shutdown(self):
+        """Terminate the Ghostscript instances owned by this process"""
+        with self._lock:
+            for key in list(self._servers):
+                self._stop(key)
+    
+    def _connect(self, device_args: tuple) -> Tuple[subprocess.Popen, "queue.Queue[str]"]:
+        """Return the running server for device_args, starting it if needed"""
+        # A forked worker inherits the parent's pipes but must not write to its gs
+        if self._pid != os.getpid():
+            self._servers.clear()
+            self._pid = os.getpid()
+            self._idle_file = temp_manager.temp_dir / f"halo_gs_idle_{os.getpid()}.pdf"
+        
+        server = self._servers.get(device_args)
+        if server is not None and server[0].poll() is None:
+            return server
+        
+        self._stop(device_args)
+        allowed = str(temp_manager.temp_dir.resolve() / "*")
+        process = subprocess.Popen(
+            [
+                'gs', '-q', '-dSAFER', '-dNOPAUSE', '-dNOPROMPT',
+                f'--permit-file-read={allowed}', f'--permit-file-write={allowed}',
+                *device_args,
+                f'-sOutputFile={self._idle_file}',
+                '-'
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors='replace'
+        )
+        
+        # Drain output on a thread so run() can wait with a timeout; None marks EOF
+        lines: "queue.Queue[str]" = queue.Queue()
+        def drain():
+            for line in process.stdout:
+                lines.put(line)
+            lines.put(None)
+        threading.Thread(target=drain, daemon=True).start()
+        
+        self._servers[device_args] = (process, lines)
+        logger.info(f"📄 Ghostscript server started (pid {process.pid})")
+        return process, lines
+    
+    def _stop(self, device_args: tuple):
+        server = self._servers.pop(device_args, None)
+        if server is None:
+            return
+        
+        process = server[0]
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+
+
+gs_server = GhostscriptServer()
+
+
 class PDFProcessor:
     """Advanced PDF processing operations"""
     
@@ -30,26 +266,35 @@ class PDFProcessor:
             - preserve_forms: bool (preserve form fields)
         """
         options = options or {}
-        merger = PdfMerger()
         
         try:
-            for idx, pdf_file in enumerate(input_files):
+            # qpdf copies pages by reference and reads stream data from the
+            # sources at save time, so they stay open until then
+            with ExitStack() as stack:
+                merged = stack.enter_context(pikepdf.Pdf.new())
+                bookmarks = []
+                
+                for pdf_file in input_files:
+                    source = stack.enter_context(pikepdf.open(pdf_file))
+                    bookmarks.append((pdf_file.stem, len(merged.pages)))
+                    merged.pages.extend(source.pages)
+                
                 if options.get('add_bookmarks', False):
-                    bookmark_name = pdf_file.stem
-                    merger.append(str(pdf_file), outline_item=bookmark_name)
-                else:
-                    merger.append(str(pdf_file))
-            
-            # Write merged PDF
-            merger.write(str(output_path))
-            merger.close()
-            
-            # Remove metadata if requested
-            if options.get('remove_metadata', False):
-                PDFProcessor._remove_metadata(output_path)
+                    with merged.open_outline() as outline:
+                        for title, page_index in bookmarks:
+                            outline.root.append(pikepdf.OutlineItem(title, page_index))
+                
+                # Remove metadata if requested
+                if options.get('remove_metadata', False):
+                    merged.docinfo.clear()
+                    if '/Metadata' in merged.Root:
+                        del merged.Root.Metadata
+                
+                merged.remove_unreferenced_resources()
+                merged.save(output_path, object_stream_mode=pikepdf.ObjectStreamMode.generate)
             
             return output_path
-            
+        
         except Exception as e:
             raise Exception(f"PDF merge failed: {str(e)}")
     
@@ -71,53 +316,47 @@ class PDFProcessor:
         options = options or {}
         mode = options.get('mode', 'pages')
         
-        reader = PdfReader(str(input_file))
-        total_pages = len(reader.pages)
-        output_files = []
-        
         try:
+            with pikepdf.open(input_file) as pdf:
+                total_pages = len(pdf.pages)
+            
+            # Plan every output file first: (output_file, page indices)
+            jobs = []
+            
             if mode == 'pages':
                 # Extract specific pages
                 pages = options.get('pages', list(range(total_pages)))
                 for page_num in pages:
                     if 0 <= page_num < total_pages:
-                        writer = PdfWriter()
-                        writer.add_page(reader.pages[page_num])
-                        
-                        output_file = output_dir / f"page_{page_num + 1}.pdf"
-                        with open(output_file, 'wb') as f:
-                            writer.write(f)
-                        output_files.append(output_file)
+                        jobs.append((output_dir / f"page_{page_num + 1}.pdf", [page_num]))
             
             elif mode == 'ranges':
                 # Extract page ranges
                 ranges = options.get('ranges', [(0, total_pages)])
                 for idx, (start, end) in enumerate(ranges):
-                    writer = PdfWriter()
-                    for page_num in range(start, min(end, total_pages)):
-                        writer.add_page(reader.pages[page_num])
-                    
-                    output_file = output_dir / f"range_{idx + 1}_{start + 1}-{end}.pdf"
-                    with open(output_file, 'wb') as f:
-                        writer.write(f)
-                    output_files.append(output_file)
+                    jobs.append((
+                        output_dir / f"range_{idx + 1}_{start + 1}-{end}.pdf",
+                        list(range(start, min(end, total_pages)))
+                    ))
             
             elif mode == 'every_n':
                 # Split every N pages
                 every_n = options.get('every_n', 1)
                 for idx in range(0, total_pages, every_n):
-                    writer = PdfWriter()
-                    end = min(idx + every_n, total_pages)
-                    for page_num in range(idx, end):
-                        writer.add_page(reader.pages[page_num])
-                    
-                    output_file = output_dir / f"split_{(idx // every_n) + 1}.pdf"
-                    with open(output_file, 'wb') as f:
-                        writer.write(f)
-                    output_files.append(output_file)
+                    jobs.append((
+                        output_dir / f"split_{(idx // every_n) + 1}.pdf",
+                        list(range(idx, min(idx + every_n, total_pages)))
+                    ))
             
-            return output_files
+            workers = _worker_count(len(jobs), SPLIT_PARALLEL_MIN_FILES, SPLIT_MAX_WORKERS)
+            if workers <= 1:
+                return _write_page_ranges(str(input_file), jobs)
             
+            # Contiguous chunks, so each worker parses the PDF once and output order is kept
+            chunks = _chunks(jobs, workers)
+            results = map_in_pool(_write_page_ranges, [str(input_file)] * len(chunks), chunks)
+            return [output_file for files in results for output_file in files]
+        
         except Exception as e:
             raise Exception(f"PDF split failed: {str(e)}")
     
@@ -148,42 +387,49 @@ class PDFProcessor:
         
         gs_quality = quality_settings.get(quality, '/ebook')
         
-        # Build Ghostscript command
-        gs_cmd = [
-            'gs',
+        # Device settings, shared by the one-shot command and the long-lived server
+        device_args = [
             '-sDEVICE=pdfwrite',
             '-dCompatibilityLevel=1.4',
             f'-dPDFSETTINGS={gs_quality}',
-            '-dNOPAUSE',
-            '-dQUIET',
-            '-dBATCH',
-            f'-sOutputFile={output_file}',
         ]
         
         # Additional options
         if options.get('grayscale', False):
-            gs_cmd.extend([
+            device_args.extend([
                 '-sColorConversionStrategy=Gray',
                 '-dProcessColorModel=/DeviceGray'
             ])
         
         if options.get('remove_annotations', False):
-            gs_cmd.append('-dPrinted=false')
+            device_args.append('-dPrinted=false')
         
-        gs_cmd.append(str(input_file))
+        # Build Ghostscript command
+        gs_cmd = [
+            'gs',
+            *device_args,
+            '-dNOPAUSE',
+            '-dQUIET',
+            '-dBATCH',
+            f'-sOutputFile={output_file}',
+            str(input_file)
+        ]
         
         try:
             # Try Ghostscript first
-            result = subprocess.run(gs_cmd, capture_output=True, text=True, timeout=300)
-            if result.returncode != 0:
-                raise Exception(f"Ghostscript error: {result.stderr}")
+            if gs_server.accepts(input_file, output_file):
+                gs_server.run(device_args, input_file, output_file, timeout=300)
+            else:
+                returncode, stderr = run_with_stderr_tail(gs_cmd, timeout=300)
+                if returncode != 0:
+                    raise Exception(f"Ghostscript error: {stderr}")
             
             # Remove metadata if requested
             if options.get('remove_metadata', False):
                 PDFProcessor._remove_metadata(output_file)
             
             return output_file
-            
+        
         except FileNotFoundError:
             # Fallback to pikepdf compression
             return PDFProcessor._compress_with_pikepdf(input_file, output_file, options)
@@ -196,21 +442,88 @@ class PDFProcessor:
         output_file: Path,
         options: Dict[str, Any]
     ) -> Path:
-        """Fallback compression using pikepdf"""
+        """
+        Fallback compression using pikepdf (qpdf)
+        
+        Identical images are merged and unused resources dropped before the
+        rewrite; Flate streams are recompressed at level 9 only where that is
+        smaller, and the objects packed into object streams with an xref stream.
+        """
         with pikepdf.open(input_file) as pdf:
             if options.get('remove_metadata', False):
                 pdf.docinfo.clear()
                 if '/Metadata' in pdf.Root:
                     del pdf.Root.Metadata
             
-            pdf.save(
-                output_file,
-                compress_streams=True,
-                object_stream_mode=pikepdf.ObjectStreamMode.generate
-            )
+            PDFProcessor._dedupe_images(pdf)
+            pdf.remove_unreferenced_resources()
+            PDFProcessor._recompress_flate_streams(pdf)
+            
+            # Other generalized filters (LZW, ASCII85, ...) are still re-encoded as Flate on save
+            # The level is process-wide; restore it so other saves keep the default
+            previous_level = pikepdf.settings.get_flate_compression_level()
+            pikepdf.settings.set_flate_compression_level(9)
+            try:
+                pdf.save(
+                    output_file,
+                    compress_streams=True,
+                    stream_decode_level=pikepdf.StreamDecodeLevel.generalized,
+                    recompress_flate=False,
+                    deterministic_id=True,
+                    object_stream_mode=pikepdf.ObjectStreamMode.generate
+                )
+            finally:
+                pikepdf.settings.set_flate_compression_level(previous_level)
         
         return output_file
     
+    @staticmethod
+    def _recompress_flate_streams(pdf: pikepdf.Pdf) -> None:
+        """Recompress plain Flate streams at level 9, keeping the original where it is already smaller"""
+        for obj in pdf.objects:
+            if (
+                not isinstance(obj, pikepdf.Stream)
+                or obj.get('/Filter') != pikepdf.Name.FlateDecode
+                or '/DecodeParms' in obj
+            ):
+                continue
+            try:
+                recompressed = zlib.compress(obj.read_bytes(), 9)
+            except pikepdf.PdfError:
+                # Corrupt stream; leave it exactly as it was
+                continue
+            if len(recompressed) < len(obj.read_raw_bytes()):
+                obj.write(recompressed, filter=pikepdf.Name.FlateDecode)
+    
+    @staticmethod
+    def _dedupe_images(pdf: pikepdf.Pdf) -> None:
+        """Point every XObject reference at one copy of each byte-identical image"""
+        canonical = {}
+        duplicates = {}
+        for obj in pdf.objects:
+            if isinstance(obj, pikepdf.Stream) and obj.get('/Subtype') == '/Image':
+                # Raw (still encoded) bytes plus the dictionary, which carries filters, size and SMask refs
+                digest = hashlib.sha256(obj.read_raw_bytes() + obj.stream_dict.unparse()).digest()
+                original = canonical.setdefault(digest, obj)
+                if original.objgen != obj.objgen:
+                    duplicates[obj.objgen] = original
+        
+        if not duplicates:
+            return
+        
+        for obj in pdf.objects:
+            if not isinstance(obj, (pikepdf.Dictionary, pikepdf.Stream)):
+                continue
+            # Resource dictionaries are either indirect objects or inline in a page/form
+            for resources in (obj, obj.get('/Resources')):
+                xobjects = resources.get('/XObject') if isinstance(resources, pikepdf.Dictionary) else None
+                if not isinstance(xobjects, pikepdf.Dictionary):
+                    continue
+                for name in list(xobjects.keys()):
+                    ref = xobjects.get(name)
+                    if ref is not None and ref.is_indirect and ref.objgen in duplicates:
+                        xobjects[name] = duplicates[ref.objgen]
+    
     @staticmethod
     def pdf_to_images(
         input_file: Path,
@@ -224,14 +537,39 @@ class PDFProcessor:
             - dpi: int (default: 300)
             - quality: int (for jpg, 1-100)
             - pages: List[int] (specific pages, default: all)
+            - grayscale: bool
         """
         options = options or {}
         image_format = options.get('format', 'png').lower()
+        if image_format == 'jpeg':
+            image_format = 'jpg'
         dpi = options.get('dpi', 300)
         quality = options.get('quality', 95)
         
         try:
-            # Use pdf2image
+            if pypdfium2 is not None:
+                # PDFium renders in-process: no pdftoppm subprocess or piped bitmaps
+                pdf = pypdfium2.PdfDocument(str(input_file))
+                total_pages = len(pdf)
+                pdf.close()
+                
+                pages = options.get('pages')
+                page_indices = [p for p in pages if 0 <= p < total_pages] if pages else list(range(total_pages))
+                render_args = (output_dir, image_format, dpi, quality, options.get('grayscale', False))
+                
+                workers = _worker_count(len(page_indices), RENDER_PARALLEL_MIN_PAGES, RENDER_MAX_WORKERS)
+                if workers <= 1:
+                    return _render_pages(str(input_file), page_indices, *render_args)
+                
+                # Each worker opens its own PdfDocument; PDFium handles aren't shareable across processes
+                chunks = _chunks(page_indices, workers)
+                results = map_in_pool(
+                    _render_pages, [str(input_file)] * len(chunks), chunks,
+                    *([arg] * len(chunks) for arg in render_args)
+                )
+                return [output_file for files in results for output_file in files]
+            
+            # Fall back to pdf2image (Poppler)
             from pdf2image import convert_from_path
             
             pages = options.get('pages')
@@ -249,18 +587,11 @@ class PDFProcessor:
             for idx, image in enumerate(images):
                 page_num = pages[idx] if pages and idx < len(pages) else idx
                 output_file = output_dir / f"page_{page_num + 1}.{image_format}"
-                
-                if image_format == 'jpg':
-                    image.save(output_file, 'JPEG', quality=quality, optimize=True)
-                elif image_format == 'webp':
-                    image.save(output_file, 'WEBP', quality=quality)
-                else:
-                    image.save(output_file, 'PNG', optimize=True)
-                
+                _save_page_image(image, output_file, image_format, quality)
                 output_files.append(output_file)
             
             return output_files
-            
+        
         except ImportError:
             raise Exception("pdf2image library not installed. Install with: pip install pdf2image")
         except Exception as e:
@@ -277,12 +608,57 @@ class PDFProcessor:
     
     @staticmethod
     def get_pdf_info(pdf_path: Path) -> Dict[str, Any]:
-        """Get PDF information"""
-        reader = PdfReader(str(pdf_path))
-        info = {
+        """Get PDF information (cached until the file changes)"""
+        stat = pdf_path.stat()
+        info = PDFProcessor._pdf_info_cached(str(pdf_path), stat.st_mtime_ns, stat.st_size)
+        return {**info, 'metadata': dict(info['metadata'])}
+    
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _pdf_info_cached(path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+        """Parse a PDF's info once per (path, mtime, size); a rewrite changes the key"""
+        reader = PdfReader(path)
+        return {
             'pages': len(reader.pages),
             'metadata': dict(reader.metadata) if reader.metadata else {},
             'encrypted': reader.is_encrypted,
-            'size_bytes': pdf_path.stat().st_size
+            'size_bytes': size
         }
-        return info
+    
+    # Async variants for request handlers; the work runs in a thread so the event loop stays free
+    
+    @staticmethod
+    async def amerge_pdfs(
+        input_files: List[Path],
+        output_path: Path,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Path:
+        """Async variant of merge_pdfs"""
+        return await asyncio.to_thread(PDFProcessor.merge_pdfs, input_files, output_path, options)
+    
+    @staticmethod
+    async def asplit_pdf(
+        input_file: Path,
+        output_dir: Path,
+        options: Optional[Dict[str, Any]] = None
+    ) -> List[Path]:
+        """Async variant of split_pdf"""
+        return await asyncio.to_thread(PDFProcessor.split_pdf, input_file, output_dir, options)
+    
+    @staticmethod
+    async def acompress_pdf(
+        input_file: Path,
+        output_file: Path,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Path:
+        """Async variant of compress_pdf"""
+        return await asyncio.to_thread(PDFProcessor.compress_pdf, input_file, output_file, options)
+    
+    @staticmethod
+    async def apdf_to_images(
+        input_file: Path,
+        output_dir: Path,
+        options: Optional[Dict[str, Any]] = None
+    ) -> List[Path]:
+        """Async variant of pdf_to_images"""
+        return await asyncio.to_thread(PDFProcessor.pdf_to_images, input_file, output_dir, options)
@@ -0,0 +1,58 @@
+"""
+Shared Process Pool
+One pool per process for CPU-bound fan-out (PDF split, page rendering, batch resize)
+"""
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, List, Optional
+
+# Worker processes shared by every caller; defaults to CPU count
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", "0")) or os.cpu_count() or 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def _context():
+    """
+    forkserver where available, else spawn
+    
+    The API process runs uvicorn and to_thread workers; forking it from one
+    of those threads can leave a lock held forever in the child.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """The shared pool, started on first use (and again in a forked child)"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS, mp_context=_context())
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def map_in_pool(fn: Callable[..., Any], *iterables: Iterable) -> List[Any]:
+    """executor.map over the shared pool, collected in order"""
+    pool = get_process_pool()
+    try:
+        return list(pool.map(fn, *iterables))
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); start a fresh pool for the next caller
+        global _pool
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        pool.shutdown(wait=False)
+        raise
+
+
+def in_pool_worker() -> bool:
+    """True inside a pool worker, where nested parallelism only oversubscribes the CPU"""
+    return multiprocessing.parent_process() is not None
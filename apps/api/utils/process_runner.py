@@ -0,0 +1,50 @@
+"""
+External Process Runner
+Run CLI tools (Ghostscript, ffmpeg) without buffering their whole output
+"""
+import subprocess
+import threading
+from collections import deque
+from typing import List, Tuple
+
+# Lines of stderr kept for error messages
+STDERR_TAIL_LINES = 200
+
+
+def run_with_stderr_tail(cmd: List[str], timeout: float, max_lines: int = STDERR_TAIL_LINES) -> Tuple[int, str]:
+    """
+    Run cmd to completion, keeping only the last max_lines of stderr
+    
+    stdout is discarded and stdin closed, so chatty tools can't grow memory or
+    block waiting for input. The process is killed if it outlives timeout.
+    
+    Returns:
+        (return code, stderr tail)
+    
+    Raises:
+        FileNotFoundError: The executable is missing
+        subprocess.TimeoutExpired: The process was killed after timeout seconds
+    """
+    tail = deque(maxlen=max_lines)
+    
+    with subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors='replace'
+    ) as proc:
+        # Drain stderr on a thread so a full pipe can't stall the process
+        reader = threading.Thread(target=tail.extend, args=(proc.stderr,), daemon=True)
+        reader.start()
+        try:
+            returncode = proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            reader.join()
+    
+    return returncode, "".join(tail)
@@ -4,9 +4,41 @@ Standardized responses for all tool endpoints
 """
 from typing import Optional, Dict, Any
 from fastapi import Response
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from pathlib import Path
+from urllib.parse import quote
 import mimetypes
+import os
+
+from .temp_manager import temp_manager
+
+# Internal nginx location aliased to the temp dir (e.g. /internal/); set to let nginx send files
+X_ACCEL_REDIRECT_PREFIX = os.getenv("X_ACCEL_REDIRECT_PREFIX", "")
+
+# Tool output types, so the common cases skip the mimetypes registry
+_MIME_TABLE: Dict[str, str] = {
+    '.pdf': 'application/pdf',
+    '.mp4': 'video/mp4',
+    '.webm': 'video/webm',
+    '.mkv': 'video/x-matroska',
+    '.mp3': 'audio/mpeg',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.webp': 'image/webp',
+    '.gif': 'image/gif',
+    '.zip': 'application/zip',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.txt': 'text/plain',
+}
+
+
+class LargeChunkFileResponse(FileResponse):
+    """FileResponse reading 1MB at a time instead of 64KB, for large tool outputs"""
+    chunk_size = 1024 * 1024
+
 
 class ResponseHelper:
     """Helper for creating standardized API responses"""
@@ -16,7 +48,7 @@ class ResponseHelper:
         message: str,
         data: Optional[Dict[str, Any]] = None,
         status_code: int = 200
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         """Return success JSON response"""
         response_data = {
             "success": True,
@@ -25,7 +57,7 @@ class ResponseHelper:
         if data:
             response_data["data"] = data
         
-        return JSONResponse(
+        return ORJSONResponse(
             content=response_data,
             status_code=status_code
         )
@@ -35,7 +67,7 @@ class ResponseHelper:
         message: str,
         error_code: Optional[str] = None,
         status_code: int = 400
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         """Return error JSON response"""
         response_data = {
             "success": False,
@@ -44,7 +76,7 @@ class ResponseHelper:
         if error_code:
             response_data["error_code"] = error_code
         
-        return JSONResponse(
+        return ORJSONResponse(
             content=response_data,
             status_code=status_code
         )
@@ -55,21 +87,33 @@ class ResponseHelper:
         filename: Optional[str] = None,
         media_type: Optional[str] = None,
         as_attachment: bool = True
-    ) -> FileResponse:
-        """Return file download response"""
+    ) -> Response:
+        """
+        Return file download response
+        
+        With X_ACCEL_REDIRECT_PREFIX set, files under the temp dir are handed to
+        nginx via X-Accel-Redirect so no bytes pass through Python.
+        """
         if not filename:
             filename = filepath.name
         
         if not media_type:
-            media_type, _ = mimetypes.guess_type(str(filepath))
-            if not media_type:
-                media_type = "application/octet-stream"
+            media_type = ResponseHelper.get_mime_type(filepath.name)
         
         headers = {}
         if as_attachment:
             headers["Content-Disposition"] = f'attachment; filename="{filename}"'
         
-        return FileResponse(
+        if X_ACCEL_REDIRECT_PREFIX:
+            try:
+                relative = filepath.resolve().relative_to(temp_manager.temp_dir.resolve())
+            except ValueError:
+                relative = None
+            if relative is not None:
+                headers["X-Accel-Redirect"] = X_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + quote(relative.as_posix())
+                return Response(media_type=media_type, headers=headers)
+        
+        return LargeChunkFileResponse(
             path=str(filepath),
             filename=filename,
             media_type=media_type,
@@ -98,7 +142,7 @@ class ResponseHelper:
         task_id: str,
         estimated_time: Optional[int] = None,
         status_url: Optional[str] = None
-    ) -> JSONResponse:
+    ) -> ORJSONResponse:
         """Return processing status response for async tasks"""
         data = {
             "success": True,
@@ -113,10 +157,12 @@ class ResponseHelper:
         if status_url:
             data["status_url"] = status_url
         
-        return JSONResponse(content=data, status_code=202)
+        return ORJSONResponse(content=data, status_code=202)
     
     @staticmethod
     def get_mime_type(filename: str) -> str:
         """Get MIME type for filename"""
-        mime_type, _ = mimetypes.guess_type(filename)
+        mime_type = _MIME_TABLE.get(Path(filename).suffix.lower())
+        if mime_type is None:
+            mime_type, _ = mimetypes.guess_type(filename)
         return mime_type or "application/octet-stream"
@@ -2,12 +2,42 @@
 Video Processing Utility
 Video download and processing using yt-dlp and ffmpeg
 """
+import asyncio
 import subprocess
 import json
+import logging
+import threading
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, Tuple
+from urllib.parse import urlparse
 import re
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .process_runner import run_with_stderr_tail, STDERR_TAIL_LINES
+
+logger = logging.getLogger(__name__)
+
+# Hardware H.264 encoders, in order of preference
+HW_H264_ENCODERS = ('h264_nvenc', 'h264_qsv', 'h264_videotoolbox')
+
+# Marks yt-dlp progress lines (from --progress-template) apart from its log output
+PROGRESS_PREFIX = 'HALO_PROGRESS '
+
+# Basic URL validation, applied to the host part only
+HOST_PATTERN = re.compile(
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?$', re.IGNORECASE)  # optional port
+
+WHITESPACE_PATTERN = re.compile(r'\s')
+
 class VideoProcessor:
     """Video processing operations"""
     
@@ -43,7 +73,8 @@ class VideoProcessor:
     def download_video(
         url: str,
         output_path: Path,
-        options: Optional[Dict[str, Any]] = None
+        options: Optional[Dict[str, Any]] = None,
+        on_progress: Optional[Callable[[str], None]] = None
     ) -> Path:
         """
         Download video from URL using yt-dlp
@@ -53,6 +84,8 @@ class VideoProcessor:
             - audio_only: bool (download audio only)
             - subtitles: bool (download subtitles)
             - max_filesize: int (in MB)
+        
+        on_progress, if given, is called with "<percent>|<downloaded bytes>" lines as they arrive.
         """
         options = options or {}
         
@@ -106,19 +139,16 @@ class VideoProcessor:
                 '-o', str(output_path),
                 '--no-playlist',  # Don't download playlists
                 '--no-warnings',
+                '--progress', '--newline',
+                '--progress-template', f'{PROGRESS_PREFIX}%(progress._percent_str)s|%(progress._downloaded_bytes_str)s',
                 url
             ])
             
             # Execute download
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10 minute timeout
-            )
+            returncode, output = VideoProcessor._run_ytdlp(cmd, timeout=600, on_progress=on_progress)  # 10 minute timeout
             
-            if result.returncode != 0:
-                raise Exception(f"Download failed: {result.stderr}")
+            if returncode != 0:
+                raise Exception(f"Download failed: {output}")
             
             # yt-dlp might add extension, find the actual file
             if not output_path.exists():
@@ -132,7 +162,7 @@ class VideoProcessor:
                     raise Exception("Downloaded file not found")
             
             return output_path
-            
+        
         except FileNotFoundError:
             raise Exception("yt-dlp not found. Please install with: pip install yt-dlp")
         except subprocess.TimeoutExpired:
@@ -140,6 +170,47 @@ class VideoProcessor:
         except Exception as e:
             raise Exception(f"Video download failed: {str(e)}")
     
+    @staticmethod
+    def _run_ytdlp(
+        cmd: List[str],
+        timeout: float,
+        on_progress: Optional[Callable[[str], None]] = None
+    ) -> Tuple[int, str]:
+        """
+        Run yt-dlp reading its output line by line
+        
+        Progress lines go to on_progress; only the last lines of everything else
+        are kept for the error message, so a long download never buffers its log.
+        """
+        tail = deque(maxlen=STDERR_TAIL_LINES)
+        
+        with subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors='replace'
+        ) as proc:
+            # Reading blocks until yt-dlp prints, so the deadline is enforced from a timer
+            timer = threading.Timer(timeout, proc.kill)
+            timer.start()
+            try:
+                for line in proc.stdout:
+                    if line.startswith(PROGRESS_PREFIX):
+                        if on_progress:
+                            on_progress(line[len(PROGRESS_PREFIX):].strip())
+                    else:
+                        tail.append(line)
+                returncode = proc.wait()
+            finally:
+                timed_out = not timer.is_alive()
+                timer.cancel()
+        
+        if timed_out:
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        return returncode, "".join(tail)
+    
     @staticmethod
     def get_video_info(url: str) -> Dict[str, Any]:
         """Get video information without downloading"""
@@ -151,17 +222,17 @@ class VideoProcessor:
                 url
             ]
             
+            # Raw bytes: orjson parses them directly, skipping a decode of the (often MB-sized) dump
             result = subprocess.run(
                 cmd,
                 capture_output=True,
-                text=True,
                 timeout=30
             )
             
             if result.returncode != 0:
-                raise Exception(f"Failed to get video info: {result.stderr}")
+                raise Exception(f"Failed to get video info: {result.stderr.decode(errors='replace')}")
             
-            info = json.loads(result.stdout)
+            info = orjson.loads(result.stdout) if orjson is not None else json.loads(result.stdout)
             
             return {
                 'title': info.get('title', 'Unknown'),
@@ -180,23 +251,60 @@ class VideoProcessor:
                     for f in info.get('formats', [])
                 ]
             }
-            
+        
         except Exception as e:
             raise Exception(f"Failed to get video info: {str(e)}")
     
     @staticmethod
     def _is_valid_url(url: str) -> bool:
         """Validate video URL"""
-        # Basic URL validation
-        url_pattern = re.compile(
-            r'^https?://'  # http:// or https://
-            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-            r'localhost|'  # localhost...
-            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-            r'(?::\d+)?'  # optional port
-            r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+        # Cheap scheme check first; the regex then only sees the short host part
+        if not url.startswith(('http://', 'https://')) or WHITESPACE_PATTERN.search(url):
+            return False
+        try:
+            netloc = urlparse(url).netloc
+        except ValueError:
+            # e.g. a malformed IPv6 host such as http://[::1
+            return False
+        return HOST_PATTERN.match(netloc) is not None
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _detect_hw_encoder() -> Optional[str]:
+        """
+        First hardware H.264 encoder that actually works on this host, probed once
         
-        return url_pattern.match(url) is not None
+        Distribution ffmpeg builds list NVENC/QSV even without the hardware, so
+        each candidate has to encode a few test frames to count.
+        """
+        for encoder in HW_H264_ENCODERS:
+            try:
+                result = subprocess.run(
+                    [
+                        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                        '-f', 'lavfi', '-i', 'color=size=256x256:duration=0.2',
+                        '-c:v', encoder, '-f', 'null', '-'
+                    ],
+                    capture_output=True,
+                    timeout=15
+                )
+            except (FileNotFoundError, subprocess.TimeoutExpired):
+                return None
+            if result.returncode == 0:
+                logger.info(f"🎬 Hardware video encoder available: {encoder}")
+                return encoder
+        return None
+    
+    @staticmethod
+    def _hw_quality_args(encoder: str, crf: int) -> List[str]:
+        """Constant-quality settings for a hardware encoder, roughly matching an x264 CRF"""
+        if encoder == 'h264_nvenc':
+            # -b:v 0 lifts the default 2 Mb/s cap so -cq alone sets the quality
+            return ['-preset', 'p4', '-tune', 'hq', '-rc', 'vbr', '-cq', str(crf), '-b:v', '0']
+        if encoder == 'h264_qsv':
+            return ['-global_quality', str(crf)]
+        # VideoToolbox: -q:v 1-100, higher is better
+        return ['-q:v', str(max(1, round(100 - crf * 100 / 51)))]
     
     @staticmethod
     def convert_video_format(
@@ -211,44 +319,77 @@ class VideoProcessor:
             - audio_codec: str (audio codec, e.g., 'aac', 'mp3')
             - quality: int (CRF value, 0-51, lower is better)
             - resolution: str (e.g., '1920x1080', '1280x720')
+            - hw_accel: bool (use a GPU H.264 encoder when available, default: True)
         """
         options = options or {}
         
-        try:
-            cmd = ['ffmpeg', '-i', str(input_file)]
+        def build_cmd(hw_encoder: Optional[str]) -> List[str]:
+            cmd = ['ffmpeg']
+            if hw_encoder:
+                cmd.extend(['-hwaccel', 'auto'])
+            cmd.extend(['-i', str(input_file)])
             
-            # Video codec
-            codec = options.get('codec', 'libx264')
-            cmd.extend(['-c:v', codec])
+            # Video codec and quality (CRF)
+            quality = options.get('quality', 23)
+            if hw_encoder:
+                cmd.extend(['-c:v', hw_encoder])
+                cmd.extend(VideoProcessor._hw_quality_args(hw_encoder, quality))
+            else:
+                cmd.extend(['-c:v', codec])
+                cmd.extend(['-crf', str(quality)])
             
             # Audio codec
             audio_codec = options.get('audio_codec', 'aac')
             cmd.extend(['-c:a', audio_codec])
             
-            # Quality (CRF)
-            quality = options.get('quality', 23)
-            cmd.extend(['-crf', str(quality)])
-            
             # Resolution
             if 'resolution' in options:
                 cmd.extend(['-s', options['resolution']])
             
             # Output
             cmd.extend(['-y', str(output_file)])  # -y to overwrite
+            return cmd
+        
+        try:
+            codec = options.get('codec', 'libx264')
+            hw_encoder = None
+            if codec == 'libx264' and options.get('hw_accel', True):
+                hw_encoder = VideoProcessor._detect_hw_encoder()
             
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=600
-            )
+            returncode, stderr = run_with_stderr_tail(build_cmd(hw_encoder), timeout=600)
             
-            if result.returncode != 0:
-                raise Exception(f"FFmpeg conversion failed: {result.stderr}")
+            if returncode != 0 and hw_encoder:
+                # Some inputs exceed what the hardware encoder supports; x264 handles everything
+                logger.warning(f"⚠️ {hw_encoder} failed, retrying with libx264: {stderr[-500:]}")
+                returncode, stderr = run_with_stderr_tail(build_cmd(None), timeout=600)
             
-            return output_file
+            if returncode != 0:
+                raise Exception(f"FFmpeg conversion failed: {stderr}")
             
+            return output_file
+        
         except FileNotFoundError:
             raise Exception("FFmpeg not found. Please install FFmpeg.")
         except Exception as e:
             raise Exception(f"Video conversion failed: {str(e)}")
+    
+    # Async variants for request handlers; the work runs in a thread so the event loop stays free
+    
+    @staticmethod
+    async def adownload_video(
+        url: str,
+        output_path: Path,
+        options: Optional[Dict[str, Any]] = None,
+        on_progress: Optional[Callable[[str], None]] = None
+    ) -> Path:
+        """Async variant of download_video; on_progress is called from the worker thread"""
+        return await asyncio.to_thread(VideoProcessor.download_video, url, output_path, options, on_progress)
+    
+    @staticmethod
+    async def aconvert_video_format(
+        input_file: Path,
+        output_file: Path,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Path:
+        """Async variant of convert_video_format"""
+        return await asyncio.to_thread(VideoProcessor.convert_video_format, input_file, output_file, options)